@@ -0,0 +1,70 @@
+"""Benchmark the local (NumPy) Landsat QA_PIXEL cloud mask
+
+The lookup table mask is compared against decoding the QA_PIXEL bits for
+every pixel.  The QA values are sampled from a small set of typical values.
+
+Usage:
+    python benchmarks/cloud_mask.py --size 7000 --scenes 5
+
+"""
+import argparse
+import time
+
+import numpy as np
+
+from openet.sims import array_cloud_mask
+
+# Clear, cloud, shadow, dilated cloud, cirrus, snow, water, and fill values
+QA_PIXEL_VALUES = [21824, 22280, 23888, 21826, 21828, 13600, 21952, 1]
+
+
+def bitwise_mask(qa_pixel):
+    """Decode the QA_PIXEL bits for every pixel (default image flags)"""
+    mask = (qa_pixel >> 0) & 1
+    for bit in [1, 2, 3, 4, 5]:
+        mask |= (qa_pixel >> bit) & 1
+    return mask == 0
+
+
+def main(size, scenes, buffer_pixels):
+    rng = np.random.default_rng(0)
+    qa_pixel = rng.choice(
+        np.array(QA_PIXEL_VALUES, dtype=np.uint16), size=(size, size),
+        p=[0.72, 0.08, 0.05, 0.05, 0.04, 0.03, 0.02, 0.01])
+    cloudmask_args = {'cirrus_flag': True, 'dilate_flag': True,
+                      'shadow_flag': True, 'snow_flag': True}
+
+    start = time.perf_counter()
+    for i in range(scenes):
+        bitwise_mask(qa_pixel)
+    bitwise_time = (time.perf_counter() - start) / scenes
+
+    start = time.perf_counter()
+    for i in range(scenes):
+        array_cloud_mask.landsat_c2_sr_cloud_mask(qa_pixel, **cloudmask_args)
+    lut_time = (time.perf_counter() - start) / scenes
+
+    start = time.perf_counter()
+    array_cloud_mask.landsat_c2_sr_cloud_mask(
+        qa_pixel, buffer_flag=True, buffer_pixels=buffer_pixels, **cloudmask_args)
+    buffer_time = time.perf_counter() - start
+
+    print(f'{size}x{size} pixels, {scenes} scenes')
+    print(f'  bitwise:       {1000 * bitwise_time:.1f} ms/scene')
+    print(f'  lookup table:  {1000 * lut_time:.1f} ms/scene')
+    print(f'  lookup table + {buffer_pixels} pixel buffer: {1000 * buffer_time:.1f} ms')
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the local Landsat QA_PIXEL cloud mask',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--size', default=7000, type=int, help='Scene size (pixels)')
+    parser.add_argument('--scenes', default=5, type=int, help='Number of scenes')
+    parser.add_argument('--buffer', default=10, type=int, help='Buffer pixels')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = arg_parse()
+    main(size=args.size, scenes=args.scenes, buffer_pixels=args.buffer)
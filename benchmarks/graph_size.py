@@ -0,0 +1,288 @@
+"""Benchmark the Earth Engine graph size and Python build time (offline)
+
+The Model, Image, and Collection objects are built for growing date ranges,
+collection (sensor) counts, and variable lists, and the Python build time,
+serialized expression size, and number of expression nodes are recorded.
+Nothing is computed by Earth Engine, so the earthengine-api is initialized
+offline using the algorithm definitions distributed with the package tests.
+
+Each run is compared against the last run in the JSON history file and any
+case that exceeds the history file thresholds is reported as a regression.
+The graph size and node count are deterministic, so by default only they are
+checked.  The build time is the median of the repetitions and is only checked
+with --timing, where it must also increase by more than the absolute floor.
+
+Usage:
+    python benchmarks/graph_size.py
+    python benchmarks/graph_size.py --timing --repeat 9
+    python benchmarks/graph_size.py --save --history benchmarks/graph_size_history.json
+
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import ee
+
+from openet.sims import ee_replay
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'graph_size_history.json')
+
+# Maximum relative increase of each metric from the previous run
+THRESHOLDS = {'nodes': 0.02, 'size': 0.02, 'build_time': 1.0}
+# Minimum absolute increase of each metric from the previous run (seconds)
+FLOORS = {'build_time': 0.05}
+# Metrics that are checked without the --timing option
+GRAPH_METRICS = ['nodes', 'size']
+
+# Landsat 7, 8, and 9 are all kept by the Collection for date ranges that
+#   start before 2022-01-01 and end after it (Landsat 5 ended in 2012)
+COLLECTIONS = [
+    'LANDSAT/LC08/C02/T1_L2',
+    'LANDSAT/LE07/C02/T1_L2',
+    'LANDSAT/LC09/C02/T1_L2',
+]
+SCENE_ID = 'LANDSAT/LC08/C02/T1_L2/LC08_044033_20170716'
+START_DATE = '2021-12-15'
+IMAGE_VARIABLES = [
+    ['et'],
+    ['et', 'et_reference', 'et_fraction'],
+    ['et', 'et_reference', 'et_fraction', 'ndvi', 'kc', 'fc', 'mask'],
+]
+INTERP_VARIABLES = [
+    ['et'],
+    ['et', 'et_reference', 'et_fraction'],
+    ['et', 'et_reference', 'et_fraction', 'ndvi', 'count'],
+]
+
+# Value node types in the encoded (cloud API) expressions
+NODE_KEYS = {
+    'argumentReference', 'arrayValue', 'bytesValue', 'constantValue', 'dictionaryValue',
+    'functionDefinitionValue', 'functionInvocationValue', 'integerValue', 'nullValue',
+    'valueReference',
+}
+
+
+def graph_stats(ee_obj):
+    """Return the number of nodes and the serialized size of an EE object
+
+    The serializer shares repeated sub-expressions, so the node count is the
+    number of unique expression nodes, including the nodes in the bodies of
+    the mapped functions.
+
+    """
+    encoded = ee.serializer.encode(ee_obj, for_cloud_api=True)
+    return count_nodes(encoded), len(ee.serializer.toJSON(ee_obj))
+
+
+def count_nodes(encoded):
+    """Count the expression nodes in an encoded (cloud API) expression"""
+    if isinstance(encoded, dict):
+        count = 1 if NODE_KEYS.intersection(encoded.keys()) else 0
+        return count + sum(count_nodes(v) for v in encoded.values())
+    elif isinstance(encoded, list):
+        return sum(count_nodes(v) for v in encoded)
+    return 0
+
+
+def end_date(months):
+    start_dt = datetime.datetime.strptime(START_DATE, '%Y-%m-%d')
+    month = start_dt.month - 1 + months
+    return start_dt.replace(year=start_dt.year + month // 12, month=month % 12 + 1)\
+        .strftime('%Y-%m-%d')
+
+
+def model_kc(crop_type_kc_flag=False):
+    from openet.sims.model import Model
+    m = Model(
+        year=ee.Number(2017), doy=ee.Number(197), crop_type_source='USDA/NASS/CDL/2017',
+        crop_type_kc_flag=crop_type_kc_flag,
+    )
+    return m.kc(ee.Image(SCENE_ID).select(['SR_B5']))
+
+
+def image_calculate(variables):
+    from openet.sims.image import Image
+    return Image.from_image_id(
+        SCENE_ID, et_reference_source='IDAHO_EPSCOR/GRIDMET', et_reference_band='eto',
+        crop_type_source='USDA/NASS/CDL/2017',
+    ).calculate(variables)
+
+
+def collection(sensors, months, variables):
+    from openet.sims.collection import Collection
+    return Collection(
+        collections=COLLECTIONS[:sensors],
+        start_date=START_DATE,
+        end_date=end_date(months),
+        geometry=ee.Geometry.Point(-121.5265, 38.7399),
+        variables=variables,
+        et_reference_source='IDAHO_EPSCOR/GRIDMET',
+        et_reference_band='eto',
+        et_reference_factor=1.0,
+        et_reference_resample='nearest',
+        model_args={'crop_type_source': 'USDA/NASS/CDL/2017'},
+    )
+
+
+def collection_overpass(sensors, months, variables):
+    return collection(sensors, months, variables).overpass(variables=variables)
+
+
+def collection_interpolate(sensors, months, variables, t_interval='monthly', **kwargs):
+    return collection(sensors, months, variables).interpolate(
+        variables=variables, t_interval=t_interval, **kwargs)
+
+
+def benchmark_cases():
+    """Generate the case names and the functions that build each EE object"""
+    for crop_type_kc_flag in [False, True]:
+        yield (f'model_kc[crop_type_kc={crop_type_kc_flag}]',
+               lambda a=crop_type_kc_flag: model_kc(a))
+    for variables in IMAGE_VARIABLES:
+        yield (f'image_calculate[vars={len(variables)}]',
+               lambda v=variables: image_calculate(v))
+    for sensors in [1, 2, 3]:
+        for months in [1, 3, 12]:
+            yield (f'collection_overpass[sensors={sensors},months={months}]',
+                   lambda s=sensors, m=months: collection_overpass(s, m, IMAGE_VARIABLES[1]))
+    for sensors in [1, 2, 3]:
+        for months in [1, 3, 12]:
+            for t_interval in ['daily', 'monthly']:
+                yield (
+                    f'collection_interpolate[sensors={sensors},months={months},'
+                    f't_interval={t_interval}]',
+                    lambda s=sensors, m=months, t=t_interval:
+                        collection_interpolate(s, m, INTERP_VARIABLES[1], t_interval=t)
+                )
+    for variables in INTERP_VARIABLES:
+        yield (f'collection_interpolate[vars={len(variables)}]',
+               lambda v=variables: collection_interpolate(1, 1, v))
+    yield ('collection_interpolate[months=12,use_groups=True]',
+           lambda: collection_interpolate(1, 12, INTERP_VARIABLES[1], use_groups=True))
+
+
+def run(pattern=None, repeat=5):
+    """Build and serialize each case
+
+    The build time is the median time of the repetitions and includes the
+    serialization.
+
+    """
+    if not ee.data.is_initialized():
+        ee_replay.offline_initialize()
+    results = {}
+    for name, build_fn in benchmark_cases():
+        if pattern and pattern not in name:
+            continue
+        build_times = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            nodes, size = graph_stats(build_fn())
+            build_times.append(time.perf_counter() - start)
+        results[name] = {'nodes': nodes, 'size': size, 'build_time': statistics.median(build_times)}
+    return results
+
+
+def regressions(results, previous, thresholds, floors=None, metrics=None):
+    """Return the metrics that increased by more than the thresholds
+
+    A metric is only a regression if the relative increase is greater than
+    the threshold and the absolute increase is greater than the floor (if set).
+    Cases that are not in the previous results are skipped.
+
+    """
+    if floors is None:
+        floors = {}
+    if metrics is None:
+        metrics = list(thresholds.keys())
+    output = []
+    for name, values in results.items():
+        if name not in previous.keys():
+            continue
+        for metric in metrics:
+            prev_value = previous[name].get(metric)
+            if not prev_value or metric not in thresholds.keys():
+                continue
+            change = (values[metric] - prev_value) / prev_value
+            if (change > thresholds[metric] and
+                    values[metric] - prev_value > floors.get(metric, 0)):
+                output.append((name, metric, prev_value, values[metric], change))
+    return output
+
+
+def read_history(history_path):
+    if not os.path.isfile(history_path):
+        return {'thresholds': dict(THRESHOLDS), 'floors': dict(FLOORS), 'runs': []}
+    with open(history_path) as f:
+        return json.load(f)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def main(history_path=HISTORY_PATH, save_flag=False, pattern=None, repeat=5,
+         timing_flag=False):
+    history = read_history(history_path)
+    thresholds = history.get('thresholds', THRESHOLDS)
+    floors = history.get('floors', FLOORS)
+    metrics = GRAPH_METRICS + (['build_time'] if timing_flag else [])
+    previous = history['runs'][-1]['results'] if history['runs'] else {}
+
+    results = run(pattern=pattern, repeat=repeat)
+
+    print(f'{"case":<64} {"nodes":>7} {"size":>9} {"build (ms)":>11}')
+    for name, case_metrics in results.items():
+        print(f'{name:<64} {case_metrics["nodes"]:>7d} {case_metrics["size"]:>9d} '
+              f'{1000 * case_metrics["build_time"]:>11.1f}')
+
+    regression_list = regressions(results, previous, thresholds, floors, metrics)
+    for name, metric, prev_value, value, change in regression_list:
+        print(f'REGRESSION {name} {metric}: {prev_value:g} -> {value:g} ({100 * change:+.1f}%)')
+
+    if save_flag:
+        history['thresholds'] = thresholds
+        history['floors'] = floors
+        history['runs'].append({
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'earthengine_api': ee.__version__,
+            'results': results,
+        })
+        with open(history_path, 'w') as f:
+            json.dump(history, f, indent=2)
+            f.write('\n')
+
+    return 1 if regression_list else 0
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Earth Engine graph size and build time (offline)',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--history', default=HISTORY_PATH, help='JSON history file')
+    parser.add_argument('--save', action='store_true',
+                        help='Append the results to the history file')
+    parser.add_argument('--filter', default=None, help='Only run cases containing this string')
+    parser.add_argument('--repeat', default=5, type=int, help='Number of repetitions')
+    parser.add_argument('--timing', action='store_true',
+                        help='Also check the build time for regressions')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = arg_parse()
+    sys.exit(main(history_path=args.history, save_flag=args.save,
+                  pattern=args.filter, repeat=args.repeat, timing_flag=args.timing))
@@ -0,0 +1,83 @@
+"""Benchmark the crop class dispatch Kc against the sequential where() chain
+
+Local (NumPy) compute time is measured with the ArrayModel for a synthetic
+scene with a realistic mix of crop classes.  The fused Numba kernel
+(jit_flag) is also timed if Numba is installed (the first call compiles the
+kernel, so the best time of the repetitions is reported), and the lookup
+table Kc (kc_lut_flag) is timed after the table is built.  The dispatch mode
+is local only, the Earth Engine Model always uses the where() chain.
+
+Usage:
+    python benchmarks/kc_dispatch.py --size 1000 --repeat 5
+
+"""
+import argparse
+import time
+
+import numpy as np
+
+from openet.sims import array_kernels
+from openet.sims import data
+from openet.sims.array_model import ArrayModel
+
+
+def synthetic_scene(size, ag_fraction=0.6, seed=0):
+    """Build synthetic crop type and NDVI arrays"""
+    rng = np.random.default_rng(seed)
+    crop_types = np.array(sorted(data.cdl.keys()))
+    crop_type = np.where(
+        rng.uniform(size=(size, size)) < ag_fraction,
+        rng.choice(crop_types, size=(size, size)),
+        rng.choice([0, 111, 121, 141, 190], size=(size, size)),
+    )
+    ndvi = rng.uniform(-0.2, 0.95, size=(size, size))
+    return crop_type, ndvi
+
+
+def time_local(crop_type, ndvi, kc_dispatch_flag, repeat, **kwargs):
+    """Return the best time (seconds) and the Kc array for the ArrayModel"""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        m = ArrayModel(crop_type=crop_type, doy=197, kc_dispatch_flag=kc_dispatch_flag, **kwargs)
+        kc = m.kc(ndvi)
+        times.append(time.perf_counter() - start)
+    return min(times), kc
+
+
+def main(size, repeat):
+    crop_type, ndvi = synthetic_scene(size)
+    for crop_type_kc_flag in [False, True]:
+        kwargs = {'crop_type_kc_flag': crop_type_kc_flag}
+        where_time, where_kc = time_local(crop_type, ndvi, False, repeat, **kwargs)
+        dispatch_time, dispatch_kc = time_local(crop_type, ndvi, True, repeat, **kwargs)
+        np.testing.assert_array_equal(where_kc, dispatch_kc)
+        print(f'crop_type_kc_flag={crop_type_kc_flag}  ({size}x{size} pixels)')
+        print(f'  where chain:  {where_time:8.4f} s  ({size * size / where_time / 1E6:.1f} Mpix/s)')
+        print(f'  dispatch:     {dispatch_time:8.4f} s  ({size * size / dispatch_time / 1E6:.1f} Mpix/s)')
+        print(f'  speedup:      {where_time / dispatch_time:8.2f}x')
+        if array_kernels.numba_available:
+            jit_time, jit_kc = time_local(crop_type, ndvi, False, repeat, jit_flag=True, **kwargs)
+            np.testing.assert_allclose(where_kc, jit_kc, rtol=1E-12)
+            print(f'  jit kernel:   {jit_time:8.4f} s  ({size * size / jit_time / 1E6:.1f} Mpix/s)')
+            print(f'  speedup:      {where_time / jit_time:8.2f}x')
+
+        lut_time, lut_kc = time_local(crop_type, ndvi, False, repeat, kc_lut_flag=True, **kwargs)
+        max_error = np.nanmax(np.abs(lut_kc - where_kc))
+        print(f'  lookup table: {lut_time:8.4f} s  ({size * size / lut_time / 1E6:.1f} Mpix/s)'
+              f'  max error: {max_error:.5f}')
+        print(f'  speedup:      {where_time / lut_time:8.2f}x')
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the crop class dispatch Kc',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--size', default=1000, type=int, help='Scene size (pixels)')
+    parser.add_argument('--repeat', default=5, type=int, help='Number of repetitions')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = arg_parse()
+    main(size=args.size, repeat=args.repeat)
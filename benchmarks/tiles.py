@@ -0,0 +1,72 @@
+"""Benchmark the tiled multi-process local scene computation
+
+A synthetic Landsat scene is computed with array_tiles.run_scene() for an
+increasing number of worker processes and the throughput and speedup
+relative to a single process are reported.
+
+Usage:
+    python benchmarks/tiles.py --size 7600 --processes 1 8 32 64
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from openet.sims import array_tiles
+
+VARIABLES = ['et', 'et_fraction', 'ndvi', 'fc', 'kc']
+
+
+def synthetic_scene(size, seed=0):
+    rng = np.random.default_rng(seed)
+    source = {
+        'SR_B4': rng.integers(7500, 12000, size=(size, size)).astype(np.uint16),
+        'SR_B5': rng.integers(12000, 30000, size=(size, size)).astype(np.uint16),
+        'QA_PIXEL': rng.choice(
+            np.array([21824, 22280, 23888], dtype=np.uint16), size=(size, size),
+            p=[0.9, 0.05, 0.05]),
+    }
+    crop_type = rng.choice([1, 3, 36, 69, 111, 176], size=(size, size)).astype(np.uint8)
+    et_reference_array = rng.uniform(4, 9, size=(size, size)).astype(np.float32)
+    return source, crop_type, et_reference_array
+
+
+def main(size, processes_list, block_size):
+    source, crop_type, et_reference_array = synthetic_scene(size)
+    properties = {'SPACECRAFT_ID': 'LANDSAT_8', 'DATE_ACQUIRED': '2017-07-16'}
+    print(f'{size}x{size} pixels, {block_size} pixel blocks, {os.cpu_count()} CPUs')
+
+    base_time = None
+    with tempfile.TemporaryDirectory() as output_path:
+        for processes in processes_list:
+            start = time.perf_counter()
+            array_tiles.run_scene(
+                source, output_path, crop_type, variables=VARIABLES,
+                et_reference_source=et_reference_array, properties=properties,
+                block_size=block_size, processes=processes,
+            )
+            run_time = time.perf_counter() - start
+            if base_time is None:
+                base_time = run_time
+            print(f'  {processes:>3d} processes: {run_time:8.2f} s  '
+                  f'({size * size / run_time / 1E6:6.1f} Mpix/s, '
+                  f'speedup {base_time / run_time:5.1f}x)')
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the tiled local scene computation',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--size', default=4000, type=int, help='Scene size (pixels)')
+    parser.add_argument('--processes', default=[1, 2, 4], type=int, nargs='+',
+                        help='Number of worker processes')
+    parser.add_argument('--block', default=1024, type=int, help='Block size (pixels)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = arg_parse()
+    main(size=args.size, processes_list=args.processes, block_size=args.block)
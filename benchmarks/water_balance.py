@@ -0,0 +1,84 @@
+"""Benchmark the local (NumPy) evaporable zone water balance
+
+The daily inputs are synthetic and are broadcast from a single day so that
+only the water balance state and the requested output arrays are allocated.
+With --jit, the fused Numba kernel (jit_flag) is also timed after a one day
+warm up call to compile the kernel.
+
+Usage:
+    python benchmarks/water_balance.py --size 1000 --days 365 --jit
+
+"""
+import argparse
+import time
+
+import numpy as np
+
+from openet.sims import array_interpolate
+
+
+def synthetic_inputs(size, days, seed=0):
+    """Build synthetic daily input arrays with shape (days, size, size)"""
+    rng = np.random.default_rng(seed)
+    shape = (days, size, size)
+    ndvi = rng.uniform(0.0, 0.9, size=(1, size, size)).astype(np.float32)
+    et_fraction = np.clip(ndvi * 1.3 - 0.1, 0, 1.15)
+    et_reference = rng.uniform(1, 8, size=(days, 1, 1)).astype(np.float32)
+    precip = np.where(
+        rng.uniform(size=(days + 1, 1, 1)) < 0.2,
+        rng.uniform(0, 10, size=(days + 1, 1, 1)), 0,
+    ).astype(np.float32)
+    field_capacity = rng.uniform(15, 35, size=(size, size))
+    wilting_point = field_capacity * rng.uniform(0.3, 0.6, size=(size, size))
+    return {
+        'ndvi': np.broadcast_to(ndvi, shape),
+        'et_fraction': np.broadcast_to(et_fraction, shape),
+        'et_reference': np.broadcast_to(et_reference, shape),
+        'precip': np.broadcast_to(precip, (days + 1, size, size)),
+        'field_capacity': field_capacity,
+        'wilting_point': wilting_point,
+    }
+
+
+def main(size, days, variables, jit=False):
+    inputs = synthetic_inputs(size, days)
+    start = time.perf_counter()
+    output = array_interpolate.daily_ke(variables=variables, dtype=np.float32, **inputs)
+    total = time.perf_counter() - start
+    print(f'{size}x{size} pixels, {days} days, variables: {", ".join(variables)}')
+    print(f'  total: {total:.2f} s  per day: {1000 * total / days:.1f} ms')
+    if not jit:
+        return
+
+    array_interpolate.daily_ke(
+        variables=variables, jit_flag=True,
+        **{k: v[:2] if k == 'precip' else v[:1] if v.ndim == 3 else v
+           for k, v in inputs.items()})
+    start = time.perf_counter()
+    jit_output = array_interpolate.daily_ke(
+        variables=variables, dtype=np.float32, jit_flag=True, **inputs)
+    jit_total = time.perf_counter() - start
+    for v in variables:
+        np.testing.assert_allclose(jit_output[v], output[v], rtol=1E-6)
+    print(f'  jit kernel total: {jit_total:.2f} s  per day: {1000 * jit_total / days:.1f} ms'
+          f'  speedup: {total / jit_total:.2f}x')
+
+
+def arg_parse():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the local evaporable zone water balance',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--size', default=1000, type=int, help='Tile size (pixels)')
+    parser.add_argument('--days', default=365, type=int, help='Number of days')
+    parser.add_argument(
+        '--variables', default=['et_fraction'], nargs='+',
+        choices=array_interpolate.WATER_BALANCE_BANDS, help='Output variables')
+    parser.add_argument(
+        '--jit', default=False, action='store_true',
+        help='Also time the fused Numba kernel (requires numba)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = arg_parse()
+    main(size=args.size, days=args.days, variables=args.variables, jit=args.jit)
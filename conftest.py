@@ -0,0 +1,22 @@
+import os
+
+EE_FIXTURES = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'openet', 'sims', 'tests', 'ee_fixtures')
+
+
+# The options are registered in the root conftest so that they are available
+#   when pytest is started from the repository root or from the tests folder
+def pytest_addoption(parser):
+    parser.addoption(
+        '--ee-mode', default=os.environ.get('EE_MODE', 'live'),
+        choices=['live', 'record', 'replay'],
+        help='Send the Earth Engine requests (live), also record the responses '
+             '(record), or serve the recorded responses offline (replay)')
+    parser.addoption(
+        '--ee-fixtures', default=os.environ.get('EE_FIXTURES', EE_FIXTURES),
+        help='Recorded Earth Engine response folder')
+    parser.addoption(
+        '--ee-missing', default=os.environ.get('EE_MISSING', 'fail'),
+        choices=['fail', 'skip'],
+        help='Fail (fail) or skip (skip) the tests that request a response '
+             'that was not recorded (replay mode only)')
@@ -0,0 +1,245 @@
+from functools import lru_cache
+import math
+
+import numpy as np
+
+# Landsat Collection 2 QA_PIXEL bit positions
+QA_PIXEL_BITS = {
+    'fill': 0,
+    'dilated': 1,
+    'cirrus': 2,
+    'cloud': 3,
+    'shadow': 4,
+    'snow': 5,
+    'water': 7,
+}
+
+
+def landsat_c2_sr_cloud_mask(
+        qa_pixel,
+        qa_radsat=None,
+        spacecraft_id=None,
+        cirrus_flag=False,
+        dilate_flag=False,
+        shadow_flag=True,
+        snow_flag=False,
+        water_flag=False,
+        cloud_score_flag=False,
+        cloud_score_pct=100,
+        buffer_flag=False,
+        buffer_pixels=10,
+        filter_flag=False,
+        saturated_flag=False,
+        sr_cloud_qa_flag=False,
+):
+    """Cloud mask for local Landsat Collection 2 QA_PIXEL/QA_RADSAT arrays
+
+    The flags match openet.core.common.landsat_c2_sr_cloud_mask() so the same
+    "cloudmask_args" can be used for the Earth Engine and local images.
+    Each combination of QA flags is precompiled into a cached lookup table
+    over all 16-bit QA values, so the per pixel mask is a single gather.  The
+    filter (erode) and buffer (dilate) steps are applied as separate binary
+    morphology passes and require 2D arrays.
+
+    Parameters
+    ----------
+    qa_pixel : array_like
+        Landsat Collection 2 QA_PIXEL values.
+    qa_radsat : array_like, optional
+        Landsat Collection 2 QA_RADSAT values (only used if saturated_flag).
+    spacecraft_id : str, optional
+        Landsat SPACECRAFT_ID (only used if saturated_flag).
+    cirrus_flag : bool
+        If true, mask cirrus pixels (the default is False).
+    dilate_flag : bool
+        If true, mask dilated cloud pixels (the default is False).
+    shadow_flag : bool
+        If true, mask shadow pixels (the default is True).
+    snow_flag : bool
+        If true, mask snow pixels (the default is False).
+    water_flag : bool
+        If true, mask water pixels (the default is False).
+    buffer_flag : bool
+        If true, dilate the cloud mask by buffer_pixels (the default is False).
+    buffer_pixels : int
+        Number of pixels to dilate the cloud mask (the default is 10).
+    filter_flag : bool
+        If true, erode the QA_PIXEL cloud mask by 1 pixel to remove standalone
+        cloud pixels (the default is False).
+    saturated_flag : bool
+        If true, mask pixels that are saturated in the RGB bands
+        (the default is False).
+    cloud_score_flag, sr_cloud_qa_flag : bool
+        Not supported for local arrays.
+
+    Returns
+    -------
+    ndarray
+        Boolean array, True for clear pixels and False for cloudy pixels and
+        fill (nodata) pixels.
+
+    Raises
+    ------
+    ValueError
+        If an unsupported flag is set or the QA_RADSAT array is missing.
+
+    """
+    for flag_name, flag in [('cloud_score_flag', cloud_score_flag),
+                            ('sr_cloud_qa_flag', sr_cloud_qa_flag)]:
+        if flag:
+            raise ValueError(f'{flag_name} is not supported for local arrays')
+    if saturated_flag and qa_radsat is None:
+        raise ValueError('qa_radsat must be set if saturated_flag is True')
+
+    qa_pixel = np.asarray(qa_pixel).astype(np.uint16, copy=False)
+    qa_flags = (cirrus_flag, dilate_flag, shadow_flag, snow_flag, water_flag)
+
+    if not filter_flag and not buffer_flag:
+        # Fill pixels are included in the lookup table so that the clear
+        #   pixel mask is built with a single gather
+        cloud_mask = qa_pixel_lut(*qa_flags, fill_flag=True)[qa_pixel]
+        if saturated_flag:
+            cloud_mask |= qa_radsat_lut(spacecraft_id)[qa_radsat]
+        return ~cloud_mask
+
+    # The morphology steps are only applied to the cloud pixels
+    #   and the fill pixels are removed at the end
+    cloud_mask = qa_pixel_lut(*qa_flags, fill_flag=False)[qa_pixel]
+    if filter_flag:
+        cloud_mask = erode(cloud_mask, 1)
+    if saturated_flag:
+        cloud_mask |= qa_radsat_lut(spacecraft_id)[qa_radsat]
+    if buffer_flag:
+        cloud_mask = dilate(cloud_mask, buffer_pixels)
+    return ~(cloud_mask | ((qa_pixel & 1) != 0))
+
+
+@lru_cache(maxsize=None)
+def qa_pixel_lut(cirrus_flag=False, dilate_flag=False, shadow_flag=True,
+                 snow_flag=False, water_flag=False, fill_flag=True):
+    """Lookup table of the cloud pixels for all 16-bit QA_PIXEL values
+
+    The lookup tables are cached for each combination of flags.
+
+    Parameters
+    ----------
+    cirrus_flag, dilate_flag, shadow_flag, snow_flag, water_flag : bool
+        See landsat_c2_sr_cloud_mask().
+    fill_flag : bool
+        If True, fill pixels are also flagged (the default is True).
+
+    Returns
+    -------
+    ndarray
+        Read only boolean array with 65536 values, True for cloud pixels.
+
+    """
+    mask_bits = ['cloud']
+    if fill_flag:
+        mask_bits.append('fill')
+    if cirrus_flag:
+        mask_bits.append('cirrus')
+    if dilate_flag:
+        mask_bits.append('dilated')
+    if shadow_flag:
+        mask_bits.append('shadow')
+    if snow_flag:
+        mask_bits.append('snow')
+    if water_flag:
+        mask_bits.append('water')
+    mask_value = sum(1 << QA_PIXEL_BITS[bit] for bit in mask_bits)
+
+    lut = (np.arange(65536, dtype=np.uint16) & mask_value) != 0
+    lut.flags.writeable = False
+    return lut
+
+
+@lru_cache(maxsize=None)
+def qa_radsat_lut(spacecraft_id):
+    """Lookup table of the saturated pixels for all 16-bit QA_RADSAT values
+
+    Parameters
+    ----------
+    spacecraft_id : str
+        Landsat SPACECRAFT_ID.
+
+    Returns
+    -------
+    ndarray
+        Read only boolean array with 65536 values, True for pixels that are
+        saturated in any of the RGB bands.
+
+    """
+    lut = _saturated(np.arange(65536, dtype=np.uint16), spacecraft_id)
+    lut.flags.writeable = False
+    return lut
+
+
+def dilate(mask, pixels=1):
+    """Dilate (buffer) a 2D boolean mask
+
+    Pixels within a euclidean distance of "pixels" of a True pixel are set
+    True, matching the openet.core.utils.dilate() distance transform.  The
+    circular neighborhood is applied as one horizontal running window per row
+    offset so the cost grows linearly with the number of pixels.
+
+    Parameters
+    ----------
+    mask : ndarray
+        2D boolean mask.
+    pixels : int
+        Number of pixels to dilate.  The default is 1.
+
+    Returns
+    -------
+    ndarray
+
+    """
+    mask = np.asarray(mask, dtype=bool)
+    pixels = int(pixels)
+    if pixels < 0:
+        raise ValueError('pixels must be a non-negative integer')
+    if pixels == 0 or mask.size == 0:
+        return mask.copy()
+
+    rows, cols = mask.shape
+
+    # Cumulative sum along the (zero padded) rows for the horizontal
+    #   running window counts
+    counts = np.zeros((rows, cols + 2 * pixels + 1), dtype=np.int32)
+    np.cumsum(mask, axis=1, out=counts[:, pixels + 1:pixels + 1 + cols])
+    counts[:, pixels + 1 + cols:] = counts[:, pixels + cols:pixels + 1 + cols]
+
+    output = np.zeros_like(mask)
+    for dy in range(pixels + 1):
+        half_width = math.isqrt(pixels * pixels - dy * dy)
+        upper = pixels + half_width + 1
+        lower = pixels - half_width
+        row_mask = counts[:, upper:upper + cols] > counts[:, lower:lower + cols]
+        # The neighborhood is symmetric so each row mask is applied
+        #   to the rows above and below
+        output[dy:, :] |= row_mask[:rows - dy, :]
+        if dy > 0:
+            output[:-dy, :] |= row_mask[dy:, :]
+    return output
+
+
+def erode(mask, pixels=1):
+    """Erode (shrink) a 2D boolean mask
+
+    Pixels within a euclidean distance of "pixels" of a False pixel are set
+    False, matching the openet.core.utils.erode() distance transform.
+
+    """
+    return ~dilate(~np.asarray(mask, dtype=bool), pixels)
+
+
+def _saturated(qa_radsat, spacecraft_id):
+    """Pixels that are saturated in any of the RGB bands
+
+    The QA_RADSAT bits are shifted by one for Landsat 8/9 since the first bit
+    is the coastal aerosol band.
+
+    """
+    shift = 1 if spacecraft_id in ['LANDSAT_8', 'LANDSAT_9'] else 0
+    return ((np.asarray(qa_radsat).astype(np.uint16, copy=False) >> shift) & 7) > 0
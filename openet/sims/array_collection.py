@@ -0,0 +1,393 @@
+import numpy as np
+import xarray as xr
+
+from . import array_cloud_mask
+from . import array_interpolate
+from .array_image import ArrayImage
+from .array_model import ArrayModel
+
+
+class ArrayCollection():
+    """xarray (and Dask) based collection for out-of-core regional runs"""
+
+    def __init__(
+            self,
+            dataset,
+            start_date,
+            end_date,
+            crop_type,
+            et_reference_source=None,
+            et_reference_factor=None,
+            variables=None,
+            cloudmask_args={},
+            spacecraft_id=None,
+            model_args={},
+            ):
+        """Local array equivalent of the Collection class
+
+        All of the calculations are mapped over the (Dask) chunks of the
+        input dataset with xarray.apply_ufunc, so the outputs are lazy
+        Datasets that can be computed on a Dask cluster and written directly
+        to chunked Zarr stores (see write_zarr()).
+
+        Parameters
+        ----------
+        dataset : xarray.Dataset
+            Scene stack with (time, y, x) dimensions and either an "ndvi"
+            variable (masked pixels as NaN) or "red", "nir", and "QA_PIXEL"
+            Landsat Collection 2 SR digital number variables (i.e. renamed
+            using array_image.landsat_c2_sr_bands).  The scenes can span
+            multiple years and paths/rows (mosaicked to a common grid).
+        start_date : str
+            ISO format inclusive start date.
+        end_date : str
+            ISO format exclusive end date.
+        crop_type : xarray.DataArray, int
+            Crop type (y, x) array or scalar crop type.
+        et_reference_source : xarray.DataArray, float, optional
+            Daily reference ET with (time, y, x) or (time,) dimensions or a
+            constant reference ET value.  Required for the et and
+            et_reference variables.
+        et_reference_factor : float, optional
+            Reference ET scaling factor.
+        variables : list, optional
+            Default output variables.
+        cloudmask_args : dict, optional
+            Keyword arguments to pass through to the QA_PIXEL cloud mask
+            function (only used for Landsat band inputs).  The filter and
+            buffer flags require that the y and x dimensions are not chunked.
+        spacecraft_id : str, optional
+            Landsat SPACECRAFT_ID (only used by the saturated_flag).
+        model_args : dict, optional
+            Keyword arguments to pass through to the ArrayModel (i.e.
+            crop_type_kc_flag).  Note that mask_non_ag_flag defaults to False
+            to match the Image class.
+
+        Raises
+        ------
+        ValueError
+
+        """
+        if 'ndvi' not in dataset.data_vars and not {'red', 'nir', 'QA_PIXEL'}.issubset(
+                dataset.data_vars):
+            raise ValueError('dataset must have an "ndvi" variable or "red", "nir", '
+                             'and "QA_PIXEL" variables')
+        self.dataset = dataset.sortby('time')
+        self.start_date = np.datetime64(start_date, 'D')
+        self.end_date = np.datetime64(end_date, 'D')
+        if self.end_date <= self.start_date:
+            raise ValueError('end_date must be after start_date')
+        self.crop_type = crop_type
+        self.et_reference_source = et_reference_source
+        self.et_reference_factor = et_reference_factor
+        self.variables = variables
+        self.cloudmask_args = {
+            'cirrus_flag': True, 'dilate_flag': True, 'shadow_flag': True,
+            'snow_flag': True, 'cloud_score_flag': False, 'cloud_score_pct': 100,
+            'filter_flag': False, 'saturated_flag': False,
+            **cloudmask_args,
+        }
+        self.spacecraft_id = spacecraft_id
+        self.model_args = {'mask_non_ag_flag': False, **model_args}
+
+    def _scenes(self, start_date, end_date):
+        """Scene NDVI between the (exclusive) end date and inclusive start date"""
+        dataset = self.dataset.sel(time=slice(
+            start_date, end_date - np.timedelta64(1, 'ms')))
+        if 'ndvi' in dataset.data_vars:
+            return dataset['ndvi'].astype(np.float64)
+
+        morphology_flag = (
+            self.cloudmask_args['filter_flag'] or self.cloudmask_args.get('buffer_flag'))
+        if morphology_flag and dataset['QA_PIXEL'].chunks is not None and any(
+                len(dataset['QA_PIXEL'].chunks[dataset['QA_PIXEL'].get_axis_num(dim)]) > 1
+                for dim in ['y', 'x']):
+            raise ValueError('the cloud mask filter and buffer flags require that the y '
+                             'and x dimensions are not chunked')
+
+        inputs = [dataset['red'], dataset['nir'], dataset['QA_PIXEL']]
+        if self.cloudmask_args['saturated_flag']:
+            inputs.append(dataset['QA_RADSAT'])
+        # The cloud mask morphology needs whole 2D scenes, otherwise the
+        #   NDVI is computed independently for each pixel
+        core_dims = ['y', 'x'] if morphology_flag else []
+        return xr.apply_ufunc(
+            _landsat_ndvi, *inputs,
+            input_core_dims=[core_dims] * len(inputs),
+            output_core_dims=[core_dims],
+            kwargs={'cloudmask_args': self.cloudmask_args,
+                    'spacecraft_id': self.spacecraft_id},
+            dask='parallelized', output_dtypes=[np.float64],
+        ).transpose(*dataset['red'].dims)
+
+    def _et_reference(self, times):
+        """Reference ET at the 0 UTC dates of the times"""
+        if self.et_reference_source is None:
+            raise ValueError('et_reference_source must be set')
+        if isinstance(self.et_reference_source, xr.DataArray):
+            dates = times.dt.floor('D')
+            et_reference = (
+                self.et_reference_source.astype(np.float64)
+                .sel(time=dates.values)
+                .assign_coords(time=times.values)
+            )
+        else:
+            et_reference = xr.full_like(times, float(self.et_reference_source), np.float64)
+        if self.et_reference_factor:
+            et_reference = et_reference * self.et_reference_factor
+        return et_reference
+
+    def _kc(self, ndvi, fc_flag=False):
+        """Scene Kc (or fc) for the scene NDVI"""
+        crop_type = self.crop_type
+        if not isinstance(crop_type, xr.DataArray):
+            crop_type = xr.DataArray(crop_type)
+        return xr.apply_ufunc(
+            _model_block, ndvi, crop_type, ndvi['time'].dt.dayofyear,
+            kwargs={'model_args': self.model_args, 'fc_flag': fc_flag},
+            dask='parallelized', output_dtypes=[np.float64],
+        )
+
+    def overpass(self, variables=None):
+        """Return a Dataset of the variables on the scene dates
+
+        Parameters
+        ----------
+        variables : list, optional
+            Output variables, 'et', 'et_reference', 'et_fraction', 'fc', 'kc',
+            'mask', or 'ndvi'.  If variables is not set here it must be
+            specified in the class instantiation call.
+
+        Returns
+        -------
+        xarray.Dataset
+            Dataset with (time, y, x) dimensions.  The scene times are the
+            time coordinate (instead of a "time" variable).
+
+        Raises
+        ------
+        ValueError
+
+        """
+        if not variables:
+            if self.variables:
+                variables = self.variables
+            else:
+                raise ValueError('variables parameter must be set')
+
+        ndvi = self._scenes(self.start_date, self.end_date)
+        kc = self._kc(ndvi)
+        output = {}
+        for v in variables:
+            if v.lower() in ['et_fraction', 'kc']:
+                output[v] = kc.astype(np.float32)
+            elif v.lower() == 'et':
+                output[v] = (kc * self._et_reference(ndvi['time'])).astype(np.float32)
+            elif v.lower() == 'et_reference':
+                # Masked the same as the ArrayImage et_reference
+                output[v] = (
+                    ndvi * 0 + self._et_reference(ndvi['time'])
+                ).astype(np.float32)
+            elif v.lower() == 'fc':
+                output[v] = self._kc(ndvi, fc_flag=True).astype(np.float32)
+            elif v.lower() == 'mask':
+                output[v] = kc.notnull().astype(np.uint8)
+            elif v.lower() == 'ndvi':
+                output[v] = ndvi.astype(np.float32)
+            else:
+                raise ValueError(f'unsupported variable: {v}')
+        return xr.Dataset(output)
+
+    def interpolate(self, variables=None, t_interval='custom', interp_days=32):
+        """Interpolate the scene values to daily and aggregate to t_interval
+
+        The scene et_fraction and ndvi are linearly interpolated to daily
+        (see array_interpolate.daily()) using the scenes within interp_days
+        of the start and end dates.  The daily et is the daily et_fraction
+        times the daily reference ET.  The et and et_reference are summed and
+        the et_fraction is computed from the sums for each period, ndvi is
+        averaged, and count is the number of scenes with a valid value.
+
+        Parameters
+        ----------
+        variables : list, optional
+            Output variables, 'et', 'et_reference', 'et_fraction', 'ndvi', or
+            'count'.  If variables is not set here it must be specified in
+            the class instantiation call.
+        t_interval : {'daily', 'monthly', 'annual', 'custom'}, optional
+            Time interval over which to interpolate and aggregate values
+            (the default is 'custom').
+        interp_days : int, optional
+            Number of extra days before the start date and after the end
+            date to include in the interpolation (the default is 32).
+
+        Returns
+        -------
+        xarray.Dataset
+            Dataset with (time, y, x) dimensions, the time coordinate is the
+            start date of each period.
+
+        Raises
+        ------
+        ValueError
+
+        Notes
+        -----
+        The time dimension of the scene stack is rechunked to a single chunk
+        since every output day can depend on any scene in the interpolation
+        window.  The soil evaporation (estimate_soil_evaporation) is not
+        supported.
+
+        """
+        if not variables:
+            if self.variables:
+                variables = self.variables
+            else:
+                raise ValueError('variables parameter must be set')
+        if t_interval.lower() not in ['daily', 'monthly', 'annual', 'custom']:
+            raise ValueError(f'unsupported t_interval: {t_interval}')
+        for v in variables:
+            if v not in ['et', 'et_reference', 'et_fraction', 'ndvi', 'count']:
+                raise ValueError(f'unsupported variable: {v}')
+
+        interp_delta = np.timedelta64(int(interp_days), 'D')
+        ndvi = self._scenes(self.start_date - interp_delta, self.end_date + interp_delta)
+        if ndvi.chunks is not None:
+            ndvi = ndvi.chunk({'time': -1})
+        kc = self._kc(ndvi)
+
+        days = int((self.end_date - self.start_date).astype(int))
+        dates = self.start_date + np.arange(days).astype('timedelta64[D]')
+        daily_kwargs = {
+            'scene_times': ndvi['time'].values.astype('datetime64[D]'),
+            'start_date': self.start_date,
+            'days': days,
+            'interp_days': interp_days,
+        }
+
+        def interpolate_daily(scene_array):
+            daily_array = xr.apply_ufunc(
+                _daily_block, scene_array,
+                input_core_dims=[['time']], output_core_dims=[['date']],
+                kwargs=daily_kwargs, dask='parallelized', output_dtypes=[np.float64],
+                dask_gufunc_kwargs={'output_sizes': {'date': days}},
+            )
+            return (
+                daily_array.assign_coords(date=dates.astype('datetime64[ns]'))
+                .rename({'date': 'time'})
+                .transpose('time', *[d for d in scene_array.dims if d != 'time'])
+            )
+
+        daily = {}
+        if {'et', 'et_reference', 'et_fraction'}.intersection(variables):
+            daily['et_fraction'] = interpolate_daily(kc)
+            daily['et_reference'] = (
+                xr.zeros_like(daily['et_fraction']) +
+                self._et_reference(daily['et_fraction']['time'])
+            )
+            daily['et'] = daily['et_fraction'] * daily['et_reference']
+        if 'ndvi' in variables:
+            daily['ndvi'] = interpolate_daily(ndvi)
+        if 'count' in variables:
+            # Daily count of the scenes with a valid Kc
+            daily['count'] = (
+                kc.notnull().astype(np.float64)
+                .assign_coords(time=kc['time'].dt.floor('D'))
+                .groupby('time').sum()
+                .reindex(time=dates.astype('datetime64[ns]'), fill_value=0)
+            )
+
+        output = {}
+        for v in variables:
+            if t_interval.lower() == 'daily':
+                dtype = np.uint8 if v == 'count' else np.float32
+                output[v] = daily[v].astype(dtype)
+                continue
+
+            if t_interval.lower() == 'custom':
+                def aggregate(array, how):
+                    return getattr(array, how)('time', **_min_count(how)).expand_dims(
+                        time=[self.start_date.astype('datetime64[ns]')])
+            else:
+                freq = 'MS' if t_interval.lower() == 'monthly' else 'YS'
+
+                def aggregate(array, how):
+                    return getattr(array.resample(time=freq), how)(**_min_count(how))
+
+            if v in ['et', 'et_reference']:
+                output[v] = aggregate(daily[v], 'sum').astype(np.float32)
+            elif v == 'et_fraction':
+                output[v] = (
+                    aggregate(daily['et'], 'sum') / aggregate(daily['et_reference'], 'sum')
+                ).astype(np.float32)
+            elif v == 'ndvi':
+                output[v] = aggregate(daily[v], 'mean').astype(np.float32)
+            elif v == 'count':
+                output[v] = aggregate(daily[v], 'sum').astype(np.uint8)
+
+        return xr.Dataset(output)
+
+
+def write_zarr(dataset, path, chunks=None, **kwargs):
+    """Write a (lazy) output Dataset to a chunked Zarr store
+
+    Parameters
+    ----------
+    dataset : xarray.Dataset
+    path : str
+        Zarr store path (or mapping).
+    chunks : dict, optional
+        Output chunk sizes by dimension (i.e. {'time': 1, 'y': 1024,
+        'x': 1024}).  Zarr requires uniform chunks, so the dataset is
+        rechunked if chunks is set.
+    kwargs : dict
+        Keyword arguments to pass through to xarray.Dataset.to_zarr.
+
+    Returns
+    -------
+    The xarray.Dataset.to_zarr return value.
+
+    """
+    if chunks is not None:
+        dataset = dataset.chunk(chunks)
+    return dataset.to_zarr(path, **{'mode': 'w', **kwargs})
+
+
+def _min_count(how):
+    """Sums of only masked values are masked (matching Earth Engine)"""
+    return {'min_count': 1} if how == 'sum' else {}
+
+
+def _landsat_ndvi(red, nir, qa_pixel, qa_radsat=None, cloudmask_args={},
+                  spacecraft_id=None):
+    """Cloud masked NDVI for (..., y, x) blocks of Landsat SR digital numbers"""
+    qa_pixel = np.asarray(qa_pixel)
+    morphology_flag = cloudmask_args.get('filter_flag') or cloudmask_args.get('buffer_flag')
+    if morphology_flag and qa_pixel.ndim > 2:
+        # The morphology is applied separately to each 2D scene
+        cloud_mask = np.stack([
+            array_cloud_mask.landsat_c2_sr_cloud_mask(
+                qa, qa_radsat=None if qa_radsat is None else qa_radsat[i],
+                spacecraft_id=spacecraft_id, **cloudmask_args)
+            for i, qa in enumerate(qa_pixel.reshape((-1,) + qa_pixel.shape[-2:]))
+        ]).reshape(qa_pixel.shape)
+    else:
+        cloud_mask = array_cloud_mask.landsat_c2_sr_cloud_mask(
+            qa_pixel, qa_radsat=qa_radsat, spacecraft_id=spacecraft_id, **cloudmask_args)
+
+    return np.where(cloud_mask, ArrayImage._ndvi(red, nir), np.nan)
+
+
+def _model_block(ndvi, crop_type, doy, model_args={}, fc_flag=False):
+    """Kc (or fc) for a block of scenes with a day of year for each scene"""
+    model = ArrayModel(crop_type=crop_type, doy=doy, **model_args)
+    if fc_flag:
+        return np.broadcast_to(model.fc(ndvi), np.shape(ndvi)) * 1.0
+    return np.broadcast_to(model.kc(ndvi), np.shape(ndvi)) * 1.0
+
+
+def _daily_block(values, scene_times, start_date, days, interp_days=32):
+    """Daily interpolation of a block with the scenes as the last axis"""
+    output = array_interpolate.daily(
+        np.moveaxis(values, -1, 0), scene_times, start_date, days, interp_days=interp_days)
+    return np.moveaxis(output, 0, -1)
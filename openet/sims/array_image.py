@@ -0,0 +1,412 @@
+import datetime
+import os
+import re
+
+import numpy as np
+
+from . import array_cloud_mask
+from . import et_reference
+from .array_model import ArrayModel
+from .image import lazy_property
+from . import utils
+
+# Landsat Collection 2 SR band names for each spacecraft (generic names as keys)
+landsat_c2_sr_bands = {
+    'LANDSAT_4': {'red': 'SR_B3', 'nir': 'SR_B4'},
+    'LANDSAT_5': {'red': 'SR_B3', 'nir': 'SR_B4'},
+    'LANDSAT_7': {'red': 'SR_B3', 'nir': 'SR_B4'},
+    'LANDSAT_8': {'red': 'SR_B4', 'nir': 'SR_B5'},
+    'LANDSAT_9': {'red': 'SR_B4', 'nir': 'SR_B5'},
+}
+landsat_spacecraft_ids = {
+    'LT04': 'LANDSAT_4',
+    'LT05': 'LANDSAT_5',
+    'LE07': 'LANDSAT_7',
+    'LC08': 'LANDSAT_8',
+    'LC09': 'LANDSAT_9',
+}
+
+# Landsat Collection 2 SR scale factor and offset
+SR_SCALE = 0.0000275
+SR_OFFSET = -0.2
+
+
+class ArrayImage():
+    """NumPy based image for computing SIMS ETcb from local rasters"""
+
+    def __init__(
+        self,
+        ndvi,
+        date,
+        crop_type,
+        et_reference_source=None,
+        et_reference_band=None,
+        et_reference_factor=None,
+        crop_type_remap='CDL',
+        crop_type_kc_flag=False,
+        crop_type_annual_skip_flag=False,
+        mask_non_ag_flag=False,
+        water_kc_flag=True,
+        reflectance_type='SR',
+        kc_dispatch_flag=False,
+        jit_flag=False,
+        kc_lut_flag=False,
+        properties=None,
+    ):
+        """Local array based SIMS image object
+
+        This is the array equivalent of the Earth Engine Image class.  All of
+        the variables are computed with the ArrayModel and masked (nodata)
+        pixels are represented as NaN.
+
+        Parameters
+        ----------
+        ndvi : array_like
+            Normalized difference vegetation index.
+        date : str, datetime.date, np.datetime64
+            Image date.
+        crop_type : array_like
+            Crop type values (i.e. CDL codes) with the same shape as the NDVI
+            array or a scalar crop type.
+        et_reference_source : float, array_like, et_reference.ArraySource, optional
+            Reference ET number, array, or local reference ET cube.
+        et_reference_band : str, optional
+            Reference ET band name (only used for an ArraySource).
+        et_reference_factor : float, optional
+            Reference ET scaling factor.
+        crop_type_remap, crop_type_kc_flag, crop_type_annual_skip_flag,
+        mask_non_ag_flag, water_kc_flag, reflectance_type, kc_dispatch_flag,
+        jit_flag, kc_lut_flag :
+            See the Image and ArrayModel classes.  Note that mask_non_ag_flag defaults to False
+            to match the Image class.
+        properties : dict, optional
+            Image properties (i.e. system:index, SPACECRAFT_ID).
+
+        """
+        self._ndvi = np.asarray(ndvi, dtype=np.float64)
+        self._date = np.datetime64(date, 'D')
+        self._properties = {} if properties is None else dict(properties)
+        self._properties['system:time_start'] = self._millis
+
+        self.et_reference_source = et_reference_source
+        self.et_reference_band = et_reference_band
+        self.et_reference_factor = et_reference_factor
+        self.reflectance_type = reflectance_type
+
+        self._doy = int(self._date.astype(datetime.date).strftime('%j'))
+
+        self.model = ArrayModel(
+            crop_type=crop_type,
+            doy=self._doy,
+            crop_type_remap=crop_type_remap,
+            crop_type_kc_flag=crop_type_kc_flag,
+            crop_type_annual_skip_flag=crop_type_annual_skip_flag,
+            mask_non_ag_flag=mask_non_ag_flag,
+            water_kc_flag=water_kc_flag,
+            reflectance_type=reflectance_type,
+            kc_dispatch_flag=kc_dispatch_flag,
+            jit_flag=jit_flag,
+            kc_lut_flag=kc_lut_flag,
+        )
+
+    @property
+    def _millis(self):
+        """Image date (0 UTC) in milliseconds since 1970"""
+        return int(self._date.astype('datetime64[ms]').astype(np.int64))
+
+    def calculate(self, variables=['et']):
+        """Return a dictionary of calculated variable arrays
+
+        Parameters
+        ----------
+        variables : list
+
+        Returns
+        -------
+        dict
+
+        """
+        output = {}
+        for v in variables:
+            if v.lower() == 'et':
+                output[v] = self.et.astype(np.float32)
+            elif v.lower() == 'et_reference':
+                output[v] = self.et_reference.astype(np.float32)
+            elif v.lower() == 'et_fraction':
+                output[v] = self.et_fraction.astype(np.float32)
+            elif v.lower() == 'fc':
+                output[v] = self.fc.astype(np.float32)
+            elif v.lower() == 'kc':
+                output[v] = self.kc.astype(np.float32)
+            elif v.lower() == 'mask':
+                output[v] = self.mask
+            elif v.lower() == 'ndvi':
+                output[v] = self.ndvi.astype(np.float32)
+            elif v.lower() == 'time':
+                output[v] = self.time
+            else:
+                raise ValueError(f'unsupported variable: {v}')
+
+        return output
+
+    @lazy_property
+    def et_fraction(self):
+        """Fraction of reference ET (equivalent to the Kc)"""
+        return self.kc
+
+    @lazy_property
+    def et_reference(self):
+        """Reference ET for the image date
+
+        Returns
+        -------
+        ndarray
+
+        """
+        if utils.is_number(self.et_reference_source):
+            et_reference_array = np.float64(self.et_reference_source)
+        elif isinstance(self.et_reference_source, et_reference.ArraySource):
+            et_reference_array = et_reference.array_image(
+                self.et_reference_source, self._date, band=self.et_reference_band)
+        elif isinstance(self.et_reference_source, np.ndarray):
+            et_reference_array = self.et_reference_source
+        else:
+            raise ValueError(
+                f'unsupported et_reference_source: {self.et_reference_source}'
+            )
+
+        if self.et_reference_factor:
+            et_reference_array = et_reference_array * self.et_reference_factor
+
+        return self.ndvi * 0 + et_reference_array
+
+    @lazy_property
+    def et(self):
+        """Actual ET (ETcb)"""
+        return self.kc * self.et_reference
+
+    @lazy_property
+    def crop_class(self):
+        """Generic crop classes"""
+        return self.ndvi * 0 + self.model.crop_class
+
+    @lazy_property
+    def crop_type(self):
+        """Crop type"""
+        return self.ndvi * 0 + self.model.crop_type
+
+    @lazy_property
+    def fc(self):
+        """Fraction of cover (fc)"""
+        return self.model.fc(self.ndvi)
+
+    @lazy_property
+    def kc(self):
+        """Crop coefficient (Kc)"""
+        return self.model.kc(self.ndvi)
+
+    @lazy_property
+    def mask(self):
+        """Mask of all active pixels based on the final Kc
+
+        Returns
+        -------
+        ndarray
+            uint8 array, 1 for active pixels and 0 for masked pixels.
+
+        """
+        return np.isfinite(self.kc).astype(np.uint8)
+
+    @lazy_property
+    def ndvi(self):
+        """Normalized difference vegetation index (NDVI)"""
+        return self._ndvi
+
+    @lazy_property
+    def time(self):
+        """0 UTC time (in milliseconds), NaN for masked pixels"""
+        return np.where(self.mask == 1, np.float64(self._millis), np.nan)
+
+    @classmethod
+    def from_landsat_c2_sr(cls, source, cloudmask_args={}, window=None,
+                           properties=None, **kwargs):
+        """Construct a SIMS ArrayImage from a local Landsat C02 level 2 (SR) scene
+
+        Only the red, NIR, and QA bands are read.  The band selection, scaling,
+        and QA_PIXEL cloud masking match Image.from_landsat_c2_sr().
+
+        Parameters
+        ----------
+        source : str, dict
+            Path prefix of the USGS per band GeoTIFF files
+            (i.e. "/data/LC08_L2SP_044033_20170716_20200908_02_T1" for the
+            "..._SR_B4.TIF" files) or a dictionary of band name keys and
+            2D array values (NumPy arrays, memory maps, or Zarr arrays).
+        cloudmask_args : dict
+            Keyword arguments to pass through to the cloud mask function.
+        window : tuple of slices, optional
+            (row slice, column slice) of the scene to read.  Only the window
+            is read from the GeoTIFF files or sliced from the Zarr arrays
+            (see block_windows() for splitting a scene into windows).
+        properties : dict, optional
+            Image properties.  SPACECRAFT_ID and DATE_ACQUIRED are parsed from
+            the product ID in the file names for a path source but must be
+            set in the properties for a dictionary source.
+        kwargs : dict
+            Keyword arguments to pass through to model init.  Array keyword
+            arguments (i.e. crop_type) must match the window shape.
+
+        Returns
+        -------
+        new instance of ArrayImage class
+
+        Raises
+        ------
+        ValueError
+            If the spacecraft or date can't be determined.
+
+        """
+        properties = {} if properties is None else dict(properties)
+        if isinstance(source, (str, os.PathLike)):
+            source = str(source)
+            properties = {**landsat_scene_properties(os.path.basename(source)),
+                          **properties}
+        for property_name in ['SPACECRAFT_ID', 'DATE_ACQUIRED']:
+            if property_name not in properties.keys():
+                raise ValueError(f'{property_name} property must be set')
+
+        spacecraft_id = properties['SPACECRAFT_ID']
+        try:
+            band_names = landsat_c2_sr_bands[spacecraft_id]
+        except KeyError:
+            raise ValueError(f'unsupported SPACECRAFT_ID: {spacecraft_id}')
+
+        # Default the cloudmask flags to True if they were not
+        #   (same defaults as Image.from_landsat_c2_sr)
+        cloudmask_args = {
+            'cirrus_flag': True, 'dilate_flag': True, 'shadow_flag': True,
+            'snow_flag': True, 'cloud_score_flag': False, 'cloud_score_pct': 100,
+            'filter_flag': False, 'saturated_flag': False,
+            **cloudmask_args,
+        }
+
+        qa_pixel = read_band(source, 'QA_PIXEL', window)
+        qa_radsat = None
+        if cloudmask_args['saturated_flag']:
+            qa_radsat = read_band(source, 'QA_RADSAT', window)
+        cloud_mask = array_cloud_mask.landsat_c2_sr_cloud_mask(
+            qa_pixel, qa_radsat=qa_radsat, spacecraft_id=spacecraft_id,
+            **cloudmask_args)
+
+        red = read_band(source, band_names['red'], window)
+        nir = read_band(source, band_names['nir'], window)
+        ndvi = np.where(cloud_mask, cls._ndvi(red, nir), np.nan)
+
+        return cls(ndvi, properties['DATE_ACQUIRED'], reflectance_type='SR',
+                   properties=properties, **kwargs)
+
+    @staticmethod
+    def _ndvi(red, nir):
+        """Normalized difference vegetation index from SR digital numbers
+
+        Fill pixels (SR value of 0) are masked.
+
+        """
+        red = np.asarray(red)
+        nir = np.asarray(nir)
+        fill_mask = (red == 0) | (nir == 0)
+        red = red * SR_SCALE + SR_OFFSET
+        nir = nir * SR_SCALE + SR_OFFSET
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ndvi = (nir - red) / (nir + red)
+        return np.where(fill_mask, np.nan, ndvi)
+
+
+def landsat_scene_properties(scene_id):
+    """Parse the spacecraft and acquisition date from a Landsat scene ID
+
+    Parameters
+    ----------
+    scene_id : str
+        Earth Engine (LC08_044033_20170716) or USGS product ID
+        (LC08_L2SP_044033_20170716_20200908_02_T1) format scene ID.
+
+    Returns
+    -------
+    dict
+
+    Raises
+    ------
+    ValueError
+        If the scene ID can't be parsed.
+
+    """
+    match = re.match(
+        r'^(?P<sensor>L[CET]0\d)_(?:L2S[PR]_)?\d{6}_(?P<date>\d{8})', scene_id.upper())
+    if not match or match.group('sensor') not in landsat_spacecraft_ids.keys():
+        raise ValueError(f'unsupported Landsat scene ID: {scene_id}')
+    date = datetime.datetime.strptime(match.group('date'), '%Y%m%d')
+    return {
+        'SPACECRAFT_ID': landsat_spacecraft_ids[match.group('sensor')],
+        'DATE_ACQUIRED': date.strftime('%Y-%m-%d'),
+    }
+
+
+def read_band(source, band, window=None):
+    """Read a band (or band window) from a local source
+
+    Parameters
+    ----------
+    source : str, dict
+        GeoTIFF path prefix or dictionary of band arrays.
+    band : str
+        Landsat band name (i.e. "SR_B4" or "QA_PIXEL").
+    window : tuple of slices, optional
+        (row slice, column slice) to read.
+
+    Returns
+    -------
+    ndarray
+
+    """
+    if isinstance(source, str):
+        try:
+            import rasterio
+            from rasterio.windows import Window
+        except ImportError:
+            raise ImportError('rasterio is required to read GeoTIFF files')
+        with rasterio.open(f'{source}_{band}.TIF') as src:
+            if window is not None:
+                window = Window.from_slices(
+                    *window, height=src.height, width=src.width)
+            return src.read(1, window=window)
+    elif window is None:
+        return np.asarray(source[band][...])
+    else:
+        return np.asarray(source[band][tuple(window)])
+
+
+def block_windows(height, width, block_size=1024):
+    """Split a raster into square block windows for chunked reads
+
+    Parameters
+    ----------
+    height : int
+        Number of rows.
+    width : int
+        Number of columns.
+    block_size : int, optional
+        Block size in pixels (the default is 1024).
+
+    Yields
+    ------
+    tuple of slices
+        (row slice, column slice)
+
+    """
+    if block_size < 1:
+        raise ValueError('block_size must be a positive integer')
+    for row in range(0, height, block_size):
+        for col in range(0, width, block_size):
+            yield (slice(row, min(row + block_size, height)),
+                   slice(col, min(col + block_size, width)))
@@ -0,0 +1,879 @@
+import datetime
+import os
+
+import numpy as np
+
+from .array_model import _flatten, _where
+from . import incremental
+
+# Bands returned by interpolate.daily_ke() for each day of the water balance
+WATER_BALANCE_BANDS = [
+    'de', 'de_rew', 'c_eff', 'ke', 'kr', 'ft', 'de_prev', 'ete', 'precip',
+    'et_fraction',
+]
+
+# Water balance state carried from one day to the next
+STATE_BANDS = ['de', 'de_rew', 'c_eff']
+
+# Version of the water balance state checkpoint files
+# This should be incremented if the state bands or the water balance change
+STATE_VERSION = 1
+
+# Depth of the evaporable zone (m)
+Z_E = 0.1
+
+# Coefficients for skin layer retention, Allen (2011)
+C0 = 0.8
+C1 = 2 * (1 - C0)
+
+# 1.2 is max for grass reference (ETo)
+KE_MAX = 1.2
+
+# Fraction of precip that evaps today vs tomorrow
+FRAC_DAY_EVAP = 0.5
+
+# Maximum et_fraction after adding the soil evaporation coefficient
+ET_FRACTION_MAX = 1.15
+
+
+def evaporable_water(field_capacity, wilting_point):
+    """Compute the total and readily evaporable water
+
+    Parameters
+    ----------
+    field_capacity : array_like
+        Soil field capacity values.
+    wilting_point : array_like
+        Soil permanent wilting point values.
+
+    Returns
+    -------
+    tuple of ndarray (tew, rew)
+
+    """
+    field_capacity = np.asarray(field_capacity, dtype=np.float64)
+    wilting_point = np.asarray(wilting_point, dtype=np.float64)
+
+    # Available water content (mm)
+    awc = field_capacity - wilting_point
+
+    # Total evaporable water (mm)
+    # Allen et al. 1998 eqn 73
+    tew = 10 * (field_capacity - 0.5 * wilting_point) * Z_E
+
+    # Readily evaporable water (mm)
+    rew = 0.8 + 54.4 * awc / 100
+    rew = np.where(rew > tew, tew, rew)
+
+    return tew, rew
+
+
+def daily_ke(
+        ndvi,
+        et_fraction,
+        et_reference,
+        precip,
+        field_capacity,
+        wilting_point,
+        init_state=None,
+        variables=None,
+        dtype=np.float64,
+        jit_flag=False,
+        ):
+    """Compute daily Ke values by simulating evaporable zone water balance
+
+    This is the NumPy equivalent of interpolate.daily_ke() for stacked daily
+    arrays with time as the first axis.  Masked pixels are represented as NaN.
+
+    Parameters
+    ----------
+    ndvi : array_like
+        Daily NDVI values with shape (days, ...).
+    et_fraction : array_like
+        Daily Kcb (et_fraction) values with shape (days, ...).
+    et_reference : array_like
+        Daily reference ET values with shape (days, ...).
+    precip : array_like
+        Daily precipitation values with shape (days + 1, ...).  The extra last
+        day is the "next" precipitation for the last day of the water balance.
+    field_capacity : array_like
+        Soil field capacity values.
+    wilting_point : array_like
+        Soil permanent wilting point values.
+    init_state : dict, optional
+        Water balance state (STATE_BANDS arrays) for the day before the first
+        day.  The default is to assume the soil is at field capacity.
+    variables : list, optional
+        Water balance bands to return (the default is all WATER_BALANCE_BANDS).
+    dtype : data-type, optional
+        Data type of the output arrays (the default is np.float64).
+    jit_flag : bool, optional
+        If True and Numba is installed, compute each day with the fused per
+        pixel kernel (see array_kernels.water_balance_step()).  The default
+        is False.
+
+    Returns
+    -------
+    dict of ndarray with shape (days, ...)
+
+    """
+    tew, rew = evaporable_water(field_capacity, wilting_point)
+    return water_balance(
+        ndvi, et_fraction, et_reference, precip, tew, rew,
+        init_state=init_state, variables=variables, dtype=dtype, jit_flag=jit_flag,
+    )
+
+
+def water_balance(
+        ndvi,
+        et_fraction,
+        et_reference,
+        precip,
+        tew,
+        rew,
+        init_state=None,
+        variables=None,
+        dtype=np.float64,
+        jit_flag=False,
+        ):
+    """Run the evaporable zone water balance for stacked daily arrays
+
+    The water balance is computed for all pixels at once, one day at a time.
+
+    Parameters
+    ----------
+    ndvi : array_like
+        Daily NDVI values with shape (days, ...).
+    et_fraction : array_like
+        Daily Kcb (et_fraction) values with shape (days, ...).
+    et_reference : array_like
+        Daily reference ET values with shape (days, ...).
+    precip : array_like
+        Daily precipitation values with shape (days + 1, ...).
+    tew : array_like
+        Total evaporable water (mm).
+    rew : array_like
+        Readily evaporable water (mm).
+    init_state : dict, optional
+        Water balance state (STATE_BANDS arrays) for the day before the first
+        day.  The default is to assume the soil is at field capacity
+        (see initial_state()).
+    variables : list, optional
+        Water balance bands to return (the default is all WATER_BALANCE_BANDS).
+    dtype : data-type, optional
+        Data type of the output arrays (the default is np.float64).
+    jit_flag : bool, optional
+        If True and Numba is installed, compute each day with the fused per
+        pixel kernel (see array_kernels.water_balance_step()).  The default
+        is False.
+
+    Returns
+    -------
+    dict of ndarray with shape (days, ...)
+
+    Raises
+    ------
+    ValueError
+        If the variables are not water balance bands or the daily arrays
+        do not have the same number of days.
+
+    """
+    start, output, state = next(water_balance_chunks(
+        ndvi, et_fraction, et_reference, precip, tew, rew,
+        chunk_days=None, init_state=init_state, variables=variables, dtype=dtype,
+        jit_flag=jit_flag,
+    ))
+    return output
+
+
+def water_balance_chunks(
+        ndvi,
+        et_fraction,
+        et_reference,
+        precip,
+        tew,
+        rew,
+        chunk_days=32,
+        init_state=None,
+        variables=None,
+        dtype=np.float64,
+        jit_flag=False,
+        ):
+    """Run the evaporable zone water balance in fixed size chunks of days
+
+    Only the previous day state is carried from one day to the next, so the
+    memory used is bounded by the chunk size instead of the number of days.
+    The daily inputs are only read one day at a time and can be memory mapped
+    (np.memmap) or broadcast arrays.
+
+    Parameters
+    ----------
+    ndvi : array_like
+        Daily NDVI values with shape (days, ...).
+    et_fraction : array_like
+        Daily Kcb (et_fraction) values with shape (days, ...).
+    et_reference : array_like
+        Daily reference ET values with shape (days, ...).
+    precip : array_like
+        Daily precipitation values with shape (days + 1, ...).
+    tew : array_like
+        Total evaporable water (mm).
+    rew : array_like
+        Readily evaporable water (mm).
+    chunk_days : int, None, optional
+        Number of days in each output chunk.  If None, all days are returned
+        in a single chunk.  The default is 32.
+    init_state : dict, optional
+        Water balance state (STATE_BANDS arrays) for the day before the first
+        day.  The default is to assume the soil is at field capacity.
+    variables : list, optional
+        Water balance bands to return (the default is all WATER_BALANCE_BANDS).
+    dtype : data-type, optional
+        Data type of the output arrays (the default is np.float64).
+    jit_flag : bool, optional
+        If True and Numba is installed, compute each day with the fused per
+        pixel kernel (see array_kernels.water_balance_step()).  The default
+        is False.
+
+    Yields
+    ------
+    tuple (start, output, state)
+        The index of the first day in the chunk, a dictionary of the output
+        arrays with shape (chunk days, ...), and the water balance state
+        dictionary at the end of the chunk.  The state can be passed as the
+        "init_state" to continue the water balance in a later call.
+
+    Raises
+    ------
+    ValueError
+        If the variables are not water balance bands, the daily arrays do not
+        have the same number of days, or the chunk size is not positive.
+
+    """
+    if variables is None:
+        variables = WATER_BALANCE_BANDS
+    for v in variables:
+        if v not in WATER_BALANCE_BANDS:
+            raise ValueError(f'unsupported water balance variable: {v}')
+
+    ndvi = np.asarray(ndvi)
+    et_fraction = np.asarray(et_fraction)
+    et_reference = np.asarray(et_reference)
+    precip = np.asarray(precip)
+    days = ndvi.shape[0]
+    if et_fraction.shape[0] != days or et_reference.shape[0] != days:
+        raise ValueError('ndvi, et_fraction, and et_reference must have the same number of days')
+    if precip.shape[0] != days + 1:
+        raise ValueError('precip must have one more day than the other daily arrays')
+    if chunk_days is None:
+        chunk_days = max(days, 1)
+    elif chunk_days < 1:
+        raise ValueError('chunk_days must be a positive integer')
+
+    shape = np.broadcast_shapes(
+        ndvi.shape[1:], et_fraction.shape[1:], et_reference.shape[1:],
+        precip.shape[1:], np.shape(tew), np.shape(rew),
+    )
+    # The water balance is computed on flattened pixel arrays so that all of
+    #   the daily intermediate arrays can be updated in place
+    size = int(np.prod(shape))
+    tew = _flatten(np.asarray(tew, dtype=np.float64), shape)
+    rew = _flatten(np.asarray(rew, dtype=np.float64), shape)
+
+    if init_state is None:
+        de, de_rew, c_eff = _initial_state(tew, rew)
+    else:
+        de, de_rew, c_eff = (
+            _flatten(np.asarray(init_state[band], dtype=np.float64), shape)
+            for band in STATE_BANDS
+        )
+
+    if jit_flag:
+        from . import array_kernels
+        jit_flag = array_kernels.numba_available
+    if jit_flag:
+        # The kernel updates the state in place and writes all of the bands
+        #   for each day into a single reused array
+        de, de_rew, c_eff = (np.array(values, dtype=np.float64) for values in [de, de_rew, c_eff])
+        day_values = np.empty((len(WATER_BALANCE_BANDS), size), dtype=np.float64)
+        band_rows = [WATER_BALANCE_BANDS.index(v) for v in variables]
+
+    for start in range(0, max(days, 1), chunk_days):
+        stop = min(start + chunk_days, days)
+        output = {v: np.empty((stop - start, size), dtype=dtype) for v in variables}
+        for i in range(start, stop):
+            if jit_flag:
+                array_kernels.water_balance_step(
+                    de, de_rew, c_eff, tew, rew,
+                    ndvi=_flatten(ndvi[i], shape),
+                    et_fraction=_flatten(et_fraction[i], shape),
+                    et_reference=_flatten(et_reference[i], shape),
+                    precip_current=_flatten(precip[i], shape),
+                    precip_next=_flatten(precip[i + 1], shape),
+                    out=day_values,
+                )
+                for v, row in zip(variables, band_rows):
+                    output[v][i - start] = day_values[row]
+                continue
+
+            day = _water_balance_step(
+                de, de_rew, c_eff, tew, rew,
+                ndvi=_flatten(ndvi[i], shape),
+                et_fraction=_flatten(et_fraction[i], shape),
+                et_reference=_flatten(et_reference[i], shape),
+                precip_current=_flatten(precip[i], shape),
+                precip_next=_flatten(precip[i + 1], shape),
+            )
+            for v in variables:
+                output[v][i - start] = day[v]
+            de, de_rew, c_eff = day['de'], day['de_rew'], day['c_eff']
+
+        output = {
+            v: values.reshape((stop - start,) + shape) for v, values in output.items()
+        }
+        state = {
+            'de': de.reshape(shape), 'de_rew': de_rew.reshape(shape),
+            'c_eff': c_eff.reshape(shape),
+        }
+        if jit_flag:
+            state = {band: values.copy() for band, values in state.items()}
+        yield start, output, state
+
+
+def precip_block(precip, precip_dates, start_date, days):
+    """Align daily precipitation arrays to the water balance days
+
+    The precipitation for all days (plus the extra "next" day) is gathered
+    with a single indexing operation so that the precipitation source (which
+    can be memory mapped) is only read once.
+
+    Parameters
+    ----------
+    precip : array_like
+        Daily precipitation values with shape (n, ...).
+    precip_dates : array_like
+        ISO format dates (or np.datetime64 values) for each precipitation day.
+    start_date : str, np.datetime64
+        ISO format date of the first water balance day.
+    days : int
+        Number of water balance days.
+
+    Returns
+    -------
+    ndarray with shape (days + 1, ...)
+        Precipitation for each water balance day and the day after the last
+        day.  Days that are missing in the precipitation dates are NaN.
+
+    """
+    precip = np.asarray(precip)
+    precip_dates = np.asarray(precip_dates, dtype='datetime64[D]')
+    if precip_dates.shape[0] != precip.shape[0]:
+        raise ValueError('precip_dates must have a date for each precipitation day')
+
+    dates = np.datetime64(start_date, 'D') + np.arange(days + 1)
+    if precip.shape[0] == 0:
+        return np.full((days + 1,) + precip.shape[1:], np.nan)
+
+    sort_index = np.argsort(precip_dates)
+    index = np.searchsorted(precip_dates[sort_index], dates)
+    index = sort_index[np.minimum(index, precip_dates.shape[0] - 1)]
+    found = precip_dates[index] == dates
+
+    output = precip[index].astype(np.float64)
+    output[~found] = np.nan
+    return output
+
+
+def daily(values, scene_times, start_date, days, interp_days=32):
+    """Linearly interpolate stacked scene arrays to daily arrays
+
+    This is the array equivalent of openet.core.interpolate.daily() (with
+    compute_product=False).  For each day and pixel, the closest valid scene
+    in the "interp_days" before the day and the closest valid scene on or in
+    the "interp_days" after the day are linearly interpolated.  If only one
+    side has a valid scene, that value is used for the day (flat line).
+
+    The bracketing scenes are found for all days and pixels at once from
+    running indices of the last/next valid scene, so there is no loop over
+    the days.
+
+    Parameters
+    ----------
+    values : array_like, dict
+        Scene values with shape (scenes, ...) with masked pixels set to NaN
+        (i.e. et_fraction or ndvi), or a dictionary of band arrays.
+    scene_times : array_like
+        0 UTC time (in milliseconds) or date (ISO format or np.datetime64)
+        for each scene.
+    start_date : str, np.datetime64
+        ISO format date of the first output day.
+    days : int
+        Number of output days.
+    interp_days : int, optional
+        Number of days before and after each day to include in the
+        interpolation (the default is 32).
+
+    Returns
+    -------
+    ndarray with shape (days, ...) or dict of ndarray
+
+    """
+    if isinstance(values, dict):
+        return {
+            band: daily(band_values, scene_times, start_date, days, interp_days)
+            for band, band_values in values.items()
+        }
+
+    values = np.asarray(values, dtype=np.float64)
+    scene_days = _day_numbers(scene_times)
+    if scene_days.shape[0] != values.shape[0]:
+        raise ValueError('scene_times must have a time for each scene')
+
+    output_shape = (days,) + values.shape[1:]
+    scenes = values.shape[0]
+    if scenes == 0:
+        return np.full(output_shape, np.nan)
+
+    sort_index = np.argsort(scene_days, kind='stable')
+    scene_days = scene_days[sort_index]
+    values = values[sort_index].reshape((scenes, -1))
+    target_days = _day_numbers(start_date) + np.arange(days)
+
+    # Index of the last valid scene at or before each scene (-1 if none)
+    #   and of the first valid scene at or after each scene (scenes if none)
+    valid = ~np.isnan(values)
+    scene_index = np.arange(scenes)[:, np.newaxis]
+    prev_valid = np.maximum.accumulate(np.where(valid, scene_index, -1), axis=0)
+    next_valid = np.minimum.accumulate(
+        np.where(valid, scene_index, scenes)[::-1], axis=0)[::-1]
+
+    # Scenes before each day are [0, split) and on or after are [split, scenes)
+    split = np.searchsorted(scene_days, target_days, side='left')
+    prev_index = np.where(
+        (split > 0)[:, np.newaxis], prev_valid[np.maximum(split - 1, 0)], -1)
+    next_index = np.where(
+        (split < scenes)[:, np.newaxis], next_valid[np.minimum(split, scenes - 1)], scenes)
+
+    prev_found = prev_index >= 0
+    next_found = next_index < scenes
+    prev_index = np.clip(prev_index, 0, scenes - 1)
+    next_index = np.clip(next_index, 0, scenes - 1)
+    prev_days = scene_days[prev_index]
+    next_days = scene_days[next_index]
+    prev_found &= prev_days >= (target_days - interp_days)[:, np.newaxis]
+    next_found &= next_days <= (target_days + interp_days)[:, np.newaxis]
+    prev_values = np.take_along_axis(values, prev_index, axis=0)
+    next_values = np.take_along_axis(values, next_index, axis=0)
+
+    # Fill missing values with values from the opposite side
+    prev_values, next_values = (
+        np.where(prev_found, prev_values, next_values),
+        np.where(next_found, next_values, prev_values),
+    )
+    prev_days, next_days = (
+        np.where(prev_found, prev_days, next_days),
+        np.where(next_found, next_days, prev_days),
+    )
+    prev_values[~(prev_found | next_found)] = np.nan
+
+    # The time ratio is 0 if the previous and next days are the same
+    #   (EE returns 0 for a division by 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        time_ratio = np.where(
+            next_days == prev_days, 0,
+            (target_days[:, np.newaxis] - prev_days) / (next_days - prev_days))
+    output = (next_values - prev_values) * time_ratio + prev_values
+    return output.reshape(output_shape)
+
+
+def daily_update(values, scene_ids, scene_times, start_date, days,
+                 interp_days=32, output=None, previous_index=None):
+    """Update a daily interpolation for new (or removed) scenes
+
+    Only the days where the scenes within "interp_days" of the day changed
+    since the previous scene index are recomputed, so adding a new scene
+    recomputes at most "interp_days" on each side of the scene date.
+
+    Parameters
+    ----------
+    values : array_like
+        Scene values for all of the current scenes with shape (scenes, ...).
+    scene_ids : list
+        Scene ID for each scene.
+    scene_times : array_like
+        0 UTC time (in milliseconds) or date for each scene.
+    start_date : str, np.datetime64
+        ISO format date of the first output day.
+    days : int
+        Number of output days.
+    interp_days : int, optional
+        Number of days before and after each day to include in the
+        interpolation (the default is 32).
+    output : ndarray, optional
+        Previously computed daily values with shape (days, ...), which are
+        updated in place.  If not set, all days are computed.
+    previous_index : dict, optional
+        Scene index of the previously computed output (see
+        incremental.scene_index()).  If not set, all days are computed.
+
+    Returns
+    -------
+    tuple of (ndarray, dict, list)
+        Daily values, the current scene index, and the recomputed dates.
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scene_days = _day_numbers(scene_times)
+    if len(scene_ids) != values.shape[0] or scene_days.shape[0] != values.shape[0]:
+        raise ValueError('scene_ids and scene_times must be set for each scene')
+
+    start_date = np.datetime64(start_date, 'D')
+    current_index = incremental.scene_index(
+        zip(scene_ids, [str(d) for d in scene_days.astype('datetime64[D]')]),
+        str(start_date), str(start_date + days), interp_days=interp_days,
+    )
+
+    if output is None or previous_index is None:
+        output = np.full((days,) + values.shape[1:], np.nan)
+        previous_index = {}
+    elif output.shape != (days,) + values.shape[1:]:
+        raise ValueError('output shape does not match the scene values and days')
+
+    dates = incremental.changed_dates(previous_index, current_index)
+    for run_start, run_end in incremental.changed_periods(dates, 'daily'):
+        run_start = np.datetime64(run_start, 'D')
+        run_days = int((np.datetime64(run_end, 'D') - run_start).astype(int))
+        offset = int((run_start - start_date).astype(int))
+
+        # Only the scenes that can bracket the days in the run are needed
+        run_start_day = int(run_start.astype(int))
+        scene_mask = (
+            (scene_days >= run_start_day - interp_days) &
+            (scene_days < run_start_day + run_days + interp_days)
+        )
+        output[offset:offset + run_days] = daily(
+            values[scene_mask], scene_days[scene_mask].astype('datetime64[D]'),
+            run_start, run_days, interp_days=interp_days,
+        )
+
+    return output, current_index, dates
+
+
+def aggregate_chunks(chunks, start_date, t_interval='monthly', variables=None):
+    """Aggregate daily array chunks to monthly or annual periods in one pass
+
+    The daily chunks are consumed in order and reduced into running sums and
+    counts for the current period, so each day is only read once and memory
+    use does not depend on the number of days or periods.  The "et" and
+    "et_reference" bands are summed, "et_fraction" is computed from the
+    summed "et" and "et_reference" (if both are present, otherwise it is
+    averaged), and all other bands are averaged, matching the Earth Engine
+    interpolation aggregation.  Masked (NaN) days are skipped and pixels
+    with no values in a period are NaN.
+
+    Parameters
+    ----------
+    chunks : iterable
+        Tuples of (start day index, dictionary of daily arrays with shape
+        (days, ...)) in date order, such as the water_balance_chunks() output.
+        Any additional tuple items are ignored.
+    start_date : str, np.datetime64
+        ISO format date of the day with index 0.
+    t_interval : {'monthly', 'annual'}, optional
+        Aggregation time interval (the default is 'monthly').
+    variables : list, optional
+        Output variables (the default is all of the chunk bands).
+
+    Yields
+    ------
+    tuple (period_start, output)
+        The ISO format start date of each period and a dictionary of the
+        aggregated arrays.  Periods that are only partially covered by the
+        chunks are aggregated from the available days.
+
+    Raises
+    ------
+    ValueError for an unsupported t_interval.
+
+    """
+    if t_interval.lower() == 'monthly':
+        period_unit = 'M'
+    elif t_interval.lower() == 'annual':
+        period_unit = 'Y'
+    else:
+        raise ValueError(f'unsupported t_interval: {t_interval}')
+
+    start_date = np.datetime64(start_date, 'D')
+    period = None
+    sums, counts = {}, {}
+
+    for chunk in chunks:
+        start, arrays = chunk[0], chunk[1]
+        days = next(iter(arrays.values())).shape[0]
+        if days == 0:
+            continue
+
+        # Index of the first day of each period in the chunk
+        keys = (start_date + start + np.arange(days)).astype(f'datetime64[{period_unit}]')
+        bounds = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+
+        chunk_sums, chunk_counts = {}, {}
+        for band, values in arrays.items():
+            values = np.asarray(values, dtype=np.float64)
+            valid = ~np.isnan(values)
+            chunk_sums[band] = np.add.reduceat(np.where(valid, values, 0), bounds, axis=0)
+            chunk_counts[band] = np.add.reduceat(valid.astype(np.int32), bounds, axis=0)
+
+        for i, bound in enumerate(bounds):
+            if period is not None and keys[bound] != period:
+                yield _period_output(period, sums, counts, variables)
+                sums, counts = {}, {}
+            period = keys[bound]
+            for band in chunk_sums.keys():
+                if band in sums.keys():
+                    sums[band] += chunk_sums[band][i]
+                    counts[band] += chunk_counts[band][i]
+                else:
+                    sums[band] = chunk_sums[band][i].copy()
+                    counts[band] = chunk_counts[band][i].copy()
+
+    if period is not None:
+        yield _period_output(period, sums, counts, variables)
+
+
+def _period_output(period, sums, counts, variables=None):
+    """Compute the period values from the running sums and counts"""
+    output = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for band in sums.keys():
+            if band in ['et', 'et_reference']:
+                output[band] = np.where(counts[band] > 0, sums[band], np.nan)
+            else:
+                output[band] = np.where(counts[band] > 0, sums[band] / counts[band], np.nan)
+        if 'et' in sums.keys() and 'et_reference' in sums.keys():
+            output['et_fraction'] = output['et'] / output['et_reference']
+
+    if variables is not None:
+        output = {band: output[band] for band in variables}
+    return str(period.astype('datetime64[D]')), output
+
+
+def initial_state(tew, rew):
+    """Water balance state with the soil at field capacity
+
+    Parameters
+    ----------
+    tew : array_like
+        Total evaporable water (mm).
+    rew : array_like
+        Readily evaporable water (mm).
+
+    Returns
+    -------
+    dict of ndarray (STATE_BANDS)
+
+    """
+    shape = np.broadcast_shapes(np.shape(tew), np.shape(rew))
+    de, de_rew, c_eff = _initial_state(
+        np.broadcast_to(np.asarray(tew, dtype=np.float64), shape),
+        np.broadcast_to(np.asarray(rew, dtype=np.float64), shape),
+    )
+    return {'de': de, 'de_rew': de_rew, 'c_eff': c_eff}
+
+
+def save_state(path, state, date):
+    """Save a water balance state checkpoint to a NumPy .npz file
+
+    The file is written to a temporary file first and then renamed so that an
+    existing checkpoint is not corrupted if the write fails.
+
+    Parameters
+    ----------
+    path : str, os.PathLike
+        Output checkpoint file path.
+    state : dict
+        Water balance state (STATE_BANDS arrays), such as the state yielded by
+        water_balance_chunks().
+    date : str, datetime.date
+        ISO format date of the last day included in the state.
+
+    Raises
+    ------
+    ValueError
+        If a state band is missing or the date is not valid.
+
+    """
+    for band in STATE_BANDS:
+        if band not in state:
+            raise ValueError(f'missing water balance state band: {band}')
+    date = _state_date(date)
+
+    path = os.fspath(path)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez(
+            f, version=STATE_VERSION, date=date,
+            **{band: np.asarray(state[band], dtype=np.float64) for band in STATE_BANDS}
+        )
+    os.replace(temp_path, path)
+
+
+def load_state(path, date=None):
+    """Load a water balance state checkpoint saved with save_state()
+
+    Parameters
+    ----------
+    path : str, os.PathLike
+        Checkpoint file path.
+    date : str, datetime.date, optional
+        If set, the checkpoint date must match this date, which should be the
+        day before the first day of the run being seeded.
+
+    Returns
+    -------
+    tuple (state, date)
+        The water balance state dictionary and the ISO format state date.
+
+    Raises
+    ------
+    ValueError
+        If the checkpoint version or date do not match.
+
+    """
+    with np.load(path) as npz:
+        version = int(npz['version'])
+        if version != STATE_VERSION:
+            raise ValueError(
+                f'unsupported water balance state version: {version} '
+                f'(expected {STATE_VERSION})'
+            )
+        state_date = str(npz['date'])
+        state = {band: npz[band] for band in STATE_BANDS}
+
+    if date is not None and _state_date(date) != state_date:
+        raise ValueError(
+            f'water balance state date {state_date} does not match {_state_date(date)}'
+        )
+
+    return state, state_date
+
+
+def _state_date(date):
+    """Return the ISO format date string for a state date"""
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        return date.strftime('%Y-%m-%d')
+    try:
+        return datetime.datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError(f'invalid water balance state date: {date}')
+
+
+def _day_numbers(times):
+    """Days since 1970 for 0 UTC times (in milliseconds) or dates"""
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.number):
+        return (times // (24 * 60 * 60 * 1000)).astype(np.int64)
+    return times.astype('datetime64[D]').astype(np.int64)
+
+
+def _initial_state(tew, rew):
+    """Assume the soil is at field capacity to start"""
+    de = np.array(tew, dtype=np.float64)
+    de_rew = np.array(rew, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c_eff = np.minimum(C0 + C1 * (1 - de / tew), 1)
+    return de, de_rew, c_eff
+
+
+def _water_balance_step(
+        de_prev,
+        de_rew_prev,
+        c_eff_prev,
+        tew,
+        rew,
+        ndvi,
+        et_fraction,
+        et_reference,
+        precip_current,
+        precip_next,
+        ):
+    """Compute one day of the water balance (see interpolate.daily_ke)
+
+    The intermediate arrays are updated in place to limit the number of
+    temporary pixel arrays allocated for each day.
+
+    """
+    et_fraction = np.asarray(et_fraction, dtype=np.float64)
+    et_reference = np.asarray(et_reference, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Fraction of day stage 1 evap
+        # Allen 2011, eq 12
+        ft = rew - de_rew_prev
+        ft /= KE_MAX * et_reference
+        _clamp(ft, 0.0, 1.0)
+
+        # Soil evap reduction coeff, FAO 56
+        kr = tew - de_prev
+        kr /= tew - rew
+        _clamp(kr, 0.0, 1.0)
+
+        # Fraction of exposed and wetted soil
+        # precip only for now (fraction of wetting is 1)
+        # few = max(min(1, 1 - fc), 0.01) with fc = ndvi * 1.26 - 0.18
+        few = np.multiply(ndvi, -1.26, dtype=np.float64)
+        few += 1.18
+        _clamp(few, 0.01, 1)
+
+        # Soil evap coeff, FAO 56
+        ke = 1 - ft
+        ke *= kr
+        ke += ft
+        np.minimum(ke, few, out=ke)
+        ke *= KE_MAX
+
+        # ETe - soil evaporation
+        ete = ke * et_reference
+
+        etof = et_fraction + ke
+        _clamp(etof, 0, ET_FRACTION_MAX)
+        etof = _where(et_fraction, et_fraction <= ET_FRACTION_MAX, etof)
+
+        precip_evap = np.multiply(precip_next, FRAC_DAY_EVAP, dtype=np.float64)
+        precip_evap += np.multiply(precip_current, 1 - FRAC_DAY_EVAP, dtype=np.float64)
+        ete_few = ete / few
+
+        # Depletion, FAO 56
+        # Can't have negative depletion
+        de = de_prev - precip_evap
+        de += ete_few
+        np.minimum(de, tew, out=de)
+        np.maximum(de, 0, out=de)
+
+        # Stage 1 depletion (REW)
+        # Allen 2011
+        precip_evap *= c_eff_prev
+        de_rew = de_rew_prev - precip_evap
+        de_rew += ete_few
+        np.minimum(de_rew, rew, out=de_rew)
+        np.maximum(de_rew, 0, out=de_rew)
+
+        # Efficiency of skin layer
+        # Allen 2011, eq 15
+        c_eff = de / tew
+        c_eff *= -C1
+        c_eff += C0 + C1
+        np.minimum(c_eff, 1, out=c_eff)
+
+    return {
+        'de': de, 'de_rew': de_rew, 'c_eff': c_eff, 'ke': ke, 'kr': kr, 'ft': ft,
+        'de_prev': de_prev, 'ete': ete, 'precip': precip_current,
+        'et_fraction': etof,
+    }
+
+
+def _clamp(values, low, high):
+    """Clamp an array in place (NaN values are kept)"""
+    np.maximum(values, low, out=values)
+    np.minimum(values, high, out=values)
+    return values
@@ -0,0 +1,275 @@
+import math
+
+from .array_interpolate import C0, C1, ET_FRACTION_MAX, FRAC_DAY_EVAP, KE_MAX
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# The kernels are only compiled (and called) if Numba is installed,
+#   otherwise the ArrayModel and array_interpolate NumPy functions are used
+numba_available = numba is not None
+
+
+def _jit(function):
+    """Compile a scalar helper function"""
+    if numba is None:
+        return function
+    return numba.njit(cache=True, error_model='numpy')(function)
+
+
+def _jit_parallel(function):
+    """Compile a kernel with the pixel loop split across threads"""
+    if numba is None:
+        return function
+    return numba.njit(cache=True, error_model='numpy', parallel=True, nogil=True)(function)
+
+
+prange = range if numba is None else numba.prange
+
+
+def kc(ndvi, crop_index, params, doy, fc_slope, fc_offset, crop_type_kc_flag,
+       crop_type_annual_skip_flag, water_kc_flag, mask_non_ag_flag, out):
+    """Fused crop coefficient (kc) kernel (see ArrayModel.kc)
+
+    The crop class dispatch and all of the Kc functions are computed in a
+    single loop over the pixels without any intermediate arrays.  NaN values
+    are handled the same as the ArrayModel where() chain.  The output values
+    match the NumPy functions to within floating point rounding (the NumPy
+    vectorized power function can differ from the scalar one in the last
+    digit).
+
+    Parameters
+    ----------
+    ndvi : ndarray
+        Flat float64 NDVI values.
+    crop_index : ndarray
+        Flat crop data column index for each pixel (see crop_type_index()).
+    params : ndarray
+        Crop data lookup table with the array_model.KC_PARAMS rows.
+    doy : ndarray
+        Flat float64 day of year for each pixel.
+    fc_slope, fc_offset : float
+        Fraction of cover coefficients for the reflectance type.
+    crop_type_kc_flag, crop_type_annual_skip_flag : bool
+    water_kc_flag, mask_non_ag_flag : bool
+    out : ndarray
+        Flat float64 output array.
+
+    Returns
+    -------
+    ndarray
+        The output array.
+
+    Raises
+    ------
+    ImportError if Numba is not installed
+
+    """
+    if not numba_available:
+        raise ImportError('numba is required for the array kernels')
+    _kc_kernel(
+        ndvi, crop_index, params, doy, fc_slope, fc_offset, crop_type_kc_flag,
+        crop_type_annual_skip_flag, water_kc_flag, mask_non_ag_flag, out,
+    )
+    return out
+
+
+def water_balance_step(de, de_rew, c_eff, tew, rew, ndvi, et_fraction, et_reference,
+                       precip_current, precip_next, out):
+    """Fused daily water balance kernel (see array_interpolate._water_balance_step)
+
+    The state arrays (de, de_rew, c_eff) are updated in place to the state at
+    the end of the day and all of the water balance bands for the day are
+    written to the output array.
+
+    Parameters
+    ----------
+    de, de_rew, c_eff : ndarray
+        Flat float64 previous day state arrays.
+    tew, rew : ndarray
+        Flat float64 total and readily evaporable water.
+    ndvi, et_fraction, et_reference, precip_current, precip_next : ndarray
+        Flat daily input arrays.
+    out : ndarray
+        Float64 output array with shape (len(WATER_BALANCE_BANDS), pixels),
+        the rows are in the array_interpolate.WATER_BALANCE_BANDS order.
+
+    Returns
+    -------
+    ndarray
+        The output array.
+
+    Raises
+    ------
+    ImportError if Numba is not installed
+
+    """
+    if not numba_available:
+        raise ImportError('numba is required for the array kernels')
+    _water_balance_kernel(
+        de, de_rew, c_eff, tew, rew, ndvi, et_fraction, et_reference,
+        precip_current, precip_next, out,
+    )
+    return out
+
+
+@_jit
+def _maximum(a, b):
+    """np.maximum() for scalars (NaN values are propagated)"""
+    if math.isnan(a) or math.isnan(b):
+        return math.nan
+    return a if a >= b else b
+
+
+@_jit
+def _minimum(a, b):
+    """np.minimum() for scalars (NaN values are propagated)"""
+    if math.isnan(a) or math.isnan(b):
+        return math.nan
+    return a if a <= b else b
+
+
+@_jit
+def _clip(value, low, high):
+    return _minimum(_maximum(value, low), high)
+
+
+@_jit
+def _where(input_value, test, value):
+    """Scalar equivalent of array_model._where()"""
+    if test and not math.isnan(value) and not math.isnan(input_value):
+        return value
+    return input_value
+
+
+@_jit
+def _kc_row_crop(fc):
+    return ((fc ** 2) * -0.4771) + (1.4047 * fc) + 0.15
+
+
+@_jit
+def _kcb(kd, h_max, fr_mid, fr_end, ls_start, ls_stop, doy):
+    fr = _minimum(
+        _maximum((ls_start - doy) * (fr_mid - fr_end) / (ls_stop - ls_start) + fr_mid, fr_end),
+        fr_mid
+    )
+    kcb_full = _minimum(h_max * 0.1 + 1, 1.2) * fr
+    return kd * (kcb_full - 0.15) + 0.15
+
+
+@_jit
+def _kd_row_crop(fc, h_max, m_l):
+    kd = _where(
+        _minimum(fc * m_l, fc ** ((fc / 0.7 * h_max + 1) ** -1)),
+        fc / 0.7 > 1,
+        _minimum(fc * m_l, fc ** ((h_max + 1) ** -1)),
+    )
+    return _minimum(kd, 1.0)
+
+
+@_jit
+def _kd_tree(fc, h_max, m_l):
+    kd = _where(
+        _minimum(fc * m_l, fc ** ((h_max + 1) ** -1)),
+        fc <= 0.5,
+        _minimum(fc * m_l, fc ** (h_max ** -1)),
+    )
+    return _minimum(kd, 1.0)
+
+
+@_jit
+def _kc_pixel(ndvi, crop_class, h_max, m_l, fr_mid, fr_end, ls_start, ls_stop, doy,
+              fc_slope, fc_offset, crop_type_kc_flag, crop_type_annual_skip_flag,
+              water_kc_flag, mask_non_ag_flag):
+    fc = _clip(ndvi * fc_slope - fc_offset, 0.0, 1.0)
+    kc = _maximum(ndvi * 1.25 + 0.2, 0.0)
+
+    if crop_class == 1:
+        kc = _where(kc, True, _kc_row_crop(fc))
+        if crop_type_kc_flag and not crop_type_annual_skip_flag and h_max >= 0:
+            kc = _where(kc, True, _kcb(_kd_row_crop(fc, h_max, m_l), h_max, fr_mid,
+                                       fr_end, ls_start, ls_stop, doy))
+    elif crop_class == 2:
+        kd = _minimum(_minimum(fc * 1.5, fc ** (1 / (1 + 2))), 1.0)
+        kc = _where(kc, True, _clip(
+            _kcb(kd, h_max, fr_mid, fr_end, ls_start, ls_stop, doy), 0.0, 1.1))
+    elif crop_class == 3:
+        kc = _where(kc, True, fc * 1.48 + 0.007)
+        if crop_type_kc_flag and h_max >= 0:
+            kc = _where(kc, True, _clip(
+                _kcb(_kd_tree(fc, h_max, m_l), h_max, fr_mid, fr_end, ls_start, ls_stop,
+                     doy),
+                0.0, 1.2))
+    elif crop_class == 5:
+        kc = _where(kc, True, _where(_kc_row_crop(fc), ndvi <= 0.14, 1.05))
+    elif crop_class == 6 or crop_class == 7:
+        kc = _where(kc, True, _maximum(_where(_kc_row_crop(fc), ndvi <= 0.35, fc), 0.01))
+
+    if water_kc_flag:
+        kc = _where(kc, ndvi < 0 and crop_class == 0, 1.05)
+    if mask_non_ag_flag and not crop_class > 0:
+        kc = math.nan
+    return kc
+
+
+@_jit_parallel
+def _kc_kernel(ndvi, crop_index, params, doy, fc_slope, fc_offset, crop_type_kc_flag,
+               crop_type_annual_skip_flag, water_kc_flag, mask_non_ag_flag, out):
+    for i in prange(ndvi.shape[0]):
+        j = crop_index[i]
+        out[i] = _kc_pixel(
+            ndvi[i], params[0, j], params[1, j], params[2, j], params[3, j],
+            params[4, j], params[5, j], params[6, j], doy[i], fc_slope, fc_offset,
+            crop_type_kc_flag, crop_type_annual_skip_flag, water_kc_flag,
+            mask_non_ag_flag,
+        )
+
+
+@_jit_parallel
+def _water_balance_kernel(de, de_rew, c_eff, tew, rew, ndvi, et_fraction, et_reference,
+                          precip_current, precip_next, out):
+    for i in prange(de.shape[0]):
+        de_prev = de[i]
+        de_rew_prev = de_rew[i]
+        eto = float(et_reference[i])
+        kcb = float(et_fraction[i])
+
+        # Fraction of day stage 1 evap, soil evap reduction coeff, and
+        #   fraction of exposed and wetted soil
+        ft = _clip((rew[i] - de_rew_prev) / (KE_MAX * eto), 0.0, 1.0)
+        kr = _clip((tew[i] - de_prev) / (tew[i] - rew[i]), 0.0, 1.0)
+        few = _clip(float(ndvi[i]) * -1.26 + 1.18, 0.01, 1.0)
+
+        # Soil evap coeff and soil evaporation
+        ke = _minimum((1 - ft) * kr + ft, few) * KE_MAX
+        ete = ke * eto
+
+        etof = _clip(kcb + ke, 0.0, ET_FRACTION_MAX)
+        etof = _where(kcb, kcb <= ET_FRACTION_MAX, etof)
+
+        precip_evap = (float(precip_next[i]) * FRAC_DAY_EVAP +
+                       float(precip_current[i]) * (1 - FRAC_DAY_EVAP))
+        ete_few = ete / few
+
+        # Depletion and stage 1 depletion
+        de_new = _maximum(_minimum(de_prev - precip_evap + ete_few, tew[i]), 0.0)
+        de_rew_new = _maximum(
+            _minimum(de_rew_prev - precip_evap * c_eff[i] + ete_few, rew[i]), 0.0)
+
+        # Efficiency of skin layer
+        c_eff[i] = _minimum(de_new / tew[i] * -C1 + (C0 + C1), 1.0)
+        de[i] = de_new
+        de_rew[i] = de_rew_new
+
+        out[0, i] = de_new
+        out[1, i] = de_rew_new
+        out[2, i] = c_eff[i]
+        out[3, i] = ke
+        out[4, i] = kr
+        out[5, i] = ft
+        out[6, i] = de_prev
+        out[7, i] = ete
+        out[8, i] = precip_current[i]
+        out[9, i] = etof
@@ -0,0 +1,826 @@
+import copy
+from functools import lru_cache
+
+import numpy as np
+
+from . import data
+from . import model
+
+
+class ArrayModel():
+    """NumPy based model for computing SIMS ETcb"""
+
+    def __init__(
+        self,
+        crop_type,
+        doy,
+        crop_type_remap='CDL',
+        crop_type_kc_flag=False,
+        crop_type_annual_skip_flag=False,
+        mask_non_ag_flag=True,
+        water_kc_flag=True,
+        reflectance_type='SR',
+        kc_dispatch_flag=False,
+        jit_flag=False,
+        kc_lut_flag=False,
+        kc_lut_bins=None,
+    ):
+        """NumPy based SIMS model object
+
+        The crop class branches are identical to the Earth Engine Model class
+        but are evaluated on in memory arrays instead of building an EE graph.
+        Masked (nodata) pixels are represented as NaN.
+
+        Parameters
+        ----------
+        crop_type : array_like
+            Crop type values (i.e. CDL codes).  Scalars will be broadcast
+            against the NDVI array in the kc() and fc() calls.
+        doy : int, array_like
+            Day of year.  Arrays are broadcast against the NDVI array, so a
+            (days, 1, 1) array can be used to compute Kc for a daily
+            (days, rows, cols) NDVI stack in a single kc() call.
+        crop_type_remap : {'CDL'}, optional
+            Currently only CDL crop type values are supported.
+        crop_type_kc_flag : bool, optional
+            If True, compute Kc using crop type specific coefficients.
+            If False, use generic crop class coefficients. The default is False.
+        crop_type_annual_skip_flag : bool, optional
+            If True, the crop type specific coefficients are NOT used for annual crops.
+            If False, the crop type specific coefficients are used for annual crops.
+            This flag is only applied/used if crop_type_kc_flag is also True.
+            The default is False.
+        mask_non_ag_flag : bool, optional
+            If True, mask all pixels that don't map to a crop_class.
+            The default is True.
+        water_kc_flag : bool, optional
+            If True, set Kc for water pixels to 1.05.  The default is True.
+        reflectance_type : {'SR', 'TOA'}, optional
+            Used to select the fractional cover equation (the default is 'SR').
+        kc_dispatch_flag : bool, optional
+            If True, gather the pixels of each crop class and only compute the
+            Kc function for that class, instead of computing every crop class
+            function for every pixel.  The output values are identical.
+            This mode is only available locally; the Earth Engine Model always
+            uses the where() chain.  The default is False.
+        jit_flag : bool, optional
+            If True and Numba is installed, compute Kc with the fused per pixel
+            kernel (see array_kernels.kc()), otherwise the NumPy functions are
+            used.  The output values match to within floating point rounding.
+            The default is False.
+        kc_lut_flag : bool, optional
+            If True, compute Kc by interpolating a precomputed crop data x day
+            of year x NDVI lookup table (see kc_lookup_table()) instead of
+            evaluating the Kc functions.  The maximum absolute error is
+            KC_LUT_MAX_ERROR.  The default is False.
+        kc_lut_bins : int, optional
+            Number of NDVI values in the lookup table between -1 and 1
+            (the default is KC_LUT_BINS).
+
+        """
+        self.doy = doy
+
+        self.crop_type_remap = crop_type_remap
+        self.crop_type_kc_flag = crop_type_kc_flag
+        self.crop_type_annual_skip_flag = crop_type_annual_skip_flag
+        self.mask_non_ag_flag = mask_non_ag_flag
+        self.water_kc_flag = water_kc_flag
+        self.kc_dispatch_flag = kc_dispatch_flag
+        self.jit_flag = jit_flag
+        self.kc_lut_flag = kc_lut_flag
+        self.kc_lut_bins = KC_LUT_BINS if kc_lut_bins is None else int(kc_lut_bins)
+
+        self.crop_data = self._crop_data()
+        self.crop_type = np.asarray(crop_type)
+
+        # Gather all of the crop data parameters from the cached lookup table
+        #   with a single crop type index
+        param_names, lookup = crop_data_lookup(self.crop_type_remap)
+        params = dict(zip(param_names, lookup[:, crop_type_index(self.crop_type)]))
+        self.crop_class = params['crop_class']
+        self.h_max = params['h_max']
+        self.m_l = params['m_l']
+        self.fr_mid = params['fr_mid']
+        self.fr_end = params['fr_end']
+        self.ls_start = params['ls_start']
+        self.ls_stop = params['ls_stop']
+
+        self.reflectance_type = reflectance_type
+
+    def kc(self, ndvi):
+        """Crop coefficient (kc) for all crop classes and types
+
+        Parameters
+        ----------
+        ndvi : array_like
+            Normalized difference vegetation index.
+
+        Returns
+        -------
+        ndarray
+
+        Notes
+        -----
+        See Model.kc() for the references.  The crop class branches are
+        layered with the same precedence as the Earth Engine where() chain.
+
+        """
+        ndvi = np.asarray(ndvi, dtype=np.float64)
+
+        if self.kc_lut_flag:
+            return self._kc_lut(ndvi)
+        if self.jit_flag:
+            from . import array_kernels
+            if array_kernels.numba_available:
+                return self._kc_jit(ndvi)
+        if self.kc_dispatch_flag:
+            return self._kc_dispatch(ndvi)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fc = self.fc(ndvi)
+
+            # Start with the generic NDVI-Kc relationship to initialize Kc
+            kc = self.kc_generic(ndvi)
+
+            # Apply generic crop class Kc functions
+            kc = _where(kc, self.crop_class == 1, self.kc_row_crop(fc))
+            kc = _where(kc, self.crop_class == 2,
+                        np.clip(self._kcb(self._kd_vine(fc)), 0, 1.1))
+            kc = _where(kc, self.crop_class == 3, self.kc_tree(fc))
+            kc = _where(kc, self.crop_class == 5, self.kc_rice(fc, ndvi))
+            kc = _where(kc, self.crop_class == 6, self.kc_fallow(fc, ndvi))
+            kc = _where(kc, self.crop_class == 7, self.kc_grass_pasture(fc, ndvi))
+
+            if self.crop_type_kc_flag:
+                # Apply crop type specific Kc functions
+                # h_max >= 0 selects the pixels with custom coefficient values
+                #   (NaN comparisons are always False)
+                if not self.crop_type_annual_skip_flag:
+                    kc = _where(kc, (self.crop_class == 1) & (self.h_max >= 0),
+                                self._kcb(self._kd_row_crop(fc)))
+
+                kc = _where(kc, (self.crop_class == 3) & (self.h_max >= 0),
+                            np.clip(self._kcb(self._kd_tree(fc)), 0, 1.2))
+
+            if self.water_kc_flag:
+                kc = _where(kc, (ndvi < 0) & (self.crop_class == 0), 1.05)
+
+            if self.mask_non_ag_flag:
+                kc = np.where(self.crop_class > 0, kc, np.nan)
+
+        return kc
+
+    def _kc_dispatch(self, ndvi):
+        """Crop coefficient (kc) computed separately for each crop class
+
+        Parameters
+        ----------
+        ndvi : ndarray
+            Normalized difference vegetation index.
+
+        Returns
+        -------
+        ndarray
+
+        Notes
+        -----
+        The pixels of each crop class are gathered with a single index, the
+        Kc function for that class is applied to the gathered values, and the
+        values are scattered back into the output array.  The generic Kc is
+        only computed for the remaining (non-ag) pixels.
+
+        """
+        shape = np.broadcast_shapes(ndvi.shape, np.shape(self.crop_class))
+        ndvi = np.broadcast_to(ndvi, shape).reshape(-1)
+        crop_class = _flatten(self.crop_class, shape)
+
+        kc = np.empty(ndvi.shape, dtype=np.float64)
+        other_mask = np.ones(ndvi.shape, dtype=bool)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for class_value in [1, 2, 3, 5, 6, 7]:
+                index = np.flatnonzero(crop_class == class_value)
+                if index.size == 0:
+                    continue
+                other_mask[index] = False
+                kc[index] = self._subset(index, shape)._kc_class(class_value, ndvi[index])
+
+            index = np.flatnonzero(other_mask)
+            if index.size > 0:
+                class_model = self._subset(index, shape)
+                class_ndvi = ndvi[index]
+                class_kc = self.kc_generic(class_ndvi)
+                if self.water_kc_flag:
+                    class_kc = _where(
+                        class_kc, (class_ndvi < 0) & (class_model.crop_class == 0), 1.05
+                    )
+                if self.mask_non_ag_flag:
+                    class_kc = np.where(class_model.crop_class > 0, class_kc, np.nan)
+                kc[index] = class_kc
+
+        return kc.reshape(shape)
+
+    def _kc_jit(self, ndvi):
+        """Crop coefficient (kc) computed with the fused Numba kernel
+
+        Parameters
+        ----------
+        ndvi : ndarray
+            Normalized difference vegetation index.
+
+        Returns
+        -------
+        ndarray
+
+        """
+        from . import array_kernels
+
+        if self.reflectance_type == 'SR':
+            fc_slope, fc_offset = 1.26, 0.18
+        elif self.reflectance_type == 'TOA':
+            fc_slope, fc_offset = 1.465, 0.139
+        else:
+            raise ValueError(f'Unsupported reflectance type: {self.reflectance_type}')
+
+        doy = np.asarray(self.doy, dtype=np.float64)
+        shape = np.broadcast_shapes(ndvi.shape, self.crop_type.shape, doy.shape)
+        param_names, lookup = crop_data_lookup(self.crop_type_remap)
+        params = lookup[[param_names.index(p) for p in KC_PARAMS]]
+
+        kc = np.empty(int(np.prod(shape)), dtype=np.float64)
+        array_kernels.kc(
+            np.ascontiguousarray(_flatten(ndvi, shape)),
+            np.ascontiguousarray(_flatten(crop_type_index(self.crop_type), shape)),
+            params, np.ascontiguousarray(_flatten(doy, shape)), fc_slope, fc_offset,
+            bool(self.crop_type_kc_flag), bool(self.crop_type_annual_skip_flag),
+            bool(self.water_kc_flag), bool(self.mask_non_ag_flag), kc,
+        )
+        return kc.reshape(shape)
+
+    def _kc_lut(self, ndvi):
+        """Crop coefficient (kc) interpolated from the Kc lookup table
+
+        Parameters
+        ----------
+        ndvi : ndarray
+            Normalized difference vegetation index.
+
+        Returns
+        -------
+        ndarray
+
+        Notes
+        -----
+        Pixels where the table can't be used (NDVI outside of -1 to 1, a day
+        of year that isn't 1-366, or an NDVI bin that spans a break in the Kc
+        functions) are computed with the Kc functions.
+
+        """
+        column_rows, table, exact_bins = kc_lookup_table(
+            self.crop_type_remap, self.reflectance_type, self.kc_lut_bins,
+            crop_type_kc_flag=self.crop_type_kc_flag,
+            crop_type_annual_skip_flag=self.crop_type_annual_skip_flag,
+            mask_non_ag_flag=self.mask_non_ag_flag,
+            water_kc_flag=self.water_kc_flag,
+        )
+        doy = np.asarray(self.doy)
+        shape = np.broadcast_shapes(ndvi.shape, self.crop_type.shape, doy.shape)
+        ndvi = _flatten(ndvi, shape)
+        row = column_rows[_flatten(crop_type_index(self.crop_type), shape)]
+        doy_index = _flatten(doy, shape).astype(np.intp) - 1
+
+        # Position of each NDVI value in the table
+        step = 2.0 / (self.kc_lut_bins - 1)
+        with np.errstate(invalid='ignore'):
+            position = (ndvi + 1) / step
+            valid = (
+                (position >= 0) & (position <= self.kc_lut_bins - 1) &
+                (doy_index >= 0) & (doy_index < table.shape[1]) &
+                (doy_index + 1 == _flatten(doy, shape))
+            )
+        bin_index = np.where(valid, position, 0).astype(np.intp)
+        np.minimum(bin_index, self.kc_lut_bins - 2, out=bin_index)
+        doy_index = np.where(valid, doy_index, 0)
+
+        # Gather both ends of each bin with a single flat table index
+        flat_index = row * table.shape[1]
+        flat_index += doy_index
+        exact = exact_bins.reshape(-1)[flat_index * (self.kc_lut_bins - 1) + bin_index]
+        flat_index *= self.kc_lut_bins
+        flat_index += bin_index
+        kc_low = table.reshape(-1)[flat_index]
+        kc_high = table.reshape(-1)[flat_index + 1]
+        kc = position - bin_index
+        kc *= kc_high - kc_low
+        kc += kc_low
+        kc[np.isnan(ndvi)] = np.nan
+
+        index = np.flatnonzero((~valid & ~np.isnan(ndvi)) | (valid & exact))
+        if index.size > 0:
+            subset = self._subset(index, shape)
+            subset.kc_lut_flag = False
+            kc[index] = subset.kc(ndvi[index])
+
+        return kc.reshape(shape)
+
+    def _kc_class(self, class_value, ndvi):
+        """Crop coefficient (kc) for pixels of a single (ag) crop class
+
+        The where() calls are applied in the same order as in kc() so that
+        masked (NaN) values fall back to the same values.
+
+        """
+        fc = self.fc(ndvi)
+        kc = self.kc_generic(ndvi)
+
+        if class_value == 1:
+            kc = _where(kc, True, self.kc_row_crop(fc))
+            if self.crop_type_kc_flag and not self.crop_type_annual_skip_flag:
+                kc = _where(kc, self.h_max >= 0, self._kcb(self._kd_row_crop(fc)))
+        elif class_value == 2:
+            kc = _where(kc, True, np.clip(self._kcb(self._kd_vine(fc)), 0, 1.1))
+        elif class_value == 3:
+            kc = _where(kc, True, self.kc_tree(fc))
+            if self.crop_type_kc_flag:
+                kc = _where(kc, self.h_max >= 0, np.clip(self._kcb(self._kd_tree(fc)), 0, 1.2))
+        elif class_value == 5:
+            kc = _where(kc, True, self.kc_rice(fc, ndvi))
+        elif class_value == 6:
+            kc = _where(kc, True, self.kc_fallow(fc, ndvi))
+        elif class_value == 7:
+            kc = _where(kc, True, self.kc_grass_pasture(fc, ndvi))
+
+        return kc
+
+    def _subset(self, index, shape):
+        """Return a copy of the model with the parameter arrays gathered at index
+
+        Parameters
+        ----------
+        index : ndarray
+            Flat pixel indices.
+        shape : tuple
+            Shape of the full (broadcast) pixel array.
+
+        Returns
+        -------
+        ArrayModel
+
+        """
+        subset = copy.copy(self)
+        for attr in ['crop_class', 'h_max', 'm_l', 'fr_mid', 'fr_end',
+                     'ls_start', 'ls_stop', 'doy']:
+            value = np.asarray(getattr(self, attr))
+            if value.ndim > 0:
+                value = _flatten(value, shape)[index]
+            setattr(subset, attr, value)
+        return subset
+
+    def fc(self, ndvi):
+        """Fraction of cover (fc)
+
+        Parameters
+        ----------
+        ndvi : array_like
+
+        Returns
+        -------
+        ndarray
+
+        Raises
+        ------
+        ValueError if reflectance type is not supported
+
+        """
+        ndvi = np.asarray(ndvi, dtype=np.float64)
+        if self.reflectance_type == 'SR':
+            fc = ndvi * 1.26 - 0.18
+        elif self.reflectance_type == 'TOA':
+            fc = ndvi * 1.465 - 0.139
+        else:
+            raise ValueError(f'Unsupported reflectance type: {self.reflectance_type}')
+
+        return np.clip(fc, 0, 1)
+
+    def _crop_data(self):
+        """Load the crop data dictionary
+
+        Returns
+        -------
+        dict
+
+        Raises
+        ------
+        ValueError for unsupported crop_type_remap
+
+        """
+        return model.crop_data_dict(self.crop_type_remap)
+
+    def kc_generic(self, ndvi):
+        """Generic crop coefficient based on linear function of NDVI
+
+        Parameters
+        ----------
+        ndvi : ndarray
+            Normalized difference vegetation index.
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return np.maximum(ndvi * 1.25 + 0.2, 0)
+
+    def kc_row_crop(self, fc):
+        """Generic crop coefficient for annual row crops (class 1)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return ((fc ** 2) * -0.4771) + (1.4047 * fc) + 0.15
+
+    def kc_tree(self, fc):
+        """General crop coefficient for tree crops (class 3)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return fc * 1.48 + 0.007
+
+    def kc_rice(self, fc, ndvi):
+        """Crop coefficient for rice crops (class 5)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+        ndvi : ndarray
+            Normalized difference vegetation index
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return _where(self.kc_row_crop(fc), ndvi <= 0.14, 1.05)
+
+    def kc_fallow(self, fc, ndvi):
+        """Crop coefficient for fallow crops (class 6)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+        ndvi : ndarray
+            Normalized difference vegetation index
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return np.maximum(_where(self.kc_row_crop(fc), ndvi <= 0.35, fc), 0.01)
+
+    def kc_grass_pasture(self, fc, ndvi):
+        """Crop coefficient for grass/pasture crops (class 7)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+        ndvi : ndarray
+            Normalized difference vegetation index
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return np.maximum(_where(self.kc_row_crop(fc), ndvi <= 0.35, fc), 0.01)
+
+    def _kcb(self, kd, kc_min=0.15):
+        """Basal crop coefficient (Kcb)
+
+        Parameters
+        ----------
+        kd : ndarray
+            Crop density coefficient
+        kc_min : float, optional
+
+        Returns
+        -------
+        ndarray
+
+        """
+        # Reduction factor for adjusting Kcb of tree crops
+        fr = np.minimum(
+            np.maximum(
+                (self.ls_start - self.doy) * (self.fr_mid - self.fr_end)
+                / (self.ls_stop - self.ls_start) + self.fr_mid,
+                self.fr_end
+            ),
+            self.fr_mid
+        )
+
+        # Kcb during peak plant growth (near full cover)
+        kcb_full = np.minimum(self.h_max * 0.1 + 1, 1.2) * fr
+
+        return kd * (kcb_full - kc_min) + kc_min
+
+    def _kd_row_crop(self, fc):
+        """Density coefficient for annual row crops (class 1)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+
+        Returns
+        -------
+        ndarray
+
+        """
+        # First calculation is the fc / 0.7 <= 1 case
+        kd = _where(
+            np.minimum(fc * self.m_l, fc ** ((fc / 0.7 * self.h_max + 1) ** -1)),
+            fc / 0.7 > 1,
+            np.minimum(fc * self.m_l, fc ** ((self.h_max + 1) ** -1)),
+        )
+        return np.minimum(kd, 1)
+
+    def _kd_vine(self, fc):
+        """Crop coefficient for vine crops (class 2)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return np.minimum(np.minimum(fc * 1.5, fc ** (1 / (1 + 2))), 1)
+
+    def _kd_tree(self, fc):
+        """Density coefficient for tree crops (class 3)
+
+        Parameters
+        ----------
+        fc : ndarray
+            Fraction of cover
+
+        Returns
+        -------
+        ndarray
+
+        """
+        # First calculation is the fc > 0.5 case
+        kd = _where(
+            np.minimum(fc * self.m_l, fc ** ((self.h_max + 1) ** -1)),
+            fc <= 0.5,
+            np.minimum(fc * self.m_l, fc ** (self.h_max ** -1)),
+        )
+        return np.minimum(kd, 1)
+
+
+# Number of crop type values in the dense lookup tables (CDL values are 0-255)
+LOOKUP_SIZE = 256
+
+# Crop data parameters used by the Kc functions
+KC_PARAMS = ['crop_class', 'h_max', 'm_l', 'fr_mid', 'fr_end', 'ls_start', 'ls_stop']
+
+# Default number of NDVI values (from -1 to 1) in the Kc lookup table
+KC_LUT_BINS = 201
+
+# Kc lookup table bins where linear interpolation differs from the Kc
+#   functions by more than this at the bin center are computed exactly
+KC_LUT_TOLERANCE = 0.001
+
+# Maximum absolute Kc lookup table error
+# The error at the bin center is at most KC_LUT_TOLERANCE and the error
+#   anywhere in a bin is at most twice the center error (a kink in the Kc
+#   functions close to the bin edge), plus the float32 table rounding
+KC_LUT_MAX_ERROR = 2 * KC_LUT_TOLERANCE
+
+
+def crop_data_array(param_name, crop_type, crop_data, default_value=None):
+    """Build an array of crop type data for one parameter
+
+    Parameters
+    ----------
+    param_name : str
+    crop_type : array_like
+    crop_data : dict
+        Imported from data.py
+    default_value : float, optional
+        The default value to replace values that weren't matched in the lookup.
+        If default_value is not set or is None, unmatched values are set to NaN.
+
+    Returns
+    -------
+    ndarray
+
+    Notes
+    -----
+    Values are rounded to the data.py int_scalar precision so that the output
+    matches the crop_data_image() remap exactly.
+
+    """
+    fill_value = np.nan if default_value is None else float(default_value)
+
+    lookup = np.full(LOOKUP_SIZE + 2, fill_value)
+    lookup[-1] = np.nan
+    for c_type, c_data in crop_data.items():
+        if param_name in c_data.keys():
+            lookup[c_type] = round(c_data[param_name] * data.int_scalar) / data.int_scalar
+
+    return lookup[crop_type_index(crop_type)]
+
+
+@lru_cache()
+def crop_data_lookup(crop_type_remap):
+    """Build the dense crop data lookup table for a crop type remap
+
+    The table is only built once per crop type remap and is then shared
+    (read only) by all ArrayModel instances.
+
+    Parameters
+    ----------
+    crop_type_remap : {'CDL'}
+
+    Returns
+    -------
+    tuple of the parameter name list and the lookup table
+        The table has one row per parameter and is indexed by
+        crop_type_index(), so the columns are the crop type values followed by
+        the default values for unmatched crop types and NaN for masked crop types.
+
+    """
+    crop_types, row_index, param_names, rows = model.crop_data_table(crop_type_remap)
+    if max(crop_types) >= LOOKUP_SIZE:
+        raise ValueError(f'crop type values must be less than {LOOKUP_SIZE}')
+
+    table = np.array(rows, dtype=np.float64)
+    table[table == model.CROP_DATA_NODATA] = np.nan
+
+    # Start with all columns set to the default row
+    lookup = np.repeat(table[-1:, :], LOOKUP_SIZE + 2, axis=0)
+    lookup[list(crop_types), :] = table[list(row_index), :]
+    lookup[-1, :] = np.nan
+
+    lookup = np.ascontiguousarray(lookup.T)
+    lookup.setflags(write=False)
+
+    return param_names, lookup
+
+
+@lru_cache(maxsize=8)
+def kc_lookup_table(
+        crop_type_remap='CDL',
+        reflectance_type='SR',
+        bins=KC_LUT_BINS,
+        crop_type_kc_flag=False,
+        crop_type_annual_skip_flag=False,
+        mask_non_ag_flag=True,
+        water_kc_flag=True,
+        ):
+    """Build the Kc lookup table for a crop type remap and flag set
+
+    For a given crop type remap and set of flags, Kc only depends on the crop
+    data parameters, the day of year (through the Kcb reduction factor), and
+    NDVI.  The table is computed with the ArrayModel Kc functions for each
+    unique set of crop data parameters (crop types with the same parameters
+    share a row), every day of year, and "bins" evenly spaced NDVI values
+    from -1 to 1, and is then cached.
+
+    Parameters
+    ----------
+    crop_type_remap : {'CDL'}, optional
+    reflectance_type : {'SR', 'TOA'}, optional
+    bins : int, optional
+        Number of NDVI values (the default is KC_LUT_BINS, a step of 0.01).
+    crop_type_kc_flag, crop_type_annual_skip_flag : bool, optional
+    mask_non_ag_flag, water_kc_flag : bool, optional
+        See ArrayModel.
+
+    Returns
+    -------
+    tuple of ndarray (column_rows, table, exact_bins)
+        The table row for each crop data lookup column (see
+        crop_type_index()), the float32 Kc table with shape (rows, 366, bins),
+        and a boolean array with shape (rows, 366, bins - 1) of the NDVI bins
+        that span a break in the Kc functions (i.e. the rice, fallow, and
+        water NDVI thresholds) and must be computed exactly.
+
+    Raises
+    ------
+    ValueError if bins is less than 2
+
+    Notes
+    -----
+    The interpolation error in the other bins is at most KC_LUT_TOLERANCE at
+    the bin centers, so the maximum absolute error is KC_LUT_MAX_ERROR.  With
+    fewer bins, more of the bins are computed exactly instead.
+
+    """
+    if bins < 2:
+        raise ValueError('bins must be at least 2')
+
+    param_names, lookup = crop_data_lookup(crop_type_remap)
+    params = lookup[[param_names.index(p) for p in KC_PARAMS]]
+    unique_params, column_index, column_rows = np.unique(
+        np.nan_to_num(params.T, nan=-9999), axis=0, return_index=True, return_inverse=True)
+
+    # Crop type value for each unique row
+    crop_type = column_index.astype(np.float64)
+    crop_type[column_index == LOOKUP_SIZE + 1] = np.nan
+
+    model_args = {
+        'crop_type_remap': crop_type_remap,
+        'crop_type_kc_flag': crop_type_kc_flag,
+        'crop_type_annual_skip_flag': crop_type_annual_skip_flag,
+        'mask_non_ag_flag': mask_non_ag_flag,
+        'water_kc_flag': water_kc_flag,
+        'reflectance_type': reflectance_type,
+    }
+    doy = np.arange(1, 367).reshape((1, 366, 1))
+    ndvi = np.linspace(-1, 1, bins)
+    table = ArrayModel(crop_type=crop_type[:, None, None], doy=doy, **model_args).kc(ndvi)
+
+    # Check the linear interpolation at the bin centers
+    center_kc = ArrayModel(crop_type=crop_type[:, None, None], doy=doy, **model_args).kc(
+        (ndvi[:-1] + ndvi[1:]) / 2)
+    with np.errstate(invalid='ignore'):
+        error = np.abs((table[..., :-1] + table[..., 1:]) / 2 - center_kc)
+    break_bins = ~(error <= KC_LUT_TOLERANCE)
+    # Bins with only masked values don't need to be computed
+    break_bins &= ~(np.isnan(center_kc) & np.isnan(table[..., :-1]) & np.isnan(table[..., 1:]))
+    # A break at an NDVI value in the table is only detected on one side
+    exact_bins = break_bins.copy()
+    exact_bins[..., 1:] |= break_bins[..., :-1]
+    exact_bins[..., :-1] |= break_bins[..., 1:]
+
+    table = table.astype(np.float32)
+    for array in [column_rows, table, exact_bins]:
+        array.setflags(write=False)
+    return column_rows.reshape(-1), table, exact_bins
+
+
+def crop_type_index(crop_type):
+    """Column index into the dense crop data lookup tables
+
+    Parameters
+    ----------
+    crop_type : array_like
+
+    Returns
+    -------
+    ndarray
+        Crop type values in the range [0, LOOKUP_SIZE) are returned as is,
+        other values are set to LOOKUP_SIZE (the default column) and
+        NaN (nodata) values are set to LOOKUP_SIZE + 1 (the masked column).
+
+    """
+    crop_type = np.asarray(crop_type)
+    if np.issubdtype(crop_type.dtype, np.integer):
+        index = crop_type.astype(np.intp)
+        return np.where((index >= 0) & (index < LOOKUP_SIZE), index, LOOKUP_SIZE)
+
+    crop_type = crop_type.astype(np.float64)
+    index = np.where((crop_type >= 0) & (crop_type < LOOKUP_SIZE), crop_type, LOOKUP_SIZE)
+    index = np.where(np.isnan(crop_type), LOOKUP_SIZE + 1, index)
+    return index.astype(np.intp)
+
+
+def _flatten(values, shape):
+    """Broadcast an array to the pixel array shape and flatten it"""
+    values = np.asarray(values)
+    if values.shape != shape:
+        values = np.broadcast_to(values, shape)
+    return values.reshape(-1)
+
+
+def _where(input_array, test, value):
+    """Array equivalent of ee.Image.where()
+
+    If the test or value is masked (NaN) the input value is kept and
+    masked input values are never replaced.
+
+    """
+    return np.where(test & ~np.isnan(value) & ~np.isnan(input_array), value, input_array)
@@ -0,0 +1,267 @@
+import mmap
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import et_reference
+from .array_image import ArrayImage, block_windows, landsat_scene_properties
+
+# Output dtypes (all other variables are float32)
+variable_dtypes = {'mask': np.uint8, 'time': np.float64}
+
+# Per process tile inputs (set once per worker by _init_worker)
+_worker_state = {}
+
+
+def run_scene(
+        source,
+        output_path,
+        crop_type,
+        variables=('et', 'et_fraction', 'ndvi', 'fc', 'kc'),
+        et_reference_source=None,
+        cloudmask_args={},
+        properties=None,
+        block_size=1024,
+        processes=None,
+        shared_path=None,
+        **kwargs
+):
+    """Compute a whole Landsat scene in tiles on a process pool
+
+    The scene is split into square blocks that are computed independently
+    with ArrayImage.from_landsat_c2_sr() in worker processes.  The read-only
+    full scene inputs (crop type and reference ET arrays, and the band arrays
+    of a dictionary source) are shared with the workers as memory mapped
+    .npy files (on /dev/shm if available) instead of being pickled, GeoTIFF
+    and Zarr sources are read per block by the workers, and each block of
+    output is written directly into a preallocated memory mapped .npy file
+    for each variable.  Only the block windows are sent to the workers.
+
+    If the cloud mask filter or buffer flags are set, each block is computed
+    with a halo of extra pixels so that the output does not depend on the
+    block size.
+
+    Parameters
+    ----------
+    source : str, dict
+        Landsat scene source (see ArrayImage.from_landsat_c2_sr()).
+    output_path : str
+        Output folder, one "<variable>.npy" file is written per variable.
+    crop_type : array_like, int
+        Full scene crop type array or a scalar crop type.
+    variables : list, optional
+        Output variables (see ArrayImage.calculate()).
+    et_reference_source : float, array_like, et_reference.ArraySource, optional
+        Reference ET number, full scene array for the scene date, or local
+        reference ET cube.
+    cloudmask_args : dict, optional
+        Keyword arguments to pass through to the cloud mask function.
+    properties : dict, optional
+        Image properties (SPACECRAFT_ID and DATE_ACQUIRED must be set for
+        a dictionary source).
+    block_size : int, optional
+        Block size in pixels (the default is 1024).
+    processes : int, optional
+        Number of worker processes (the default is the number of CPUs).
+        If 1, the blocks are computed in the calling process.  The workers
+        are started with the "forkserver" method (where available), so the
+        calling script must use an ``if __name__ == '__main__':`` guard.
+    shared_path : str, optional
+        Folder for the shared input files (the default is a temporary folder
+        on /dev/shm if available).  The files are removed when done.
+    kwargs : dict
+        Keyword arguments to pass through to ArrayImage init
+        (i.e. crop_type_kc_flag, et_reference_factor).
+
+    Returns
+    -------
+    dict
+        Variable name keys and read-only memory mapped output array values.
+
+    Raises
+    ------
+    ValueError
+
+    """
+    variables = list(variables)
+    properties = {} if properties is None else dict(properties)
+    if isinstance(source, (str, os.PathLike)):
+        source = str(source)
+        properties = {**landsat_scene_properties(os.path.basename(source)), **properties}
+    if 'DATE_ACQUIRED' not in properties.keys():
+        raise ValueError('DATE_ACQUIRED property must be set')
+    height, width = _source_shape(source)
+
+    if shared_path is None:
+        shared_path = tempfile.mkdtemp(
+            prefix='sims_tiles_', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+        remove_shared_flag = True
+    else:
+        os.makedirs(shared_path, exist_ok=True)
+        remove_shared_flag = False
+
+    try:
+        # Preallocate the outputs before starting the workers
+        os.makedirs(output_path, exist_ok=True)
+        output_files = {}
+        for variable in variables:
+            output_files[variable] = os.path.join(output_path, f'{variable}.npy')
+            np.lib.format.open_memmap(
+                output_files[variable], mode='w+', shape=(height, width),
+                dtype=variable_dtypes.get(variable, np.float32),
+            )
+
+        if isinstance(source, dict):
+            source = {
+                band: _share_array(array, shared_path, f'source_{band}')
+                for band, array in source.items()
+            }
+        if isinstance(et_reference_source, et_reference.ArraySource):
+            day = int(
+                (np.datetime64(properties['DATE_ACQUIRED'][:10], 'D') -
+                 et_reference_source.start_date).astype(int)
+            )
+            if day < 0 or day >= et_reference_source.data.shape[0]:
+                raise ValueError(f'date {properties["DATE_ACQUIRED"]} is not in the '
+                                 f'reference ET source')
+            et_reference_source = ('npy', et_reference_source.path, day)
+
+        state = {
+            'source': source,
+            'crop_type': _share_array(crop_type, shared_path, 'crop_type'),
+            'et_reference_source': _share_array(
+                et_reference_source, shared_path, 'et_reference'),
+            'output_files': output_files,
+            'variables': variables,
+            'cloudmask_args': dict(cloudmask_args),
+            'properties': properties,
+            'shape': (height, width),
+            'halo': _halo(cloudmask_args),
+            'kwargs': kwargs,
+        }
+
+        windows = list(block_windows(height, width, block_size))
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = max(1, min(processes, len(windows)))
+        if processes == 1:
+            _init_worker(state)
+            try:
+                for window in windows:
+                    _run_tile(window)
+            finally:
+                _worker_state.clear()
+        else:
+            # The workers are started from a fork server instead of forking the
+            #   calling process, since forking a process with running thread
+            #   pools (i.e. the Numba kernel threads) can deadlock
+            context = multiprocessing.get_context(
+                'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                else None)
+            with context.Pool(
+                    processes, initializer=_init_worker, initargs=(state,)) as pool:
+                for _ in pool.imap_unordered(_run_tile, windows, chunksize=1):
+                    pass
+    finally:
+        if remove_shared_flag:
+            shutil.rmtree(shared_path, ignore_errors=True)
+
+    return {v: np.load(output_files[v], mmap_mode='r') for v in variables}
+
+
+def _halo(cloudmask_args):
+    """Number of extra pixels needed by the cloud mask morphology"""
+    halo = 0
+    if cloudmask_args.get('filter_flag', False):
+        halo += 1
+    if cloudmask_args.get('buffer_flag', False):
+        halo += int(cloudmask_args.get('buffer_pixels', 10))
+    return halo
+
+
+def _source_shape(source):
+    if isinstance(source, dict):
+        return tuple(np.shape(source['QA_PIXEL']))
+    try:
+        import rasterio
+    except ImportError:
+        raise ImportError('rasterio is required to read GeoTIFF files')
+    with rasterio.open(f'{source}_QA_PIXEL.TIF') as src:
+        return src.height, src.width
+
+
+def _share_array(value, shared_path, name):
+    """Descriptor for sharing a read-only array with the worker processes
+
+    NumPy arrays are written to a .npy file (memory maps of a whole .npy file
+    are used directly) and opened as memory maps by the workers.  Numbers,
+    None, and other array types (i.e. Zarr arrays) are returned unchanged.
+
+    """
+    if not isinstance(value, np.ndarray) or value.ndim == 0:
+        return value
+    if (isinstance(value, np.memmap) and isinstance(value.base, mmap.mmap) and
+            value.filename and str(value.filename).endswith('.npy')):
+        return ('npy', str(value.filename), None)
+    file_path = os.path.join(shared_path, f'{name}.npy')
+    np.save(file_path, value)
+    return ('npy', file_path, None)
+
+
+def _open_shared(value):
+    if isinstance(value, tuple) and len(value) == 3 and value[0] == 'npy':
+        array = np.load(value[1], mmap_mode='r')
+        return array if value[2] is None else array[value[2]]
+    return value
+
+
+def _init_worker(state):
+    """Open the shared inputs and outputs once per process"""
+    _worker_state.clear()
+    _worker_state.update(state)
+    source = state['source']
+    if isinstance(source, dict):
+        source = {band: _open_shared(array) for band, array in source.items()}
+    _worker_state['source'] = source
+    _worker_state['crop_type'] = _open_shared(state['crop_type'])
+    _worker_state['et_reference_source'] = _open_shared(state['et_reference_source'])
+    _worker_state['outputs'] = {
+        v: np.load(file_path, mmap_mode='r+') for v, file_path in state['output_files'].items()
+    }
+
+
+def _run_tile(window):
+    """Compute one block and write it to the output memory maps"""
+    state = _worker_state
+    height, width = state['shape']
+    halo = state['halo']
+    rows, cols = window
+    read_window = (
+        slice(max(0, rows.start - halo), min(height, rows.stop + halo)),
+        slice(max(0, cols.start - halo), min(width, cols.stop + halo)),
+    )
+    crop = (
+        slice(rows.start - read_window[0].start, rows.stop - read_window[0].start),
+        slice(cols.start - read_window[1].start, cols.stop - read_window[1].start),
+    )
+
+    image_kwargs = dict(state['kwargs'])
+    for name in ['crop_type', 'et_reference_source']:
+        value = state[name]
+        if isinstance(value, np.ndarray) and value.ndim == 2:
+            value = np.asarray(value[read_window])
+        image_kwargs[name] = value
+
+    image = ArrayImage.from_landsat_c2_sr(
+        state['source'], cloudmask_args=state['cloudmask_args'], window=read_window,
+        properties=state['properties'], **image_kwargs,
+    )
+    output = image.calculate(state['variables'])
+    for variable, array in output.items():
+        state['outputs'][variable][window] = np.broadcast_to(
+            array, (read_window[0].stop - read_window[0].start,
+                    read_window[1].stop - read_window[1].start))[crop]
+    return window
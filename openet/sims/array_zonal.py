@@ -0,0 +1,114 @@
+import numpy as np
+
+
+def rasterize_features(features, shape, transform, all_touched=False):
+    """Rasterize the zone polygons once to a label image
+
+    Parameters
+    ----------
+    features : list
+        GeoJSON like geometries or features (in the raster coordinate system).
+    shape : tuple
+        Output (rows, columns).
+    transform : affine.Affine
+        Raster geotransform.
+    all_touched : bool, optional
+        If True, all pixels touched by a polygon are labeled, otherwise only
+        the pixels with centers inside the polygon (the default is False).
+
+    Returns
+    -------
+    ndarray
+        int32 label image, the label of each feature is its list index plus
+        one and 0 is outside of all of the features.  Where the features
+        overlap, the later feature is used.
+
+    Notes
+    -----
+    This function requires the rasterio package.
+
+    """
+    # rasterio is only needed for building the label image
+    from rasterio import features as rio_features
+
+    shapes = []
+    for i, feature in enumerate(features):
+        geometry = feature.get('geometry', feature) if isinstance(feature, dict) else feature
+        shapes.append((geometry, i + 1))
+    if not shapes:
+        return np.zeros(shape, dtype=np.int32)
+    return rio_features.rasterize(
+        shapes, out_shape=shape, transform=transform, fill=0,
+        all_touched=all_touched, dtype='int32',
+    )
+
+
+def zonal_stats(values, labels, n_labels=None, reducer='mean'):
+    """Compute grouped statistics of the pixels in each label
+
+    The statistics are computed for all labels (and all time steps) at once
+    with np.bincount grouped sums, so the cost does not depend on the number
+    of zones.  NaN pixels are skipped.
+
+    Parameters
+    ----------
+    values : array_like
+        Values with shape (rows, columns) or (time steps, rows, columns).
+    labels : array_like
+        Integer label image with shape (rows, columns), see
+        rasterize_features().  Pixels with label 0 are not in any zone.
+    n_labels : int, optional
+        Number of zones (the default is the maximum label).
+    reducer : {'mean', 'sum', 'count'}, optional
+        Zonal statistic (the default is 'mean').
+
+    Returns
+    -------
+    ndarray
+        Statistics with shape (n_labels,) or (time steps, n_labels), the
+        first column is the zone with label 1.  The mean of a zone without
+        any valid pixels is NaN.
+
+    Raises
+    ------
+    ValueError for an unsupported reducer or mismatched shapes.
+
+    """
+    if reducer.lower() not in ['mean', 'sum', 'count']:
+        raise ValueError(f'unsupported reducer: {reducer}')
+
+    values = np.asarray(values, dtype=np.float64)
+    labels = np.asarray(labels)
+    single_flag = values.ndim == labels.ndim
+    if single_flag:
+        values = values[np.newaxis]
+    if values.shape[1:] != labels.shape:
+        raise ValueError('values and labels shapes do not match')
+    if n_labels is None:
+        n_labels = int(labels.max()) if labels.size else 0
+
+    # Offset the labels of each time step so that all of the time steps are
+    #   reduced with a single bincount call
+    steps = values.shape[0]
+    bins = n_labels + 1
+    group = (
+        np.where((labels >= 0) & (labels <= n_labels), labels, 0).ravel()[np.newaxis, :] +
+        bins * np.arange(steps)[:, np.newaxis]
+    ).ravel()
+    flat_values = values.reshape(steps, -1).ravel()
+    valid = ~np.isnan(flat_values)
+
+    counts = np.bincount(group[valid], minlength=steps * bins).reshape(steps, bins)[:, 1:]
+    if reducer.lower() == 'count':
+        output = counts.astype(np.int64)
+    else:
+        sums = np.bincount(
+            group[valid], weights=flat_values[valid], minlength=steps * bins
+        ).reshape(steps, bins)[:, 1:]
+        if reducer.lower() == 'sum':
+            output = sums
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                output = np.where(counts > 0, sums / counts, np.nan)
+
+    return output[0] if single_flag else output
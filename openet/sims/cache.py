@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+class DiskCache():
+    """Persistent, content addressed cache of getInfo results
+
+    The results are stored as JSON files named by the SHA-256 hash of the
+    serialized Earth Engine expression, so identical requests made in any
+    process share the same cache entry.  The file modification times are
+    updated when an entry is read and the least recently used entries are
+    removed when the total cache size exceeds max_size.
+
+    The total size is tracked as entries are written, so the cache folder is
+    only scanned when the size first exceeds max_size.  The oldest entries are
+    then removed until the size is below low_water * max_size, which leaves
+    room for the following writes before the next scan.
+
+    """
+
+    def __init__(self, path, max_size=512 * 1024 ** 2, ttl=None, low_water=0.9):
+        """
+
+        Parameters
+        ----------
+        path : str
+            Cache folder (it will be created if it does not exist).
+        max_size : int, optional
+            Maximum total size of the cache files in bytes
+            (the default is 512 MiB).
+        ttl : float, optional
+            Default number of seconds that an entry is valid.  If not set
+            (the default), entries do not expire.
+        low_water : float, optional
+            Fraction of max_size that the cache is reduced to when entries
+            are evicted (the default is 0.9).
+
+        """
+        if not 0 < low_water <= 1:
+            raise ValueError('low_water must be greater than 0 and at most 1')
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.low_water = low_water
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        # The counters and the size are updated from the request threads
+        self._lock = threading.Lock()
+        # The total size is not known until the cache folder is scanned
+        self._size = None
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def key(ee_obj):
+        """Hash of the serialized (cloud API) expression of an Earth Engine object"""
+        return hashlib.sha256(ee_obj.serialize().encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached value for a key
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        tuple (hit, value)
+            The hit flag is False (and value is None) if the key is not in
+            the cache or the entry has expired.
+
+        """
+        file_path = self._file_path(key)
+        try:
+            with open(file_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return False, None
+
+        if entry['expires'] is not None and entry['expires'] < time.time():
+            self._remove(file_path)
+            self._count('misses')
+            return False, None
+
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        self._count('hits')
+        return True, entry['value']
+
+    def set(self, key, value, ttl=None):
+        """Write a value to the cache
+
+        Parameters
+        ----------
+        key : str
+        value : JSON serializable object
+        ttl : float, optional
+            Number of seconds that the entry is valid (the default is the
+            cache ttl).
+
+        """
+        if ttl is None:
+            ttl = self.ttl
+        entry = {
+            'created': time.time(),
+            'expires': time.time() + ttl if ttl is not None else None,
+            'value': value,
+        }
+
+        # Write to a temporary file and rename it so that other processes
+        #   never read a partially written entry
+        file_path = self._file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        try:
+            prev_size = os.path.getsize(file_path)
+        except OSError:
+            prev_size = 0
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, file_path)
+        except Exception:
+            self._remove(temp_path)
+            raise
+
+        with self._lock:
+            self.writes += 1
+            if self._size is not None:
+                self._size += size - prev_size
+            evict_flag = self._size is None or self._size > self.max_size
+        if evict_flag:
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries if the cache exceeds max_size
+
+        The cache folder is scanned (entries written by other processes are
+        included) and the oldest entries are removed until the total size is
+        below low_water * max_size.
+
+        """
+        entries = []
+        for root, dirs, files in os.walk(self.path):
+            for file_name in files:
+                if not file_name.endswith('.json'):
+                    continue
+                file_path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file_path))
+
+        total_size = sum(size for mtime, size, file_path in entries)
+        evictions = 0
+        if total_size > self.max_size:
+            for mtime, size, file_path in sorted(entries):
+                if total_size <= self.low_water * self.max_size:
+                    break
+                self._remove(file_path)
+                total_size -= size
+                evictions += 1
+
+        with self._lock:
+            self._size = total_size
+            self.evictions += evictions
+
+    def clear(self):
+        """Remove all of the cache entries"""
+        for root, dirs, files in os.walk(self.path):
+            for file_name in files:
+                if file_name.endswith('.json'):
+                    self._remove(os.path.join(root, file_name))
+        with self._lock:
+            self._size = 0
+
+    def stats(self):
+        """Return the hit, miss, write, and eviction counts for this process"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+            }
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _file_path(self, key):
+        return os.path.join(self.path, key[:2], f'{key}.json')
+
+    @staticmethod
+    def _remove(file_path):
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            logging.debug(f'Cache file could not be removed: {e}')
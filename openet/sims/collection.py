@@ -9,9 +9,16 @@ import openet.core.interpolate
 # TODO: import utils from openet.core
 # import openet.core.utils as utils
 
+from . import et_reference
+from . import incremental
+from . import interpolate
 from . import utils
 from .image import Image
 
+# Number of seconds that the cached scene lists are valid (if the
+#   utils.getinfo() cache is enabled) since new scenes are added daily
+scene_list_cache_ttl = 6 * 3600
+
 
 def lazy_property(fn):
     """Decorator that makes a property lazy-evaluated
@@ -355,6 +362,7 @@ class Collection():
             interp_method='linear',
             interp_days=32,
             use_joins=True,
+            use_groups=False,
             **kwargs
             ):
         """
@@ -378,6 +386,11 @@ class Collection():
             If True, use joins to link the target and source collections.
             If False, the source collection will be filtered for each target image.
             This parameter is passed through to interpolate.daily().
+        use_groups : bool, optional
+            If True, the daily images are grouped to the monthly or annual
+            periods with a single join (see interpolate.period_groups())
+            instead of filtering the daily collection for each period.
+            The default is False.
         kwargs : dict, optional
 
         Returns
@@ -471,9 +484,13 @@ class Collection():
         if type(self.model_args['et_reference_source']) is str:
             # Assume a string source is a single image collection ID
             #   not a list of collection IDs or ee.ImageCollection
+            # The daily images are resolved through the shared reference ET index
             daily_et_ref_coll = (
-                ee.ImageCollection(self.model_args['et_reference_source'])
-                .filterDate(start_date, end_date)
+                et_reference.ee_collection(
+                    self.model_args['et_reference_source'],
+                    self.model_args['et_reference_band'],
+                    start_date, end_date,
+                )
                 .select([self.model_args['et_reference_band']], ['et_reference'])
             )
         # elif isinstance(self.model_args['et_reference_source'], computedobject.ComputedObject):
@@ -593,7 +610,7 @@ class Collection():
         }
         interp_properties.update(self.model_args)
 
-        def aggregate_image(agg_start_date, agg_end_date, date_format):
+        def aggregate_image(agg_start_date, agg_end_date, date_format, period_colls=None):
             """Aggregate the daily images within the target date range
 
             Parameters
@@ -604,6 +621,10 @@ class Collection():
                 End date (exclusive).
             date_format : str
                 Date format for system:index (uses EE JODA format).
+            period_colls : dict, optional
+                Daily and count collections that were already grouped to the
+                target period (see interpolate.period_groups()).  If not set,
+                the collections are filtered to the target date range.
 
             Returns
             -------
@@ -615,19 +636,19 @@ class Collection():
             for each time interval by separate mappable functions
 
             """
+            if period_colls is None:
+                period_colls = {'daily': daily_coll.filterDate(agg_start_date, agg_end_date)}
+                if 'count' in variables:
+                    period_colls['count'] = aggregate_coll.filterDate(
+                        agg_start_date, agg_end_date)
+
             # et_img = None
             # et_reference_img = None
             if ('et' in variables) or ('et_fraction') in variables:
-                et_img = (
-                    daily_coll.filterDate(agg_start_date, agg_end_date)
-                    .select(['et']).sum()
-                )
+                et_img = period_colls['daily'].select(['et']).sum()
 
             if ('et_reference' in variables) or ('et_fraction' in variables):
-                et_reference_img = (
-                    daily_coll.filterDate(agg_start_date, agg_end_date)
-                    .select(['et_reference']).sum()
-                )
+                et_reference_img = period_colls['daily'].select(['et_reference']).sum()
                 if (self.model_args['et_reference_resample'] and
                         (self.model_args['et_reference_resample'] in ['bilinear', 'bicubic'])):
                     et_reference_img = (
@@ -648,15 +669,11 @@ class Collection():
                 )
             if 'ndvi' in variables:
                 # Compute average ndvi over the aggregation period
-                ndvi_img = (
-                    daily_coll.filterDate(agg_start_date, agg_end_date)
-                    .mean().select(['ndvi']).float()
-                )
+                ndvi_img = period_colls['daily'].mean().select(['ndvi']).float()
                 image_list.append(ndvi_img)
             if 'count' in variables:
                 count_img = (
-                    aggregate_coll.filterDate(agg_start_date, agg_end_date)
-                    .select(['mask']).count().rename('count').uint8()
+                    period_colls['count'].select(['mask']).count().rename('count').uint8()
                 )
                 image_list.append(count_img)
 
@@ -669,6 +686,29 @@ class Collection():
                 })
             )
 
+        # Aggregate all of the periods from a single grouping of the daily images
+        if use_groups and t_interval.lower() in ['monthly', 'annual']:
+            group_colls = {'daily': daily_coll}
+            if 'count' in variables:
+                group_colls['count'] = aggregate_coll
+
+            def aggregate_group(period_ftr):
+                period_ftr = ee.Feature(period_ftr)
+                return aggregate_image(
+                    agg_start_date=ee.Date(period_ftr.get('system:time_start')),
+                    agg_end_date=None,
+                    date_format='YYYYMM' if t_interval.lower() == 'monthly' else 'YYYY',
+                    period_colls={
+                        k: ee.ImageCollection.fromImages(period_ftr.get(k))
+                        for k in group_colls.keys()
+                    },
+                )
+
+            return ee.ImageCollection(
+                interpolate.period_groups(group_colls, start_dt, end_dt, t_interval)
+                .map(aggregate_group)
+            )
+
         # Combine input, interpolated, and derived values
         if t_interval.lower() == 'daily':
             def aggregate_daily(daily_img):
@@ -728,6 +768,176 @@ class Collection():
                 date_format='YYYYMMdd',
             ))
 
+    def interpolate_update(
+            self,
+            scene_index=None,
+            variables=None,
+            t_interval='daily',
+            interp_days=32,
+            **kwargs
+            ):
+        """Interpolate only the outputs affected by scenes that changed
+
+        The scene IDs that can feed each day (the scenes within interp_days of
+        the day) are compared against the scene index from the previous run,
+        and the collection is only interpolated for the daily, monthly, or
+        annual periods that contain a changed day.
+
+        Parameters
+        ----------
+        scene_index : dict, optional
+            Scene index returned by the previous call (can be loaded from JSON).
+            If not set, all periods are interpolated.
+        variables : list, optional
+            List of variables that will be returned in the Image Collection.
+        t_interval : {'daily', 'monthly', 'annual'}, optional
+            Time interval over which to interpolate and aggregate values
+            (the default is 'daily').
+        interp_days : int, optional
+            Number of extra days before the start date and after the end date
+            to include in the interpolation calculation. (the default is 32).
+        kwargs : dict, optional
+            Keyword arguments to pass through to the interpolate() calls.
+
+        Returns
+        -------
+        tuple of (ee.ImageCollection, dict)
+            The interpolated images for the affected periods and the current
+            scene index (to save for the next call).
+
+        Raises
+        ------
+        ValueError for unsupported input parameters
+
+        Notes
+        -----
+        The scene IDs and times are retrieved with a single getInfo call.
+
+        """
+        if t_interval.lower() not in ['daily', 'monthly', 'annual']:
+            raise ValueError(f'unsupported t_interval: {t_interval}')
+        if type(interp_days) is str and utils.is_number(interp_days):
+            interp_days = int(interp_days)
+
+        # Track all of the days in the (expanded) output periods
+        start_dt = incremental.period_range(self.start_date, t_interval)[0]
+        end_dt = incremental.period_range(
+            datetime.datetime.strptime(self.end_date, '%Y-%m-%d').date() -
+            datetime.timedelta(days=1),
+            t_interval
+        )[1]
+
+        scene_coll = self._build(
+            variables=[],
+            start_date=(start_dt - datetime.timedelta(days=interp_days)).isoformat(),
+            end_date=(end_dt + datetime.timedelta(days=interp_days)).isoformat(),
+        )
+        # The scene list is never read from the cache so that scenes added
+        #   since the last request are always found
+        scene_info = utils.getinfo(ee.Dictionary({
+            'id': scene_coll.aggregate_array('system:id'),
+            'time': scene_coll.aggregate_array('system:time_start'),
+        }), cache_ttl=0)
+        if scene_info is None:
+            raise ValueError('scene IDs could not be retrieved')
+
+        current_index = incremental.scene_index(
+            zip(scene_info['id'], scene_info['time']),
+            start_dt.isoformat(), end_dt.isoformat(), interp_days=interp_days,
+        )
+        dates = incremental.changed_dates(scene_index or {}, current_index)
+
+        output_coll = ee.ImageCollection([])
+        for period_start, period_end in incremental.changed_periods(dates, t_interval):
+            period_coll_obj = copy.copy(self)
+            period_coll_obj.model_args = copy.deepcopy(self.model_args)
+            period_coll_obj.start_date = period_start
+            period_coll_obj.end_date = period_end
+            output_coll = output_coll.merge(period_coll_obj.interpolate(
+                variables=variables, t_interval=t_interval,
+                interp_days=interp_days, **kwargs
+            ))
+
+        return output_coll, current_index
+
+    def zonal_stats(
+            self,
+            features,
+            reducer='mean',
+            t_interval='monthly',
+            variables=None,
+            feature_id='system:index',
+            scale=30,
+            crs=None,
+            max_features=500,
+            max_area=None,
+            max_workers=8,
+            **kwargs
+            ):
+        """Compute the interpolated variable statistics for each feature
+
+        Parameters
+        ----------
+        features : ee.FeatureCollection, list
+            Feature collection or list of features with the zone polygons
+            (i.e. fields).
+        reducer : {'mean', 'sum', 'count', 'median', 'min', 'max'} or ee.Reducer
+            Single output reducer (the default is 'mean').
+        t_interval : {'daily', 'monthly', 'annual', 'custom'}, optional
+            Time interval over which to interpolate and aggregate values
+            (the default is 'monthly').
+        variables : list, optional
+            List of variables to reduce.  If variables is not set here it must
+            be specified in the class instantiation call.
+        feature_id : str, optional
+            Feature property to use as the zone ID (the default is
+            'system:index').
+        scale : float, optional
+            Nominal scale in meters (the default is 30).
+        crs : str, optional
+            Reduction projection.
+        max_features : int, optional
+            Maximum number of features in each request (the default is 500).
+        max_area : float, optional
+            Maximum total feature area in each request in square meters.
+            If not set (the default), the features are only batched by count.
+        max_workers : int, optional
+            Maximum number of concurrent requests (the default is 8).
+        kwargs : dict, optional
+            Additional interpolate() parameters (i.e. interp_days).
+
+        Returns
+        -------
+        numpy structured array
+            One row per feature and output image with the fields "feature_id",
+            "time", and one field per variable.
+
+        Raises
+        ------
+        ValueError
+
+        Notes
+        -----
+        This method requires NumPy.  See extract.zonal_stats() for details
+        on how the features are batched.
+
+        """
+        # NumPy is only needed for building the output table
+        from . import extract
+
+        if not variables:
+            if self.variables:
+                variables = self.variables
+            else:
+                raise ValueError('variables parameter must be set')
+
+        output_coll = self.interpolate(variables=variables, t_interval=t_interval, **kwargs)
+        return extract.zonal_stats(
+            output_coll, features, bands=variables, reducer=reducer,
+            feature_id=feature_id, scale=scale, crs=crs, max_features=max_features,
+            max_area=max_area, max_workers=max_workers,
+        )
+
     def get_image_ids(self):
         """Return image IDs of the input images
 
@@ -740,5 +950,8 @@ class Collection():
         """
         # CGM - Setting variables to None bypasses the Image class, so image_id
         #   is not set and merge indices must be removed from the system:index
-        return list(utils.getinfo(self._build(variables=[]).aggregate_array('system:id')))
+        return list(utils.getinfo(
+            self._build(variables=[]).aggregate_array('system:id'),
+            cache_ttl=scene_list_cache_ttl,
+        ))
         # return list(utils.getinfo(self._build(variables=['ndvi']).aggregate_array('image_id')))
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import ee
+
+# Server algorithm definitions saved with the recorded responses
+ALGORITHMS_FILE = 'algorithms.json'
+
+
+class ReplayMissingError(Exception):
+    """No response was recorded for a request in replay mode"""
+    pass
+
+
+class Recorder():
+    """Record and replay the Earth Engine compute requests
+
+    All of the getInfo calls (including the reduceRegion, getRegion, and
+    aggregate requests made by this package) are sent through
+    ee.data.computeValue(), which is replaced while the recorder is
+    installed.  Responses are stored as JSON files keyed by the SHA-256
+    hash of the serialized expression graph.
+
+    In "record" mode the requests are sent to Earth Engine and the responses
+    (and Earth Engine errors) are written to the fixture folder.  In "replay"
+    mode the responses are read from the fixture folder and no requests are
+    sent, so Earth Engine only needs to be initialized offline (see
+    offline_initialize()).
+
+    The expression graphs depend on the algorithm definitions, so the server
+    definitions should be saved with the responses when recording (see
+    save_algorithms()) and used to initialize Earth Engine when replaying.
+
+    """
+
+    def __init__(self, path, mode='replay'):
+        """
+
+        Parameters
+        ----------
+        path : str
+            Fixture folder.
+        mode : {'replay', 'record'}, optional
+            The default is 'replay'.
+
+        """
+        if mode not in ['replay', 'record']:
+            raise ValueError(f'unsupported mode: {mode}')
+        self.path = path
+        self.mode = mode
+        self.replayed = 0
+        self.recorded = 0
+        self.missing = 0
+        self._compute_value = None
+
+    @staticmethod
+    def key(ee_obj):
+        """Hash of the serialized (cloud API) expression graph"""
+        return hashlib.sha256(ee_obj.serialize().encode('utf-8')).hexdigest()
+
+    def compute_value(self, ee_obj):
+        """Replacement for ee.data.computeValue()"""
+        file_path = os.path.join(self.path, f'{self.key(ee_obj)}.json')
+        if self.mode == 'replay':
+            try:
+                with open(file_path) as f:
+                    response = json.load(f)
+            except FileNotFoundError:
+                self.missing += 1
+                raise ReplayMissingError(
+                    f'no recorded response for {os.path.basename(file_path)}, '
+                    f'rerun in record mode') from None
+            self.replayed += 1
+            if 'error' in response.keys():
+                raise ee.EEException(response['error'])
+            return response['result']
+
+        try:
+            result = self._compute_value(ee_obj)
+        except ee.EEException as e:
+            self._write(file_path, {'error': str(e)})
+            raise
+        self._write(file_path, {'result': result})
+        return result
+
+    def install(self):
+        """Replace ee.data.computeValue() with the recorder"""
+        if self._compute_value is None:
+            self._compute_value = ee.data.computeValue
+            ee.data.computeValue = self.compute_value
+        return self
+
+    def uninstall(self):
+        """Restore the original ee.data.computeValue()"""
+        if self._compute_value is not None:
+            ee.data.computeValue = self._compute_value
+            self._compute_value = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+
+    def _write(self, file_path, response):
+        _write_json(file_path, response)
+        self.recorded += 1
+        logging.debug(f'Recorded {os.path.basename(file_path)}')
+
+
+def save_algorithms(path):
+    """Save the server algorithm definitions to the fixture folder
+
+    Earth Engine must be initialized with credentials.  The definitions are
+    loaded by offline_initialize() so that the replayed expression graphs
+    (and their keys) are built the same as the recorded graphs.
+
+    Parameters
+    ----------
+    path : str
+        Fixture folder.
+
+    Returns
+    -------
+    str : algorithm definition file path
+
+    """
+    file_path = os.path.join(path, ALGORITHMS_FILE)
+    _write_json(file_path, ee.data.getAlgorithms())
+    return file_path
+
+
+def use_algorithms(file_path):
+    """Build the Earth Engine functions from saved algorithm definitions
+
+    This must be called before ee.Initialize().
+
+    """
+    with open(file_path) as f:
+        algorithms = json.load(f)
+    ee.data.getAlgorithms = lambda: algorithms
+
+
+def use_test_algorithms():
+    """Build the Earth Engine functions from the earthengine-api test definitions
+
+    The test definitions are not updated with the server definitions, so they
+    should only be used to build graphs that are not sent to the server or
+    matched with recorded responses (for example in the graph size
+    benchmarks).  This must be called before ee.Initialize().
+
+    """
+    from ee import apitestcase
+
+    ee.data.getAlgorithms = apitestcase.GetAlgorithms
+
+
+def offline_initialize(project='offline', algorithms_path=None):
+    """Initialize the earthengine-api without credentials or network requests
+
+    Earth Engine objects can be built and serialized, but nothing can be
+    computed unless a Recorder is installed in replay mode.
+
+    Parameters
+    ----------
+    project : str, optional
+    algorithms_path : str, optional
+        Saved algorithm definition file (see save_algorithms()).  If not set
+        or if the file does not exist, the earthengine-api test definitions
+        are used.
+
+    """
+    if algorithms_path is not None and os.path.isfile(algorithms_path):
+        use_algorithms(algorithms_path)
+    else:
+        if algorithms_path is not None:
+            logging.warning(f'Algorithm definitions not found: {algorithms_path}')
+        use_test_algorithms()
+    ee.data._install_cloud_api_resource = lambda: None
+    ee.Initialize(None, '', project=project)
+
+
+def _write_json(file_path, data):
+    """Write to a temporary file and rename it so partial files are never read"""
+    folder = os.path.dirname(file_path)
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, file_path)
@@ -0,0 +1,235 @@
+import collections
+import datetime
+import threading
+
+import ee
+
+# Maximum number of daily reference ET images kept in the index
+INDEX_SIZE = 4096
+
+
+class ReferenceIndex():
+    """Process-wide LRU index of daily reference ET images
+
+    Images are keyed by (source, band, date) so that the same reference ET day
+    is only resolved once, even when it is requested by many scene images.
+
+    """
+
+    def __init__(self, maxsize=INDEX_SIZE):
+        """Initialize the index
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of images in the index.  The least recently used
+            image is evicted when the index is full.
+
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be a positive integer')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._images = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._images)
+
+    def __contains__(self, key):
+        return key in self._images
+
+    def get(self, key, loader):
+        """Return the image for a key, calling the loader if it is not indexed
+
+        Parameters
+        ----------
+        key : tuple
+            (source, band, date) key.
+        loader : function
+            Function with no arguments that returns the image for the key.
+
+        """
+        with self._lock:
+            if key in self._images:
+                self.hits += 1
+                self._images.move_to_end(key)
+                return self._images[key]
+            self.misses += 1
+
+        image = loader()
+
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+        return image
+
+    def clear(self):
+        """Remove all images and reset the hit/miss counts"""
+        with self._lock:
+            self._images.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Return the index statistics as a dictionary"""
+        return {
+            'hits': self.hits, 'misses': self.misses,
+            'size': len(self._images), 'maxsize': self.maxsize,
+        }
+
+
+index = ReferenceIndex()
+
+
+def ee_image(source, band, date):
+    """Daily reference ET image
+
+    Parameters
+    ----------
+    source : str
+        Reference ET collection ID.
+    band : str
+        Reference ET band name.
+    date : str, datetime.date, ee.Date
+        Reference ET date (0 UTC).  Images for ISO format date strings and
+        datetimes are kept in the process-wide index.  The image for an
+        ee.Date can't be indexed since the date is only known server side.
+
+    Returns
+    -------
+    ee.Image
+
+    """
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        date = date.strftime('%Y-%m-%d')
+
+    if isinstance(date, str):
+        # The next day is computed client side to keep the graph small
+        next_date = (
+            datetime.datetime.strptime(date, '%Y-%m-%d') + datetime.timedelta(days=1)
+        ).strftime('%Y-%m-%d')
+        return index.get(
+            (source, band, date),
+            lambda: _ee_image(source, band, date, next_date)
+        )
+    else:
+        date = ee.Date(date)
+        return _ee_image(source, band, date, date.advance(1, 'day'))
+
+
+def ee_collection(source, band, start_date, end_date):
+    """Daily reference ET collection built from the indexed daily images
+
+    Each day is resolved through ee_image(), so the daily images are shared
+    with any other Image or interpolation in the process that requests the
+    same source, band, and day.  Days without a source image are dropped, the
+    same as filtering the source collection to the date range.
+
+    Parameters
+    ----------
+    source : str
+        Reference ET collection ID.
+    band : str
+        Reference ET band name.
+    start_date : str
+        ISO format start date (inclusive).
+    end_date : str
+        ISO format end date (exclusive).
+
+    Returns
+    -------
+    ee.ImageCollection
+
+    """
+    start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+    end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+    images = [
+        ee_image(source, band, (start_dt + datetime.timedelta(days=i)).strftime('%Y-%m-%d'))
+        for i in range((end_dt - start_dt).days)
+    ]
+    return ee.ImageCollection(ee.List(images).removeAll([None]))
+
+
+def _ee_image(source, band, start_date, end_date):
+    """Select the daily reference ET image by filtering the collection"""
+    # Selecting the band before filtering keeps the band selection as one
+    #   shared node in the graphs that are built from many days
+    return ee.Image(
+        ee.ImageCollection(source)
+        .select([band])
+        .filterDate(start_date, end_date)
+        .first()
+    )
+
+
+def array_image(source, date, band=None):
+    """Daily reference ET array from a local (memory mapped) reference ET cube
+
+    Parameters
+    ----------
+    source : ArraySource
+        Local reference ET cube.
+    date : str, datetime.date, np.datetime64
+        Reference ET date.
+    band : str, optional
+        Reference ET band name (only used as part of the index key).
+
+    Returns
+    -------
+    ndarray
+
+    """
+    import numpy as np
+    date = str(np.datetime64(date, 'D'))
+    return index.get((source.path, band, date), lambda: source.image(date))
+
+
+class ArraySource():
+    """Local daily reference ET cube stored as a NumPy .npy file
+
+    The cube is memory mapped so only the requested daily slices are read.
+
+    """
+
+    def __init__(self, path, start_date):
+        """Initialize the source
+
+        Parameters
+        ----------
+        path : str
+            Path to a .npy file with shape (days, rows, cols).
+        start_date : str
+            ISO format date of the first day in the cube.
+
+        """
+        import numpy as np
+        self.path = str(path)
+        self.start_date = np.datetime64(start_date, 'D')
+        self._data = None
+
+    @property
+    def data(self):
+        """Memory mapped reference ET cube"""
+        if self._data is None:
+            import numpy as np
+            self._data = np.load(self.path, mmap_mode='r')
+        return self._data
+
+    def image(self, date):
+        """Daily reference ET slice
+
+        Raises
+        ------
+        ValueError
+            If the date is not in the cube.
+
+        """
+        import numpy as np
+        i = int((np.datetime64(date, 'D') - self.start_date).astype(int))
+        if i < 0 or i >= self.data.shape[0]:
+            raise ValueError(f'date {date} is not in the reference ET source {self.path}')
+        return self.data[i]
@@ -0,0 +1,358 @@
+import ee
+import numpy as np
+
+from . import request_pool
+from . import utils
+
+
+def point_coll_values(
+        coll,
+        points,
+        bands=None,
+        scale=30,
+        crs=None,
+        chunk_size=200,
+        nodata=-9999,
+        max_workers=8,
+        rate=10,
+        getinfo_fn=None,
+):
+    """Extract the image collection time series at many points
+
+    The points are split into chunks and the values for each chunk are
+    reduced server side (with reduceRegions) into one list per column, so
+    each chunk is a single request with a columnar response.  The chunk
+    requests are sent concurrently with request_pool.getinfo_many().
+
+    Parameters
+    ----------
+    coll : ee.ImageCollection
+        Images must have a "system:time_start" property.
+    points : dict, list
+        Dictionary of point ID keys and (longitude, latitude) values, or a
+        list of (longitude, latitude) tuples (the point IDs will be the list
+        indices).  Field centroids can be passed as points.
+    bands : list, optional
+        Band names to extract.  If not set, the band names of the first image
+        in the collection are retrieved (with an extra request).
+    scale : float, optional
+        Nominal scale in meters (the default is 30).
+    crs : str, optional
+        Reduction projection (the default is the image projection).
+    chunk_size : int, optional
+        Number of points in each request (the default is 200).  The response
+        size is roughly chunk_size * images * bands values.
+    nodata : float, optional
+        Value used to transfer the masked pixels (the default is -9999).
+        Values equal to nodata are returned as NaN.
+    max_workers : int, optional
+        Maximum number of concurrent requests (the default is 8).
+    rate : float, optional
+        Maximum number of requests per second (the default is 10).
+    getinfo_fn : callable, optional
+        Function that makes the request for one chunk (see getinfo_many()).
+
+    Returns
+    -------
+    numpy structured array
+        One row per point and image with the fields "point_id", "time"
+        (datetime64[ms]), and one float64 field per band, ordered by chunk.
+        Use pandas.DataFrame(output) to build a table.
+
+    Raises
+    ------
+    ValueError if chunk_size is not positive.
+    Exception of the first chunk request that failed.
+
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be a positive integer')
+
+    if isinstance(points, dict):
+        point_ids = np.asarray(list(points.keys()))
+        point_xy = [list(map(float, xy)) for xy in points.values()]
+    else:
+        point_xy = [list(map(float, xy)) for xy in points]
+        point_ids = np.arange(len(point_xy))
+
+    if bands is None:
+        bands = utils.getinfo(ee.Image(coll.first()).bandNames())
+        if bands is None:
+            raise ValueError('collection band names could not be retrieved')
+    bands = list(bands)
+
+    chunk_starts = list(range(0, len(point_xy), chunk_size))
+    chunk_objs = [
+        _chunk_columns(coll, point_xy[i:i + chunk_size], bands, scale, crs, nodata)
+        for i in chunk_starts
+    ]
+    results = request_pool.getinfo_many(
+        chunk_objs, max_workers=max_workers, rate=rate, getinfo_fn=getinfo_fn)
+
+    dtype = [('point_id', point_ids.dtype), ('time', 'datetime64[ms]')]
+    dtype.extend((band, np.float64) for band in bands)
+    chunk_arrays = []
+    for chunk_start, result in zip(chunk_starts, results):
+        if result.error is not None:
+            raise result.error
+        columns = result.value
+        chunk_array = np.empty(len(columns['index']), dtype=dtype)
+        chunk_array['point_id'] = point_ids[chunk_start + np.asarray(columns['index'], dtype=int)]
+        chunk_array['time'] = np.asarray(columns['time'], dtype=np.int64)
+        for band in bands:
+            values = np.asarray(columns[band], dtype=np.float64)
+            values[values == nodata] = np.nan
+            chunk_array[band] = values
+        chunk_arrays.append(chunk_array)
+
+    if not chunk_arrays:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(chunk_arrays)
+
+
+def _chunk_columns(coll, point_xy, bands, scale=30, crs=None, nodata=-9999):
+    """Build the columnar (dictionary of lists) values request for a chunk of points
+
+    The masked pixels are unmasked to the nodata value so that every point
+    and image has a value for every band and the columns stay aligned.
+
+    """
+    point_list = ee.List(point_xy)
+    point_coll = ee.FeatureCollection(
+        ee.List.sequence(0, len(point_xy) - 1).map(
+            lambda i: ee.Feature(ee.Geometry.Point(point_list.get(i)), {'index': i})
+        )
+    )
+    reducer = ee.Reducer.first().forEach(bands)
+
+    def image_values(image):
+        image = ee.Image(image)
+        time_start = image.get('system:time_start')
+        return (
+            image.select(bands).unmask(nodata)
+            .reduceRegions(collection=point_coll, reducer=reducer, scale=scale, crs=crs)
+            .map(lambda ftr: ftr.set({'time': time_start}))
+        )
+
+    values_coll = ee.FeatureCollection(coll.map(image_values)).flatten()
+    return ee.Dictionary.fromLists(
+        ['index', 'time'] + bands,
+        [values_coll.aggregate_array(p) for p in ['index', 'time'] + bands],
+    )
+
+
+def zonal_stats(
+        coll,
+        features,
+        bands,
+        reducer='mean',
+        feature_id='system:index',
+        scale=30,
+        crs=None,
+        max_features=500,
+        max_area=None,
+        nodata=-9999,
+        max_workers=8,
+        rate=10,
+        areas=None,
+        getinfo_fn=None,
+):
+    """Compute the zonal statistics of an image collection for many features
+
+    The features are split into batches by count and total area, the
+    statistics for each batch are reduced server side (with reduceRegions)
+    into one list per column, and the batches are requested concurrently
+    with request_pool.getinfo_many().  The batch results are merged into a
+    single table.
+
+    Parameters
+    ----------
+    coll : ee.ImageCollection
+        Images must have a "system:time_start" property.
+    features : ee.FeatureCollection, list
+        Feature collection or list of ee.Feature objects (or GeoJSON feature
+        dictionaries) with the zone polygons.
+    bands : list
+        Band names to reduce.
+    reducer : {'mean', 'sum', 'count', 'median', 'min', 'max'} or ee.Reducer
+        Single output reducer (the default is 'mean').
+    feature_id : str, optional
+        Feature property to use as the zone ID (the default is 'system:index',
+        which is the list index if features is a list).
+    scale : float, optional
+        Nominal scale in meters (the default is 30).
+    crs : str, optional
+        Reduction projection (the default is the image projection).
+    max_features : int, optional
+        Maximum number of features in each request (the default is 500).
+    max_area : float, optional
+        Maximum total feature area in each request in square meters.  If not
+        set (the default), the features are only batched by count.  A single
+        feature larger than max_area is requested by itself.
+    nodata : float, optional
+        Value used to transfer the zones without any unmasked pixels (the
+        default is -9999).  Values equal to nodata are returned as NaN.
+    max_workers : int, optional
+        Maximum number of concurrent requests (the default is 8).
+    rate : float, optional
+        Maximum number of requests per second (the default is 10).
+    areas : list, optional
+        Feature areas in square meters.  If not set and max_area is set, the
+        areas are computed with an extra request.
+    getinfo_fn : callable, optional
+        Function that makes the request for one batch (see getinfo_many()).
+
+    Returns
+    -------
+    numpy structured array
+        One row per feature and image with the fields "feature_id", "time"
+        (datetime64[ms]), and one float64 field per band.
+
+    Raises
+    ------
+    ValueError for an unsupported reducer or batch size.
+    Exception of the first batch request that failed.
+
+    """
+    if max_features < 1:
+        raise ValueError('max_features must be a positive integer')
+    reducer = _reducer(reducer)
+    bands = list(bands)
+
+    if isinstance(features, ee.FeatureCollection):
+        feature_coll = features
+        feature_count = utils.getinfo(feature_coll.size())
+        if feature_count is None:
+            raise ValueError('feature count could not be retrieved')
+        features = None
+    else:
+        features = [ee.Feature(f) for f in features]
+        if feature_id == 'system:index':
+            # The list index is used so that the IDs are unique across batches
+            features = [f.set({'system:index': str(i)}) for i, f in enumerate(features)]
+        feature_coll = ee.FeatureCollection(features)
+        feature_count = len(features)
+
+    if max_area is not None and areas is None:
+        areas = utils.getinfo(
+            feature_coll.map(lambda f: f.set({'zonal_area': f.geometry().area(1)}))
+            .aggregate_array('zonal_area')
+        )
+        if areas is None:
+            raise ValueError('feature areas could not be retrieved')
+    if areas is None:
+        areas = [0] * feature_count
+
+    batches = feature_batches(areas, max_features=max_features, max_area=max_area)
+    batch_objs = []
+    for start, end in batches:
+        if features is not None:
+            batch_coll = ee.FeatureCollection(features[start:end])
+        else:
+            batch_coll = ee.FeatureCollection(feature_coll.toList(end - start, start))
+        batch_objs.append(_zonal_columns(
+            coll, batch_coll, bands, reducer, feature_id, scale, crs, nodata))
+    results = request_pool.getinfo_many(
+        batch_objs, max_workers=max_workers, rate=rate, getinfo_fn=getinfo_fn)
+
+    columns_list = []
+    for result in results:
+        if result.error is not None:
+            raise result.error
+        columns_list.append(result.value)
+
+    # The zone ID type is only known after the values are retrieved
+    feature_ids = np.asarray([x for c in columns_list for x in c['feature_id']])
+    dtype = [('feature_id', feature_ids.dtype if feature_ids.size else np.int64),
+             ('time', 'datetime64[ms]')]
+    dtype.extend((band, np.float64) for band in bands)
+    output = np.empty(feature_ids.size, dtype=dtype)
+    output['feature_id'] = feature_ids
+    output['time'] = np.asarray([x for c in columns_list for x in c['time']], dtype=np.int64)
+    for band in bands:
+        values = np.asarray([x for c in columns_list for x in c[band]], dtype=np.float64)
+        values[values == nodata] = np.nan
+        output[band] = values
+    return output
+
+
+def feature_batches(areas, max_features=500, max_area=None):
+    """Split the features into contiguous batches by count and total area
+
+    Parameters
+    ----------
+    areas : list
+        Area of each feature.
+    max_features : int, optional
+        Maximum number of features in a batch (the default is 500).
+    max_area : float, optional
+        Maximum total area of the features in a batch.  A single feature
+        larger than max_area is put in a batch by itself.
+
+    Returns
+    -------
+    list of (start, end) index tuples
+
+    """
+    batches = []
+    start, batch_area = 0, 0
+    for i, area in enumerate(areas):
+        if i > start and (
+                (i - start) >= max_features or
+                (max_area is not None and batch_area + area > max_area)):
+            batches.append((start, i))
+            start, batch_area = i, 0
+        batch_area += area
+    if len(areas) > start:
+        batches.append((start, len(areas)))
+    return batches
+
+
+def _reducer(reducer):
+    if isinstance(reducer, ee.Reducer):
+        return reducer
+    reducers = {
+        'count': ee.Reducer.count,
+        'max': ee.Reducer.max,
+        'mean': ee.Reducer.mean,
+        'median': ee.Reducer.median,
+        'min': ee.Reducer.min,
+        'sum': ee.Reducer.sum,
+    }
+    if not isinstance(reducer, str) or reducer.lower() not in reducers.keys():
+        raise ValueError(f'unsupported reducer: {reducer}')
+    return reducers[reducer.lower()]()
+
+
+def _zonal_columns(coll, feature_coll, bands, reducer, feature_id='system:index',
+                   scale=30, crs=None, nodata=-9999):
+    """Build the columnar (dictionary of lists) zonal statistics request for a batch
+
+    Zones without any unmasked pixels are set to the nodata value so that the
+    columns stay aligned.
+
+    """
+    reducer = reducer.forEach(bands)
+
+    def image_values(image):
+        image = ee.Image(image)
+        time_start = image.get('system:time_start')
+
+        def set_values(ftr):
+            properties = {'feature_id': ftr.get(feature_id), 'time': time_start}
+            for band in bands:
+                properties[band] = ee.Algorithms.If(
+                    ee.Algorithms.IsEqual(ftr.get(band), None), nodata, ftr.get(band))
+            return ee.Feature(None, properties)
+
+        return (
+            image.select(bands)
+            .reduceRegions(collection=feature_coll, reducer=reducer, scale=scale, crs=crs)
+            .map(set_values)
+        )
+
+    values_coll = ee.FeatureCollection(coll.map(image_values)).flatten()
+    return ee.Dictionary.fromLists(
+        ['feature_id', 'time'] + bands,
+        [values_coll.aggregate_array(p) for p in ['feature_id', 'time'] + bands],
+    )
@@ -1,6 +1,9 @@
+import re
+
 import ee
 import openet.core.common
 
+from . import et_reference
 from .model import Model
 # from . import model
 from . import utils
@@ -39,6 +42,7 @@ class Image():
         mask_non_ag_flag=False,
         water_kc_flag=True,
         reflectance_type='SR',
+        scene_date=None,
     ):
         """Earth Engine based SIMS image object
 
@@ -81,6 +85,12 @@ class Image():
             If True, set Kc for water pixels to 1.05.  The default is True.
         reflectance_type : {'SR', 'TOA'}, optional
             Used to select the fractional cover equation (the default is 'SR').
+        scene_date : str, optional
+            ISO format scene date (UTC) if it is known client side, such as
+            when the image is built from an image ID.  If set, the daily
+            reference ET image is shared through the et_reference index and
+            the crop type image is shared by all images for the same year.
+            The default is None (the date is only known server side).
 
         Notes
         -----
@@ -107,9 +117,18 @@ class Image():
             'image_id': self._id,
         }
 
+        # Client side scene date (if known)
+        if scene_date is not None and not utils.valid_date(scene_date):
+            raise ValueError(f'invalid scene_date: {scene_date}')
+        self._scene_date = scene_date
+
         # Build date properties from the system:time_start
         self._date = ee.Date(self._time_start)
-        self._year = ee.Number(self._date.get('year'))
+        if self._scene_date is not None:
+            # A client side year lets the Model share the crop type image
+            self._year = int(self._scene_date[:4])
+        else:
+            self._year = ee.Number(self._date.get('year'))
         self._start_date = ee.Date(utils.date_0utc(self._date).millis())
         self._end_date = self._start_date.advance(1, 'day')
         self._doy = self._date.getRelative('day', 'year').add(1).int()
@@ -219,12 +238,12 @@ class Image():
             et_reference_img = ee.Image.constant(self.et_reference_source)
         elif type(self.et_reference_source) is str:
             # Assume a string source is an image collection ID (not an image ID)
-            et_reference_coll = (
-                ee.ImageCollection(self.et_reference_source)
-                .filterDate(self._start_date, self._end_date)
-                .select([self.et_reference_band])
+            # The daily image is resolved through the shared reference ET index
+            # The image can only be indexed if the scene date is known client side
+            et_reference_img = et_reference.ee_image(
+                self.et_reference_source, self.et_reference_band,
+                self._scene_date if self._scene_date is not None else self._start_date
             )
-            et_reference_img = ee.Image(et_reference_coll.first())
             if self.et_reference_resample in ['bilinear', 'bicubic']:
                 et_reference_img = et_reference_img.resample(self.et_reference_resample)
         else:
@@ -387,7 +406,8 @@ class Image():
 
         method = getattr(Image, method_name)
 
-        return method(ee.Image(image_id), **kwargs)
+        # Pass the image ID so that the scene date is known client side
+        return method(image_id, **kwargs)
 
     @classmethod
     def from_landsat_c2_sr(cls, sr_image, cloudmask_args={}, **kwargs):
@@ -412,6 +432,12 @@ class Image():
         https://www.usgs.gov/core-science-systems/nli/landsat/landsat-collection-2-level-2-science-products
 
         """
+        # Get the scene date (UTC) from the end of the Landsat image ID
+        if type(sr_image) is str and 'scene_date' not in kwargs.keys():
+            id_match = re.search(r'_(\d{4})(\d{2})(\d{2})$', sr_image)
+            if id_match:
+                kwargs['scene_date'] = '-'.join(id_match.groups())
+
         sr_image = ee.Image(sr_image)
 
         # Use the SPACECRAFT_ID property identify each Landsat type
@@ -0,0 +1,157 @@
+import bisect
+import datetime
+
+from dateutil.relativedelta import relativedelta
+
+
+def scene_index(scenes, start_date, end_date, interp_days=32):
+    """Scene IDs that can feed the interpolation of each day
+
+    The interpolated value for a day can only depend on the scenes from
+    "interp_days" before the day through "interp_days" after the day, so a
+    day only needs to be recomputed if this set of scenes changes.
+
+    Parameters
+    ----------
+    scenes : dict, list
+        Dictionary of scene ID keys and scene date values, or a list of
+        (scene ID, scene date) tuples.  The scene dates can be ISO format date
+        strings, datetimes, or times in milliseconds since 1970 (UTC).
+    start_date : str
+        ISO format start date (inclusive).
+    end_date : str
+        ISO format end date (exclusive).
+    interp_days : int, optional
+        Number of days before and after each day to include in the
+        interpolation (the default is 32).
+
+    Returns
+    -------
+    dict
+        ISO format date keys and sorted scene ID tuple values.
+
+    """
+    if isinstance(scenes, dict):
+        scenes = scenes.items()
+    scenes = sorted((_date(scene_date), scene_id) for scene_id, scene_date in scenes)
+    scene_dates = [scene_date for scene_date, scene_id in scenes]
+
+    index = {}
+    for date in _date_range(_date(start_date), _date(end_date)):
+        lower = bisect.bisect_left(scene_dates, date - datetime.timedelta(days=interp_days))
+        upper = bisect.bisect_right(scene_dates, date + datetime.timedelta(days=interp_days))
+        index[date.isoformat()] = tuple(sorted(
+            scene_id for scene_date, scene_id in scenes[lower:upper]))
+    return index
+
+
+def changed_dates(previous_index, current_index):
+    """Dates with scenes that are different in the current scene index
+
+    Dates that are not in the previous index are always included.
+
+    Parameters
+    ----------
+    previous_index : dict
+        Scene index for the previously computed days (see scene_index()).
+        The scene ID values can be lists (i.e. if the index was saved as JSON).
+    current_index : dict
+        Scene index for the current scenes.
+
+    Returns
+    -------
+    list of ISO format date strings
+
+    """
+    return sorted(
+        date for date, scene_ids in current_index.items()
+        if date not in previous_index.keys() or
+        tuple(previous_index[date]) != tuple(scene_ids)
+    )
+
+
+def changed_periods(dates, t_interval='daily'):
+    """Date ranges of the outputs that need to be rewritten for the changed dates
+
+    Parameters
+    ----------
+    dates : list
+        ISO format dates that need to be recomputed (see changed_dates()).
+    t_interval : {'daily', 'monthly', 'annual'}, optional
+        Output time interval (the default is 'daily').
+
+    Returns
+    -------
+    list of tuples
+        (start date, exclusive end date) ISO format date strings for each
+        contiguous range of affected output periods.
+
+    Raises
+    ------
+    ValueError for an unsupported t_interval.
+
+    """
+    if t_interval.lower() not in ['daily', 'monthly', 'annual']:
+        raise ValueError(f'unsupported t_interval: {t_interval}')
+
+    periods = []
+    for period_start, period_end in sorted({period_range(d, t_interval) for d in dates}):
+        if periods and periods[-1][1] == period_start:
+            periods[-1][1] = period_end
+        else:
+            periods.append([period_start, period_end])
+
+    return [(start.isoformat(), end.isoformat()) for start, end in periods]
+
+
+def period_range(date, t_interval):
+    """Start date and exclusive end date of the period containing a date
+
+    Parameters
+    ----------
+    date : str, datetime.date
+        ISO format date.
+    t_interval : {'daily', 'monthly', 'annual'}
+
+    Returns
+    -------
+    tuple of datetime.date
+
+    """
+    period_start = _period_start(date, t_interval)
+    if t_interval.lower() == 'monthly':
+        return period_start, period_start + relativedelta(months=+1)
+    elif t_interval.lower() == 'annual':
+        return period_start, period_start + relativedelta(years=+1)
+    return period_start, period_start + relativedelta(days=+1)
+
+
+def _period_start(date, t_interval):
+    """Start date of the daily, monthly, or annual period containing a date"""
+    date = _date(date)
+    if t_interval.lower() == 'monthly':
+        return date.replace(day=1)
+    elif t_interval.lower() == 'annual':
+        return date.replace(month=1, day=1)
+    return date
+
+
+def _date(date):
+    """Convert an ISO format date, datetime, or time in milliseconds to a date"""
+    if isinstance(date, datetime.datetime):
+        return date.date()
+    elif isinstance(date, datetime.date):
+        return date
+    elif isinstance(date, str):
+        return datetime.datetime.strptime(date[:10], '%Y-%m-%d').date()
+    return (
+        datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=int(date))
+    ).date()
+
+
+def _date_range(start_date, end_date):
+    """Generate the dates from the start date up to the exclusive end date"""
+    date = start_date
+    while date < end_date:
+        yield date
+        date += datetime.timedelta(days=1)
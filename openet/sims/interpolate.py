@@ -7,10 +7,18 @@ import openet.core.interpolate
 # TODO: import utils from openet.core
 # import openet.core.utils as utils
 
+from . import et_reference
 from . import utils
 
 RESAMPLE_METHODS = ['nearest', 'bilinear', 'bicubic']
 
+# Water balance state bands carried from one day to the next
+WATER_BALANCE_STATE_BANDS = ['de', 'de_rew', 'c_eff']
+
+# Version of the water balance state images (see state_image())
+WATER_BALANCE_STATE_VERSION = 1
+
+
 def from_scene_et_fraction(
     scene_coll,
     start_date,
@@ -45,6 +53,11 @@ def from_scene_et_fraction(
             If True, use joins to link the target and source collections.
             If False, the source collection will be filtered for each target image.
             This parameter is passed through to interpolate.daily().
+        use_groups : bool, optional
+            If True, the daily images are grouped to the monthly or annual
+            periods with a single join (see period_groups()) instead of
+            filtering the daily collection for each period.
+            The default is False.
         et_reference_source : str
             Reference ET collection ID.
         et_reference_band : str
@@ -61,6 +74,17 @@ def from_scene_et_fraction(
             Number of extra days prior to start_date to simulate for starting
             soil water state.  This value will be added to the interp_days when
             setting the interpolation start date.  Default is 0 days.
+        init_img: ee.Image, str
+            Water balance state image (or image asset ID) for the day before
+            the start date, built with state_image() or daily_ke_state() from
+            the end of a previous run.  If set, the soil water balance is
+            seeded from this state and the spinup_days are ignored.
+            The state version and date are checked in daily_ke().
+        precip_join_flag : bool, optional
+            If True (the default), the precipitation images are joined to the
+            daily images once before the soil water balance instead of being
+            filtered for each day (see daily_ke()).  This is independent of
+            the "use_joins" interpolation parameter.
     model_args : dict
         Parameters from the MODEL section of the INI file.
     t_interval : {'daily', 'monthly', 'annual', 'custom'}
@@ -92,7 +116,10 @@ def from_scene_et_fraction(
 
     if estimate_soil_evaporation:
         # Add spinup days, will remove after water balance calculations
-        if 'spinup_days' in interp_args.keys():
+        # Spinup is not needed if the water balance is seeded from a saved state
+        if interp_args.get('init_img', None) is not None:
+            spinup_days = 0
+        elif 'spinup_days' in interp_args.keys():
             spinup_days = interp_args['spinup_days']
         else:
             spinup_days = 0
@@ -118,6 +145,9 @@ def from_scene_et_fraction(
         use_joins = True
         logging.debug('use_joins was not set in interp_args, default to True')
 
+    # Get use_groups
+    use_groups = interp_args.get('use_groups', False)
+
     # Check that the input parameters are valid
     if t_interval.lower() not in ['daily', 'monthly', 'annual', 'custom']:
         raise ValueError(f'unsupported t_interval: {t_interval}')
@@ -226,9 +256,10 @@ def from_scene_et_fraction(
     elif type(et_reference_source) is str:
         # Assume a string source is a single image collection ID
         #   not a list of collection IDs or ee.ImageCollection
+        # The daily images are resolved through the shared reference ET index
         daily_et_ref_coll = (
-            ee.ImageCollection(et_reference_source)
-            .filterDate(start_date, end_date)
+            et_reference.ee_collection(
+                et_reference_source, et_reference_band, start_date, end_date)
             .select([et_reference_band], ['et_reference'])
         )
     # elif isinstance(et_reference_source, computedobject.ComputedObject):
@@ -373,7 +404,7 @@ def from_scene_et_fraction(
 
         daily_coll = daily_coll.map(compute_et)
 
-    def aggregate_image(agg_start_date, agg_end_date, date_format):
+    def aggregate_image(agg_start_date, agg_end_date, date_format, period_colls=None):
         """Aggregate the daily images within the target date range
 
         Parameters
@@ -384,6 +415,10 @@ def from_scene_et_fraction(
             End date (exclusive).
         date_format : str
             Date format for system:index (uses EE JODA format).
+        period_colls : dict, optional
+            Daily, reference ET, and count collections that were already
+            grouped to the target period (see period_groups()).  If not set,
+            the collections are filtered to the target date range.
 
         Returns
         -------
@@ -395,16 +430,19 @@ def from_scene_et_fraction(
         for each time interval by separate mappable functions
 
         """
+        if period_colls is None:
+            period_colls = {
+                'daily': daily_coll.filterDate(agg_start_date, agg_end_date),
+                'et_reference': daily_et_ref_coll.filterDate(agg_start_date, agg_end_date),
+            }
+            if 'count' in variables:
+                period_colls['count'] = aggregate_coll.filterDate(agg_start_date, agg_end_date)
+
         if ('et' in variables) or ('et_fraction' in variables):
-            et_img = daily_coll.filterDate(agg_start_date, agg_end_date).select(['et']).sum()
+            et_img = period_colls['daily'].select(['et']).sum()
 
         if ('et_reference' in variables) or ('et_fraction' in variables):
-            et_reference_img = (
-                daily_et_ref_coll
-                .filterDate(agg_start_date, agg_end_date)
-                .select(['et_reference'])
-                .sum()
-            )
+            et_reference_img = period_colls['et_reference'].select(['et_reference']).sum()
             if et_reference_resample and (et_reference_resample in ['bilinear', 'bicubic']):
                 et_reference_img = (
                     et_reference_img
@@ -422,25 +460,18 @@ def from_scene_et_fraction(
             image_list.append(et_img.divide(et_reference_img).rename(['et_fraction']).float())
         if 'ndvi' in variables:
             # Compute average ndvi over the aggregation period
-            ndvi_img = (
-                daily_coll.filterDate(agg_start_date, agg_end_date)
-                .mean().select(['ndvi']).float()
-            )
+            ndvi_img = period_colls['daily'].mean().select(['ndvi']).float()
             image_list.append(ndvi_img)
         if 'count' in variables:
             count_img = (
-                aggregate_coll.filterDate(agg_start_date, agg_end_date)
-                .select(['mask']).sum().rename('count').uint8()
+                period_colls['count'].select(['mask']).sum().rename('count').uint8()
             )
             image_list.append(count_img)
 
         # Return other SWB variables
-        for var_name in ['ke', 'kr', 'ft', 'de_rew', 'de', 'de_prev', 'precip']:
+        for var_name in ['ke', 'kr', 'ft', 'de_rew', 'de', 'de_prev', 'c_eff', 'precip']:
             if var_name in variables:
-                var_img = (
-                    daily_coll.filterDate(agg_start_date, agg_end_date)
-                    .mean().select([var_name]).float()
-                )
+                var_img = period_colls['daily'].mean().select([var_name]).float()
                 image_list.append(var_img)
 
         return (
@@ -452,6 +483,28 @@ def from_scene_et_fraction(
             # .set(interp_properties)
         )
 
+    # Aggregate all of the periods from a single grouping of the daily images
+    if use_groups and t_interval.lower() in ['monthly', 'annual']:
+        group_colls = {'daily': daily_coll, 'et_reference': daily_et_ref_coll}
+        if 'count' in variables:
+            group_colls['count'] = aggregate_coll
+
+        def agg_group(period_ftr):
+            period_ftr = ee.Feature(period_ftr)
+            return aggregate_image(
+                agg_start_date=ee.Date(period_ftr.get('system:time_start')),
+                agg_end_date=None,
+                date_format='YYYYMM' if t_interval.lower() == 'monthly' else 'YYYY',
+                period_colls={
+                    k: ee.ImageCollection.fromImages(period_ftr.get(k))
+                    for k in group_colls.keys()
+                },
+            )
+
+        return ee.ImageCollection(
+            period_groups(group_colls, start_dt, end_dt, t_interval).map(agg_group)
+        )
+
     # Combine input, interpolated, and derived values
     if t_interval.lower() == 'daily':
         def agg_daily(daily_img):
@@ -514,6 +567,73 @@ def from_scene_et_fraction(
         ))
 
 
+def period_groups(colls, start_dt, end_dt, t_interval):
+    """Group daily image collections by month or year with one join per collection
+
+    Each daily image is tagged with its period key once and all of the periods
+    are matched with a single equals join, instead of filtering the full daily
+    collection separately for every period.
+
+    Parameters
+    ----------
+    colls : dict
+        Daily image collections to group (the keys are used as the names of
+        the image list properties).
+    start_dt : datetime
+        Start date of the first period.
+    end_dt : datetime
+        Exclusive end date of the last period.
+    t_interval : {'monthly', 'annual'}
+        Aggregation time interval.
+
+    Returns
+    -------
+    ee.FeatureCollection
+        One feature per period with "system:time_start" set to the period start
+        and a list of the period images for each collection key.
+
+    Raises
+    ------
+    ValueError for an unsupported t_interval.
+
+    """
+    if t_interval.lower() == 'monthly':
+        step, date_format = relativedelta(months=+1), 'YYYYMM'
+    elif t_interval.lower() == 'annual':
+        step, date_format = relativedelta(years=+1), 'YYYY'
+    else:
+        raise ValueError(f'unsupported t_interval: {t_interval}')
+
+    period_dates = []
+    iter_dt = start_dt
+    while iter_dt < end_dt:
+        period_dates.append(iter_dt.strftime('%Y-%m-%d'))
+        iter_dt += step
+
+    def period_ftr(period_date):
+        period_date = ee.Date(period_date)
+        return ee.Feature(None, {
+            'period': period_date.format(date_format),
+            'system:time_start': period_date.millis(),
+        })
+
+    period_coll = ee.FeatureCollection(ee.List(period_dates).map(period_ftr))
+
+    def set_period(img):
+        return img.set({
+            'period': ee.Date(img.get('system:time_start')).format(date_format)
+        })
+
+    for key, coll in colls.items():
+        period_coll = ee.Join.saveAll(matchesKey=key, outer=True).apply(
+            primary=period_coll,
+            secondary=ee.ImageCollection(coll).map(set_period),
+            condition=ee.Filter.equals(leftField='period', rightField='period'),
+        )
+
+    return period_coll
+
+
 def daily_ke(
         daily_coll,
         model_args,  # CGM - This parameter isn't used
@@ -523,6 +643,8 @@ def daily_ke(
         fc_band='b1',
         wp_source='projects/eeflux/soils/gsmsoil_mu_a_wp_10cm_albers_100',
         wp_band='b1',
+        init_img=None,
+        precip_join_flag=True,
         **kwargs
         ):
     """Compute daily Ke values by simulating evaporable zone water balance
@@ -548,16 +670,235 @@ def daily_ke(
         GEE Image of soil permanent wilting point values
     wp_band : str
         Name of the band in `wp_source` that contains wilting point values
+    init_img : ee.Image, optional
+        Water balance state image (with "de", "de_rew", and "c_eff" bands)
+        for the day before the first image in the daily collection, built
+        with state_image() or daily_ke_state().  The default is to assume
+        the soil is at field capacity.
+    precip_join_flag : bool, optional
+        If True (the default), the current and next day precipitation images
+        are joined to the daily images once before the water balance instead
+        of filtering the precipitation collection for each day.
 
     Returns
     -------
     ee.ImageCollection
 
+    Raises
+    ------
+    ValueError
+        If the init_img state version or date do not match.
+
     """
     # First check that ndvi band is present in daily_coll
     if daily_coll.first().bandNames().indexOf('ndvi').eq(-1).getInfo():
         raise Exception('Daily collection must have NDVI band to compute soil evaporation')
 
+    tew, rew = _evaporable_water(fc_source, fc_band, wp_source, wp_band)
+    if init_img is None:
+        init_img = _water_balance_init(tew, rew)
+    else:
+        init_img = _check_state_image(init_img, daily_coll)
+
+    if precip_join_flag:
+        daily_coll = _join_precip(daily_coll, precip_source, precip_band)
+    water_balance_day = _water_balance_day_func(
+        tew, rew, precip_source, precip_band, precip_join_flag
+    )
+
+    # Create list to hold water balance rasters when iterating over collection
+    # Doesn't seem like you can create an empty list in ee?
+    init_img_list = ee.ImageCollection([init_img]).toList(1)
+
+    # Convert interp collection to list
+    interp_list = daily_coll.toList(daily_coll.size())
+    # Is list guaranteed to have right order?
+    # (Seems to be fine in initial testing.)
+    # interp_list = interp_list.sort(ee.List(['system:index']))
+
+    # Perform daily water balance update
+    def water_balance_step(img, wb_coll):
+        # Explicit cast ee.Image
+        prev_img = ee.Image(ee.List(wb_coll).get(-1))
+        new_day_img = water_balance_day(ee.Image(img), prev_img)
+        return ee.List(wb_coll).add(new_day_img)
+
+    # Run the water balance calculations
+    daily_coll = interp_list.iterate(water_balance_step, init_img_list)
+
+    # remove empty first day
+    daily_coll = ee.List(daily_coll).slice(1, ee.List(daily_coll).size())
+    daily_coll = ee.ImageCollection.fromImages(daily_coll)
+
+    return daily_coll
+
+
+def daily_ke_state(
+        daily_coll,
+        precip_source='IDAHO_EPSCOR/GRIDMET',
+        precip_band='pr',
+        fc_source='projects/eeflux/soils/gsmsoil_mu_a_fc_10cm_albers_100',
+        fc_band='b1',
+        wp_source='projects/eeflux/soils/gsmsoil_mu_a_wp_10cm_albers_100',
+        wp_band='b1',
+        init_img=None,
+        precip_join_flag=True,
+        **kwargs
+        ):
+    """Compute the evaporable zone water balance state at the end of a period
+
+    Unlike daily_ke(), only the previous day state image is carried through
+    the iteration instead of a list of all of the daily images, so the size
+    of the computation does not grow with the number of days.  This is
+    intended for spinning up the water balance before the target period
+    (the returned image can be passed to daily_ke() as the "init_img").
+
+    Parameters
+    ----------
+    daily_coll : ee.ImageCollection
+        Collection of daily images with "ndvi", "et_fraction", and
+        "et_reference" bands.
+    precip_source : str, optional
+        GEE data source for gridded precipitation data, default is gridMET.
+    precip_band : str, option
+        GEE Image band that contains gridded precipitaiton data, default is
+        'pr', which is the band for gridMET.
+    fc_source : str, ee.Image
+        GEE Image of soil field capacity values
+    fc_band : str
+        Name of the band in `fc_source` that contains field capacity values
+    wp_source : str, ee.Image
+        GEE Image of soil permanent wilting point values
+    wp_band : str
+        Name of the band in `wp_source` that contains wilting point values
+    init_img : ee.Image, optional
+        Water balance state image for the day before the first image in the
+        daily collection, built with state_image() or daily_ke_state().
+        The default is to assume the soil is at field capacity.
+    precip_join_flag : bool, optional
+        If True (the default), the precipitation images are joined to the
+        daily images once before the water balance (see daily_ke()).
+
+    Returns
+    -------
+    ee.Image with "de", "de_rew", and "c_eff" bands
+        The image is a versioned state image (see state_image()) for the
+        last day in the daily collection.
+
+    Raises
+    ------
+    ValueError
+        If the init_img state version or date do not match.
+
+    """
+    tew, rew = _evaporable_water(fc_source, fc_band, wp_source, wp_band)
+    if init_img is None:
+        init_img = _water_balance_init(tew, rew)
+    else:
+        init_img = _check_state_image(init_img, daily_coll)
+
+    if precip_join_flag:
+        daily_coll = _join_precip(daily_coll, precip_source, precip_band)
+    water_balance_day = _water_balance_day_func(
+        tew, rew, precip_source, precip_band, precip_join_flag
+    )
+
+    def water_balance_step(img, prev_img):
+        curr_img = ee.Image(img)
+        return (
+            water_balance_day(curr_img, ee.Image(prev_img))
+            .select(WATER_BALANCE_STATE_BANDS)
+            .set({'system:time_start': curr_img.get('system:time_start')})
+        )
+
+    return state_image(
+        ee.Image(daily_coll.iterate(water_balance_step, init_img)),
+        ee.Date(daily_coll.aggregate_max('system:time_start')),
+    )
+
+
+def state_image(state_img, date):
+    """Build a versioned water balance state image for checkpointing
+
+    The returned image can be exported to an image asset (with
+    ee.batch.Export.image.toAsset) and then used to seed a later run as the
+    "init_img" for daily_ke() or from_scene_et_fraction().
+
+    Parameters
+    ----------
+    state_img : ee.Image
+        Image with the water balance state bands ("de", "de_rew", "c_eff"),
+        such as the image returned by daily_ke_state() or the last image of
+        the daily_ke() collection.
+    date : str, ee.Date
+        Date of the last day included in the state.
+
+    Returns
+    -------
+    ee.Image
+
+    """
+    date = ee.Date(date)
+    return (
+        ee.Image(state_img).select(WATER_BALANCE_STATE_BANDS).double()
+        .set({
+            'system:index': date.format('yyyyMMdd'),
+            'system:time_start': date.millis(),
+            'wb_state_date': date.format('yyyy-MM-dd'),
+            'wb_state_version': WATER_BALANCE_STATE_VERSION,
+        })
+    )
+
+
+def _check_state_image(init_img, daily_coll):
+    """Check the version and date of a water balance state image
+
+    The state date must be the day before the first image in the daily
+    collection (the same checks as array_interpolate.load_state()).
+
+    Parameters
+    ----------
+    init_img : ee.Image, str
+        Water balance state image (or image asset ID).
+    daily_coll : ee.ImageCollection
+        Collection of daily images that will be seeded from the state.
+
+    Returns
+    -------
+    ee.Image with "de", "de_rew", and "c_eff" bands
+
+    Raises
+    ------
+    ValueError
+        If the state version or date do not match.
+
+    """
+    init_img = ee.Image(init_img)
+    state_info = ee.Dictionary({
+        'version': init_img.get('wb_state_version'),
+        'date': init_img.get('wb_state_date'),
+        'expected_date': (
+            ee.Date(daily_coll.aggregate_min('system:time_start'))
+            .advance(-1, 'day').format('yyyy-MM-dd')
+        ),
+    }).getInfo()
+
+    if state_info.get('version') != WATER_BALANCE_STATE_VERSION:
+        raise ValueError(
+            f'unsupported water balance state version: {state_info.get("version")} '
+            f'(expected {WATER_BALANCE_STATE_VERSION}, see state_image())'
+        )
+    if state_info.get('date') != state_info['expected_date']:
+        raise ValueError(
+            f'water balance state date {state_info.get("date")} does not match '
+            f'{state_info["expected_date"]}'
+        )
+
+    return init_img.select(WATER_BALANCE_STATE_BANDS)
+
+
+def _evaporable_water(fc_source, fc_band, wp_source, wp_band):
+    """Total and readily evaporable water images"""
     field_capacity = ee.Image(fc_source).select(fc_band)
     wilting_point = ee.Image(wp_source).select(wp_band)
 
@@ -583,20 +924,15 @@ def daily_ke(
     rew = awc.expression('0.8 + 54.4 * b() / 100')
     rew = rew.where(rew.gt(tew), tew)
 
+    return tew, rew
+
+
+def _water_balance_init(tew, rew):
+    """Initial water balance state image"""
     # Coefficients for skin layer retention, Allen (2011)
     c0 = ee.Image(0.8)
     c1 = c0.expression('2 * (1 - b())')
 
-    # 1.2 is max for grass reference (ETo)
-    ke_max = ee.Image(1.2)
-
-    # Fraction of precip that evaps today vs tomorrow
-    # .5 is arbitrary
-    frac_day_evap = ee.Image(0.5)
-
-    # Get precip collection
-    daily_pr_coll = ee.ImageCollection(precip_source).select(precip_band)
-
     # Assume soil is at field capacity to start
     # i.e. depletion = 0
     # init_de = ee.Image(ee.Image(0.0).select([0], ['de']))
@@ -609,35 +945,124 @@ def daily_ke(
         .select([0], ['c_eff'])
     )
 
-    # Create list to hold water balance rasters when iterating over collection
-    # Doesn't seem like you can create an empty list in ee?
-    init_img = ee.Image([init_de, init_de_rew, init_c_eff])
-    init_img_list = ee.ImageCollection([init_img]).toList(1)
+    return ee.Image([init_de, init_de_rew, init_c_eff])
 
-    # Convert interp collection to list
-    interp_list = daily_coll.toList(daily_coll.size())
-    # Is list guaranteed to have right order?
-    # (Seems to be fine in initial testing.)
-    # interp_list = interp_list.sort(ee.List(['system:index']))
 
-    # Perform daily water balance update
-    def water_balance_step(img, wb_coll):
-        # Explicit cast ee.Image
-        prev_img = ee.Image(ee.List(wb_coll).get(-1))
-        curr_img = ee.Image(img)
+def _join_precip(daily_coll, precip_source, precip_band):
+    """Join the current and next day precipitation images to the daily images
+
+    The joined images are saved in the "precip_current" and "precip_next"
+    properties and match the images selected by filtering the precipitation
+    collection to the day before ([t-1, t)) and the day after ([t, t+1)) the
+    daily image time.  The precipitation collection is filtered to the daily
+    collection date range (plus one day on each side) before the joins.
+    The properties are removed from the water balance images (see
+    _water_balance_day_func()).
+
+    """
+    daily_pr_coll = (
+        ee.ImageCollection(precip_source).select(precip_band)
+        .filterDate(
+            ee.Date(daily_coll.aggregate_min('system:time_start')).advance(-1, 'day'),
+            ee.Date(daily_coll.aggregate_max('system:time_start')).advance(1, 'day'),
+        )
+    )
+    day_ms = 24 * 60 * 60 * 1000
+
+    # Precipitation image start time is in [t-1 day, t)
+    current_filter = ee.Filter.And(
+        ee.Filter.maxDifference(
+            difference=day_ms,
+            leftField='system:time_start',
+            rightField='system:time_start',
+        ),
+        ee.Filter.greaterThan(
+            leftField='system:time_start',
+            rightField='system:time_start',
+        )
+    )
+
+    # Precipitation image start time is in [t, t+1 day)
+    next_filter = ee.Filter.And(
+        ee.Filter.maxDifference(
+            difference=day_ms - 1,
+            leftField='system:time_start',
+            rightField='system:time_start',
+        ),
+        ee.Filter.lessThanOrEquals(
+            leftField='system:time_start',
+            rightField='system:time_start',
+        )
+    )
+
+    daily_coll = ee.ImageCollection(
+        ee.Join.saveFirst(
+            matchKey='precip_current',
+            ordering='system:time_start',
+            ascending=True,
+            outer=True,
+        ).apply(
+            primary=daily_coll,
+            secondary=daily_pr_coll,
+            condition=current_filter,
+        )
+    )
+
+    return ee.ImageCollection(
+        ee.Join.saveFirst(
+            matchKey='precip_next',
+            ordering='system:time_start',
+            ascending=True,
+            outer=True,
+        ).apply(
+            primary=daily_coll,
+            secondary=daily_pr_coll,
+            condition=next_filter,
+        )
+    )
+
+
+def _water_balance_day_func(tew, rew, precip_source, precip_band, precip_join_flag=False):
+    """Build the function for computing one day of the water balance
+
+    The returned function takes the current daily image and the previous day
+    water balance image and returns the current image with the water balance
+    bands added.  If precip_join_flag is True, the precipitation images must
+    already be joined to the daily images (see _join_precip()) and the joined
+    image properties are not copied to the returned image.
+
+    """
+    # Coefficients for skin layer retention, Allen (2011)
+    c0 = ee.Image(0.8)
+    c1 = c0.expression('2 * (1 - b())')
+
+    # 1.2 is max for grass reference (ETo)
+    ke_max = ee.Image(1.2)
+
+    # Fraction of precip that evaps today vs tomorrow
+    # .5 is arbitrary
+    frac_day_evap = ee.Image(0.5)
 
+    # Get precip collection
+    daily_pr_coll = ee.ImageCollection(precip_source).select(precip_band)
+
+    def water_balance_day(curr_img, prev_img):
         # Make precip image with bands for today and tomorrow
         # CGM - The current image is selected by filtering to the previous day
         #   since the Landsat image time is ~18 UTC but the precip start time
         #   is likely 0 UTC or 6 UTC (for GRIDMET)
         # CGM the
-        curr_date = curr_img.date()
-        curr_precip = ee.Image(
-            daily_pr_coll.filterDate(curr_date.advance(-1, 'day'), curr_date).first()
-        )
-        next_precip = ee.Image(
-            daily_pr_coll.filterDate(curr_date, curr_date.advance(1, 'day')).first()
-        )
+        if precip_join_flag:
+            curr_precip = ee.Image(curr_img.get('precip_current'))
+            next_precip = ee.Image(curr_img.get('precip_next'))
+        else:
+            curr_date = curr_img.date()
+            curr_precip = ee.Image(
+                daily_pr_coll.filterDate(curr_date.advance(-1, 'day'), curr_date).first()
+            )
+            next_precip = ee.Image(
+                daily_pr_coll.filterDate(curr_date, curr_date.advance(1, 'day')).first()
+            )
         # curr_precip = ee.Image(
         #     daily_pr_coll.filterDate(curr_date, curr_date.advance(1, 'day')).first()
         # )
@@ -701,7 +1126,7 @@ def daily_ke(
 
         # CGM - Why not just add ke to et_frac and clamp the result?
         #   What does the extra .where call do?
-        et_frac = ee.Image(img).select(['et_fraction'])
+        et_frac = curr_img.select(['et_fraction'])
         etof = (
             et_frac.where(et_frac.lte(1.15), et_frac.add(ke).clamp(0, 1.15))
             .rename('et_fraction')
@@ -757,7 +1182,7 @@ def daily_ke(
         # Make image to add to list
         # CGM - I removed the duplicate de, de_rew, and ft bands
         #   Are they needed?
-        new_day_img = ee.Image(
+        output_img = ee.Image(
             curr_img.addBands(
                 ee.Image([de, de_rew, c_eff, ke, kr, ft, de_prev, ete,
                           precip_img.select(['current'], ['precip']), etof]),
@@ -765,13 +1190,18 @@ def daily_ke(
             )
         )
 
-        return ee.List(wb_coll).add(new_day_img)
-
-    # Run the water balance calculations
-    daily_coll = interp_list.iterate(water_balance_step, init_img_list)
+        if precip_join_flag:
+            # Drop the joined precipitation image properties
+            # Adding the bands to an empty image doesn't copy the properties
+            output_img = (
+                ee.Image().select([]).addBands(output_img)
+                .copyProperties(curr_img, exclude=['precip_current', 'precip_next'])
+                .set({
+                    'system:index': curr_img.get('system:index'),
+                    'system:time_start': curr_img.get('system:time_start'),
+                })
+            )
 
-    # remove empty first day
-    daily_coll = ee.List(daily_coll).slice(1, ee.List(daily_coll).size())
-    daily_coll = ee.ImageCollection.fromImages(daily_coll)
+        return ee.Image(output_img)
 
-    return daily_coll
+    return water_balance_day
@@ -1,3 +1,6 @@
+import copy
+from functools import lru_cache
+import logging
 # import pprint
 
 import ee
@@ -5,6 +8,28 @@ import ee
 from . import data
 from . import utils
 
+# Crop data parameters that are mapped to the crop type image
+#   and the default values for crop types that are not in the crop data
+# Parameters with a default value of None are masked for unmatched crop types
+# Set default values for some properties to ensure fr == 1
+CROP_DATA_PARAMS = {
+    'crop_class': 0,
+    'h_max': None,
+    'm_l': None,
+    'fr_mid': 1,
+    'fr_end': 1,
+    'ls_start': 1,
+    'ls_stop': 365,
+}
+
+# Placeholder value for masked parameters in the crop data lookup table
+CROP_DATA_NODATA = -9999
+
+# Crop type collection year ranges (min_year, max_year) keyed by collection ID
+# The ranges are only set by load_crop_type_year_range(), otherwise the year
+#   range is computed server side from the collection
+crop_type_year_ranges = {}
+
 
 # def lazy_property(fn):
 #     """Decorator that makes a property lazy-evaluated
@@ -42,8 +67,10 @@ class Model():
         Parameters
         ----------
         year : ee.Number
-        doy : ee.Number
-            Day of year
+        doy : ee.Number, ee.Image
+            Day of year.  A single band image can be used for per pixel values.
+            To compute Kc for a time series, pass an ee.ImageCollection to
+            kc() and the day of year is set from each image time_start.
         crop_type_source : str, optional
             Crop type source.  The default is the Cropland Data Layer (CDL) assets.
             The source should be an Earth Engine Image ID (or ee.Image).
@@ -86,18 +113,17 @@ class Model():
         #   instead of as lazy properties below
         self.crop_data = self._crop_data()
         self.crop_type = self._crop_type()
-        self.crop_class = crop_data_image('crop_class', self.crop_type, self.crop_data, 0)
-
-        # Manually set the crop data parameter images as class properties
-        # Set default values for some properties to ensure fr == 1
-        self.h_max = crop_data_image('h_max', self.crop_type, self.crop_data)
-        self.m_l = crop_data_image('m_l', self.crop_type, self.crop_data)
-        self.fr_mid = crop_data_image('fr_mid', self.crop_type, self.crop_data, 1)
-        self.fr_end = crop_data_image('fr_end', self.crop_type, self.crop_data, 1)
-        self.ls_start = crop_data_image('ls_start', self.crop_type, self.crop_data, 1)
-        self.ls_stop = crop_data_image('ls_stop', self.crop_type, self.crop_data, 365)
-        # setattr('h_max', crop_data_image(
-        #     'h_max', self.crop_type, self.crop_data))
+
+        # Map all of the crop data parameters with a single table lookup
+        #   and then set the parameter images as class properties
+        crop_data_img = crop_data_table_image(self.crop_type, self.crop_type_remap)
+        self.crop_class = crop_data_img.select(['crop_class'])
+        self.h_max = crop_data_img.select(['h_max'])
+        self.m_l = crop_data_img.select(['m_l'])
+        self.fr_mid = crop_data_img.select(['fr_mid'])
+        self.fr_end = crop_data_img.select(['fr_end'])
+        self.ls_start = crop_data_img.select(['ls_start'])
+        self.ls_stop = crop_data_img.select(['ls_stop'])
 
         self.reflectance_type = reflectance_type
         # TODO: Should type be checked (and exception raised) here or in fc()?
@@ -113,12 +139,16 @@ class Model():
 
         Parameters
         ----------
-        ndvi : ee.Image
-            Normalized difference vegetation index.
+        ndvi : ee.Image, ee.ImageCollection
+            Normalized difference vegetation index.  If an image collection,
+            Kc is computed for each image with the day of year set from the
+            image system:time_start property.  The crop type and the crop data
+            parameter images are only built once (in the init) and are shared
+            by all of the images, so the crop type year is not changed.
 
         Returns
         -------
-        ee.Image
+        ee.Image, ee.ImageCollection
 
         Notes
         ----
@@ -141,6 +171,9 @@ class Model():
             [EQNS 10 (Kd); 7a (Kcb_full) using tree/vine Fr vals from Table 2; 5a (Kcb)]
 
         """
+        if isinstance(ndvi, ee.ImageCollection):
+            return ndvi.map(self._kc_time_series)
+
         fc = self.fc(ndvi)
 
         # Start with the generic NDVI-Kc relationship to initialize Kc
@@ -182,6 +215,31 @@ class Model():
 
         return kc.rename(['kc'])
 
+    def _kc_time_series(self, ndvi):
+        """Crop coefficient (kc) for one image of an NDVI image collection
+
+        Parameters
+        ----------
+        ndvi : ee.Image
+            Normalized difference vegetation index with a system:time_start.
+
+        Returns
+        -------
+        ee.Image
+
+        """
+        ndvi = ee.Image(ndvi)
+        # Shallow copy so that the crop data images are reused for each date
+        model = copy.copy(self)
+        model.doy = (
+            ee.Date(ndvi.get('system:time_start')).getRelative('day', 'year').add(1).int()
+        )
+        return ee.Image(
+            model.kc(ndvi)
+            .copyProperties(ndvi)
+            .set({'system:time_start': ndvi.get('system:time_start')})
+        )
+
     # @lazy_property
     def fc(self, ndvi):
         """Fraction of cover (fc)
@@ -238,64 +296,18 @@ class Model():
         ValueError for unsupported crop_type_sources
 
         """
-        properties = ee.Dictionary()
-
         if utils.is_number(self.crop_type_source):
             # Interpret numbers as constant images
             # CGM - Should we use the ee_types here instead?
             #   i.e. ee.ee_types.isNumber(self.et_reference_source)
             crop_type_img = ee.Image.constant(self.crop_type_source)
-            #     .rename('crop_type')
-            # properties = properties.set('id', 'constant')
-        elif (type(self.crop_type_source) is str and
-              self.crop_type_source.upper() == 'USDA/NASS/CDL'):
-            # Assume source is the CDL image collection ID
-            # Use the CDL image closest to the image date
-            # Don't use CDL images before 2008
-            cdl_coll = ee.ImageCollection('USDA/NASS/CDL')
-            cdl_year = (
-                ee.Number(self.year)
-                .max(2008)
-                .min(ee.Date(cdl_coll.aggregate_max('system:time_start')).get('year'))
-            )
-            cdl_coll = (
-                cdl_coll
-                .filterDate(ee.Date.fromYMD(cdl_year, 1, 1),
-                            ee.Date.fromYMD(cdl_year.add(1), 1, 1))
-                .select(['cropland'])
-            )
-            crop_type_img = ee.Image(cdl_coll.first())
-            properties = properties.set('id', crop_type_img.get('system:id'))
-        elif (type(self.crop_type_source) is str and
-                self.crop_type_source.upper().startswith('USDA/NASS/CDL')):
-            # Assume source is a single CDL image ID
-            crop_type_img = ee.Image(self.crop_type_source).select(['cropland'])
-            properties = properties.set('id', crop_type_img.get('system:id'))
-        elif (type(self.crop_type_source) is str and
-              ('projects/openet/crop_type' in self.crop_type_source.lower() or
-               'projects/openet/assets/crop_type' in self.crop_type_source.lower())):
-            # Assume source is an OpenET crop type image collection ID
-            # Use the crop type image closest to the image date
-            crop_coll = ee.ImageCollection(self.crop_type_source)
-            cdl_year = (
-                ee.Number(self.year)
-                .max(ee.Date(crop_coll.aggregate_min('system:time_start')).get('year'))
-                .min(ee.Date(crop_coll.aggregate_max('system:time_start')).get('year'))
-            )
-            crop_type_coll = (
-                ee.ImageCollection(self.crop_type_source)
-                .filterDate(ee.Date.fromYMD(cdl_year, 1, 1),
-                            ee.Date.fromYMD(cdl_year.add(1), 1, 1))
-            )
-            crop_type_img = crop_type_coll.mosaic()
-            properties = properties.set('id', crop_type_coll.get('system:id'))
-        # TODO: Support ee.Image and ee.ImageCollection sources
-        # elif isinstance(self.crop_type_source, computedobject.ComputedObject):
+            return crop_type_img.rename(['crop_type']).set(ee.Dictionary())
+        elif type(self.crop_type_source) is str and type(self.year) is int:
+            # The crop type image for a client side year can be shared
+            #   by all of the model objects
+            return crop_type_image(self.crop_type_source, self.year)
         else:
-            raise ValueError(f'unsupported crop_type_source: {self.crop_type_source}')
-
-        # Should the image properties be set onto the image also?
-        return crop_type_img.rename(['crop_type']).set(properties)
+            return _crop_type_image(self.crop_type_source, self.year)
 
     def _crop_data(self):
         """Load the crop data dictionary
@@ -317,10 +329,7 @@ class Model():
         ValueError for unsupported crop_type_remap
 
         """
-        if self.crop_type_remap.upper() == 'CDL':
-            return data.cdl
-        else:
-            raise ValueError(f'unsupported crop_type_remap: "{self.crop_type_remap}"')
+        return crop_data_dict(self.crop_type_remap)
 
     def kc_generic(self, ndvi):
         """Generic crop coefficient based on linear function of NDVI
@@ -623,3 +632,242 @@ def crop_data_image(param_name, crop_type, crop_data, default_value=None):
         output = crop_type.remap(from_list, to_list)
 
     return output.double().divide(data.int_scalar).rename([param_name])
+
+
+def crop_data_dict(crop_type_remap):
+    """Return the crop data dictionary for a crop type remap
+
+    Parameters
+    ----------
+    crop_type_remap : {'CDL'}
+
+    Returns
+    -------
+    dict
+
+    Raises
+    ------
+    ValueError for unsupported crop_type_remap
+
+    """
+    if crop_type_remap.upper() == 'CDL':
+        return data.cdl
+    else:
+        raise ValueError(f'unsupported crop_type_remap: "{crop_type_remap}"')
+
+
+@lru_cache()
+def crop_data_table(crop_type_remap):
+    """Build the crop data parameter lookup table for a crop type remap
+
+    The table is only built once per crop type remap and is then reused for
+    all Model instances.
+
+    Parameters
+    ----------
+    crop_type_remap : {'CDL'}
+
+    Returns
+    -------
+    tuple of the crop type list, the table row index for each crop type,
+        the parameter name list, and the table rows.  Crop types with the
+        same parameter values share a row and the final row has the default
+        values for unmatched crop types.  Masked values are set to
+        CROP_DATA_NODATA.
+
+    Notes
+    -----
+    Values are rounded to the data.py int_scalar precision so that the output
+    is identical to the crop_data_image() remap.
+
+    """
+    crop_data = crop_data_dict(crop_type_remap)
+    param_names = tuple(CROP_DATA_PARAMS.keys())
+
+    def param_value(param_name, c_data):
+        if param_name in c_data.keys():
+            value = round(c_data[param_name] * data.int_scalar) / data.int_scalar
+        elif CROP_DATA_PARAMS[param_name] is not None:
+            value = CROP_DATA_PARAMS[param_name]
+        else:
+            value = CROP_DATA_NODATA
+        # Keep integer values as ints to reduce the serialized table size
+        return int(value) if value == int(value) else value
+
+    default_row = tuple(param_value(p, {}) for p in param_names)
+    rows = []
+    crop_types = tuple(sorted(crop_data.keys()))
+    row_index = []
+    for c_type in crop_types:
+        row = tuple(param_value(p, crop_data[c_type]) for p in param_names)
+        if row not in rows:
+            rows.append(row)
+        row_index.append(rows.index(row))
+    rows.append(default_row)
+
+    return crop_types, tuple(row_index), param_names, tuple(rows)
+
+
+def crop_data_table_image(crop_type, crop_type_remap):
+    """Build a multiband ee.Image of all the crop data parameters
+
+    Parameters
+    ----------
+    crop_type : ee.Image
+    crop_type_remap : str
+
+    Returns
+    -------
+    ee.Image
+
+    Notes
+    -----
+    The crop type is remapped once to a row index in the crop data table and
+    all parameters are then read from a constant array image with a single
+    slice, instead of building a separate remap for each parameter.
+
+    """
+    crop_types, row_index, param_names, rows = crop_data_table(crop_type_remap)
+
+    # Unmatched crop types are mapped to the final (default) row
+    row_index = crop_type.remap(list(crop_types), list(row_index), len(rows) - 1)
+
+    output = (
+        ee.Image(ee.Array([list(row) for row in rows]))
+        .arraySlice(0, row_index, row_index.add(1))
+        .arrayProject([1])
+        .arrayFlatten([list(param_names)])
+        .double()
+    )
+
+    # Mask the parameters that don't have a default value
+    return output.updateMask(output.neq(CROP_DATA_NODATA))
+
+
+def load_crop_type_year_range(crop_type_source):
+    """Get the first and last year of a crop type image collection
+
+    This makes a blocking request and is only called explicitly (it is never
+    called when building the model graphs).  If the request succeeds, the
+    year range is saved in crop_type_year_ranges and applied as constants
+    when clamping the crop type year, instead of computing the range from the
+    collection aggregates for every image.  Call this function again to
+    refresh the range after new crop type images are added to the collection.
+
+    Parameters
+    ----------
+    crop_type_source : str
+        Crop type image collection ID.
+
+    Returns
+    -------
+    tuple of int (min_year, max_year) or None if the request failed
+
+    """
+    crop_coll = ee.ImageCollection(crop_type_source)
+    year_range = ee.List([
+        ee.Date(crop_coll.aggregate_min('system:time_start')).get('year'),
+        ee.Date(crop_coll.aggregate_max('system:time_start')).get('year'),
+    ])
+    try:
+        output = year_range.getInfo()
+    except ee.EEException as e:
+        # Failures are not saved so the range can be requested again
+        logging.info(f'Crop type year range could not be retrieved: {e}')
+        return None
+    crop_type_year_ranges[crop_type_source] = (int(output[0]), int(output[1]))
+    return crop_type_year_ranges[crop_type_source]
+
+
+def crop_type_image(crop_type_source, year):
+    """Crop type image for a crop type source and year
+
+    Images are cached by source, year, and the loaded collection year range
+    (see load_crop_type_year_range()) so that the same image object is shared
+    by all of the Model objects for a year.
+
+    Parameters
+    ----------
+    crop_type_source : str
+        Crop type source (see Model._crop_type()).
+    year : int
+
+    Returns
+    -------
+    ee.Image
+
+    """
+    return _cached_crop_type_image(
+        crop_type_source, year, tuple(sorted(crop_type_year_ranges.items()))
+    )
+
+
+@lru_cache(maxsize=256)
+def _cached_crop_type_image(crop_type_source, year, year_ranges):
+    """The year ranges are only part of the cache key"""
+    return _crop_type_image(crop_type_source, year)
+
+
+def _crop_type_year(crop_type_source, year, min_year=None):
+    """Clamp the year to the years available in the crop type collection
+
+    If the collection year range was loaded (see load_crop_type_year_range())
+    it is applied as constants, otherwise the range is computed from the
+    collection aggregates.
+
+    """
+    year_range = crop_type_year_ranges.get(crop_type_source)
+    if year_range is not None:
+        coll_min_year, coll_max_year = year_range
+    else:
+        crop_coll = ee.ImageCollection(crop_type_source)
+        coll_min_year = ee.Date(crop_coll.aggregate_min('system:time_start')).get('year')
+        coll_max_year = ee.Date(crop_coll.aggregate_max('system:time_start')).get('year')
+    if min_year is not None:
+        coll_min_year = min_year
+    return ee.Number(year).max(coll_min_year).min(coll_max_year)
+
+
+def _crop_type_image(crop_type_source, year):
+    """Build the crop type image (see Model._crop_type())"""
+    properties = ee.Dictionary()
+
+    if (type(crop_type_source) is str and
+            crop_type_source.upper() == 'USDA/NASS/CDL'):
+        # Assume source is the CDL image collection ID
+        # Use the CDL image closest to the image date
+        # Don't use CDL images before 2008
+        cdl_year = _crop_type_year('USDA/NASS/CDL', year, min_year=2008)
+        cdl_coll = (
+            ee.ImageCollection('USDA/NASS/CDL')
+            .filterDate(ee.Date.fromYMD(cdl_year, 1, 1),
+                        ee.Date.fromYMD(cdl_year.add(1), 1, 1))
+            .select(['cropland'])
+        )
+        crop_type_img = ee.Image(cdl_coll.first())
+        properties = properties.set('id', crop_type_img.get('system:id'))
+    elif (type(crop_type_source) is str and
+            crop_type_source.upper().startswith('USDA/NASS/CDL')):
+        # Assume source is a single CDL image ID
+        crop_type_img = ee.Image(crop_type_source).select(['cropland'])
+        properties = properties.set('id', crop_type_img.get('system:id'))
+    elif (type(crop_type_source) is str and
+          ('projects/openet/crop_type' in crop_type_source.lower() or
+           'projects/openet/assets/crop_type' in crop_type_source.lower())):
+        # Assume source is an OpenET crop type image collection ID
+        # Use the crop type image closest to the image date
+        cdl_year = _crop_type_year(crop_type_source, year)
+        crop_type_coll = (
+            ee.ImageCollection(crop_type_source)
+            .filterDate(ee.Date.fromYMD(cdl_year, 1, 1),
+                        ee.Date.fromYMD(cdl_year.add(1), 1, 1))
+        )
+        crop_type_img = crop_type_coll.mosaic()
+        properties = properties.set('id', crop_type_coll.get('system:id'))
+    # TODO: Support ee.Image and ee.ImageCollection sources
+    # elif isinstance(crop_type_source, computedobject.ComputedObject):
+    else:
+        raise ValueError(f'unsupported crop_type_source: {crop_type_source}')
+
+    # Should the image properties be set onto the image also?
+    return crop_type_img.rename(['crop_type']).set(properties)
@@ -0,0 +1,336 @@
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import math
+import random
+import threading
+import time
+
+from . import utils
+
+# Error message substrings (lower case) of the Earth Engine capacity and
+#   rate limit errors that should be retried
+capacity_error_messages = [
+    'capacity exceeded',
+    'too many concurrent aggregations',
+    'too many requests',
+    'quota exceeded',
+    'rate limit',
+    '429',
+]
+
+GetInfoResult = namedtuple('GetInfoResult', ['value', 'error', 'attempts'])
+GetInfoResult.__doc__ = """Result of one getInfo request
+
+value : the getInfo output (None if the request failed)
+error : the exception of the last attempt (None if the request succeeded)
+attempts : number of requests that were sent (0 for cached results)
+"""
+
+
+class TokenBucket():
+    """Thread safe token bucket rate limiter with an adaptive rate
+
+    The rate is halved after each capacity error (down to min_rate) and is
+    increased by 10% of the initial rate after each successful request (up
+    to the initial rate).
+
+    """
+
+    def __init__(self, rate, burst=None, min_rate=None, clock=time.monotonic):
+        """
+
+        Parameters
+        ----------
+        rate : float
+            Maximum number of requests per second.
+        burst : int, optional
+            Maximum number of requests that can be sent at once after an idle
+            period (the default is the rate rounded up, with a minimum of 1).
+        min_rate : float, optional
+            Minimum adaptive rate (the default is 5% of the rate).
+        clock : callable, optional
+            Monotonic time function in seconds.
+
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate is not None else 0.05 * self.rate
+        self.capacity = float(burst) if burst is not None else max(1.0, math.ceil(rate))
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return the number of seconds to wait before using it
+
+        The token count can go negative so that the waiting requests are
+        scheduled in the order that they reserved their tokens.
+
+        """
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a token is available"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def slow_down(self):
+        with self._lock:
+            self.rate = max(self.min_rate, 0.5 * self.rate)
+
+    def speed_up(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.1 * self.max_rate)
+
+
+def is_capacity_error(error):
+    """Check if an exception is an Earth Engine capacity or rate limit error"""
+    message = str(error).lower()
+    return any(m in message for m in capacity_error_messages)
+
+
+def backoff_delay(attempt, base_delay=1, max_delay=60, rng=random):
+    """Exponential backoff delay with full jitter
+
+    Parameters
+    ----------
+    attempt : int
+        Zero based retry number.
+    base_delay : float, optional
+        Maximum delay of the first retry in seconds (the default is 1).
+    max_delay : float, optional
+        Maximum delay in seconds (the default is 60).
+
+    Returns
+    -------
+    float
+
+    """
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def getinfo_retry(
+        ee_obj,
+        max_retries=5,
+        base_delay=1,
+        max_delay=60,
+        bucket=None,
+        getinfo_fn=None,
+):
+    """Make a getInfo call, retrying capacity errors with jittered backoff
+
+    Capacity and rate limit errors are retried with jittered exponential
+    backoff, while any other error is returned without retrying.  The results
+    are not cached (see utils.getinfo()).
+
+    Parameters
+    ----------
+    ee_obj : ee.ComputedObject
+    max_retries : int, optional
+        Maximum number of retries (the default is 5).
+    base_delay : float, optional
+        Maximum delay of the first retry in seconds (the default is 1).
+    max_delay : float, optional
+        Maximum retry delay in seconds (the default is 60).
+    bucket : TokenBucket, optional
+        Shared rate limiter (the default is to not rate limit the request).
+    getinfo_fn : callable, optional
+        Function that makes the request
+        (the default calls the object getInfo() method).
+
+    Returns
+    -------
+    GetInfoResult
+
+    """
+    retry_args = {'max_retries': max_retries, 'base_delay': base_delay, 'max_delay': max_delay}
+    attempt = 0
+    while True:
+        if bucket is not None:
+            bucket.acquire()
+        try:
+            value = _getinfo(ee_obj, getinfo_fn)
+        except Exception as e:
+            delay = _retry_delay(e, attempt, bucket, **retry_args)
+            if delay is None:
+                return GetInfoResult(None, e, attempt + 1)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        if bucket is not None:
+            bucket.speed_up()
+        return GetInfoResult(value, None, attempt + 1)
+
+
+def getinfo_many(
+        ee_objs,
+        max_workers=8,
+        rate=10,
+        burst=None,
+        max_retries=5,
+        base_delay=1,
+        max_delay=60,
+        getinfo_fn=None,
+):
+    """Make concurrent getInfo calls on many Earth Engine objects
+
+    The requests are sent from a bounded thread pool and are rate limited with
+    a shared token bucket.  Capacity and rate limit errors are retried with
+    jittered exponential backoff (and the shared rate is reduced), while any
+    other error is returned for the item without retrying.  Cached results
+    are used if the utils.getinfo() cache is enabled.
+
+    Parameters
+    ----------
+    ee_objs : list
+        Earth Engine objects (or any objects with a getInfo() method).
+    max_workers : int, optional
+        Maximum number of concurrent requests (the default is 8).
+    rate : float, optional
+        Maximum number of requests per second (the default is 10).
+        If None, the requests are not rate limited.
+    burst : int, optional
+        Token bucket size (see TokenBucket).
+    max_retries : int, optional
+        Maximum number of retries of each request (the default is 5).
+    base_delay : float, optional
+        Maximum delay of the first retry in seconds (the default is 1).
+    max_delay : float, optional
+        Maximum retry delay in seconds (the default is 60).
+    getinfo_fn : callable, optional
+        Function that makes the request for one object
+        (the default calls the object getInfo() method).
+
+    Returns
+    -------
+    list of GetInfoResult in the same order as ee_objs
+
+    """
+    ee_objs = list(ee_objs)
+    if not ee_objs:
+        return []
+    bucket = TokenBucket(rate, burst=burst) if rate is not None else None
+
+    def request(ee_obj):
+        hit, value = _cache_get(ee_obj)
+        if hit:
+            return GetInfoResult(value, None, 0)
+        result = getinfo_retry(
+            ee_obj, max_retries=max_retries, base_delay=base_delay, max_delay=max_delay,
+            bucket=bucket, getinfo_fn=getinfo_fn,
+        )
+        _cache_set(ee_obj, result.value)
+        return result
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ee_objs))) as executor:
+        return list(executor.map(request, ee_objs))
+
+
+async def getinfo_many_async(
+        ee_objs,
+        max_workers=8,
+        rate=10,
+        burst=None,
+        max_retries=5,
+        base_delay=1,
+        max_delay=60,
+        getinfo_fn=None,
+):
+    """Asyncio version of getinfo_many()
+
+    The blocking getInfo calls and the cache reads and writes are run in a
+    thread pool and the rate limiting and backoff waits do not block the
+    event loop.  See getinfo_many() for
+    the parameter descriptions.
+
+    Returns
+    -------
+    list of GetInfoResult in the same order as ee_objs
+
+    """
+    ee_objs = list(ee_objs)
+    if not ee_objs:
+        return []
+    bucket = TokenBucket(rate, burst=burst) if rate is not None else None
+    retry_args = {'max_retries': max_retries, 'base_delay': base_delay, 'max_delay': max_delay}
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def request(ee_obj, executor):
+        hit, value = await loop.run_in_executor(executor, _cache_get, ee_obj)
+        if hit:
+            return GetInfoResult(value, None, 0)
+        attempt = 0
+        async with semaphore:
+            while True:
+                if bucket is not None:
+                    await bucket.acquire_async()
+                try:
+                    value = await loop.run_in_executor(executor, _getinfo, ee_obj, getinfo_fn)
+                except Exception as e:
+                    delay = _retry_delay(e, attempt, bucket, **retry_args)
+                    if delay is None:
+                        return GetInfoResult(None, e, attempt + 1)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                if bucket is not None:
+                    bucket.speed_up()
+                await loop.run_in_executor(executor, _cache_set, ee_obj, value)
+                return GetInfoResult(value, None, attempt + 1)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ee_objs))) as executor:
+        return list(await asyncio.gather(*[request(obj, executor) for obj in ee_objs]))
+
+
+def _getinfo(ee_obj, getinfo_fn=None):
+    if getinfo_fn is not None:
+        return getinfo_fn(ee_obj)
+    return ee_obj.getInfo()
+
+
+def _retry_delay(error, attempt, bucket, max_retries, base_delay, max_delay):
+    """Backoff delay for a failed request, or None if it should not be retried"""
+    if attempt >= max_retries or not is_capacity_error(error):
+        return None
+    logging.info(f'    Resending query ({attempt + 1}/{max_retries})')
+    logging.info(f'    {error}')
+    if bucket is not None:
+        bucket.slow_down()
+    return backoff_delay(attempt, base_delay=base_delay, max_delay=max_delay)
+
+
+def _cache_get(ee_obj):
+    cache = utils.getinfo_cache
+    if cache is None:
+        return False, None
+    return cache.get(cache.key(ee_obj))
+
+
+def _cache_set(ee_obj, value):
+    cache = utils.getinfo_cache
+    if cache is None or value is None:
+        return
+    try:
+        cache.set(cache.key(ee_obj), value)
+    except Exception as e:
+        logging.info(f'    getinfo result could not be cached: {e}')
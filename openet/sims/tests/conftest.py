@@ -5,20 +5,73 @@ import os
 import ee
 import pytest
 
+from openet.sims import ee_replay
+
+recorder_key = pytest.StashKey()
+
 
 @pytest.fixture(scope="session", autouse=True)
-def test_init():
+def test_init(request):
     logging.basicConfig(level=logging.DEBUG, format='%(message)s')
     logging.getLogger('googleapiclient').setLevel(logging.ERROR)
     logging.debug('Test Setup')
 
-    # For GitHub Actions authenticate using private key environment variable
-    if 'EE_PRIVATE_KEY_B64' in os.environ:
-        print('Writing privatekey.json from environmental variable ...')
-        content = base64.b64decode(os.environ['EE_PRIVATE_KEY_B64']).decode('ascii')
-        EE_KEY_FILE = 'privatekey.json'
-        with open(EE_KEY_FILE, 'w') as f:
-            f.write(content)
-        ee.Initialize(ee.ServiceAccountCredentials('', key_file=EE_KEY_FILE))
+    # The --ee-* options are registered in the repository root conftest.py
+    ee_mode = request.config.getoption('--ee-mode')
+    ee_fixtures = request.config.getoption('--ee-fixtures')
+    if ee_mode == 'replay':
+        ee_replay.offline_initialize(
+            algorithms_path=os.path.join(ee_fixtures, ee_replay.ALGORITHMS_FILE))
     else:
-        ee.Initialize()
+        # For GitHub Actions authenticate using private key environment variable
+        if 'EE_PRIVATE_KEY_B64' in os.environ:
+            print('Writing privatekey.json from environmental variable ...')
+            content = base64.b64decode(os.environ['EE_PRIVATE_KEY_B64']).decode('ascii')
+            EE_KEY_FILE = 'privatekey.json'
+            with open(EE_KEY_FILE, 'w') as f:
+                f.write(content)
+            ee.Initialize(ee.ServiceAccountCredentials('', key_file=EE_KEY_FILE))
+        else:
+            ee.Initialize()
+
+    if ee_mode == 'live':
+        yield
+    else:
+        if ee_mode == 'record':
+            # Replay builds the graphs with the same (server) definitions
+            ee_replay.save_algorithms(ee_fixtures)
+        with ee_replay.Recorder(ee_fixtures, mode=ee_mode) as recorder:
+            request.config.stash[recorder_key] = recorder
+            yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Report the tests that stopped on an unrecorded response as skipped
+
+    This is only done in replay mode with the (local only) "--ee-missing skip"
+    option.  A change to the model that changes a request also changes its
+    key, so that test is skipped too and the count of missing responses is
+    reported at the end of the run.  Failures that are not raised as a
+    ReplayMissingError (for example the errors returned by
+    request_pool.getinfo_many) are not skipped.
+
+    """
+    outcome = yield
+    if (call.when != 'call' or call.excinfo is None or
+            item.config.getoption('--ee-missing') != 'skip' or
+            not call.excinfo.errisinstance(ee_replay.ReplayMissingError)):
+        return
+    report = outcome.get_result()
+    report.outcome = 'skipped'
+    report.longrepr = (
+        str(item.path), item.location[1] or 0,
+        'Skipped: no recorded Earth Engine response')
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    recorder = config.stash.get(recorder_key, None)
+    if recorder is not None and recorder.mode == 'replay' and recorder.missing:
+        terminalreporter.write_line(
+            f'{recorder.missing} Earth Engine request(s) had no recorded response '
+            f'(record them again with --ee-mode record)', yellow=True)
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import ee
+import pytest
+
+from openet.sims.cache import DiskCache
+
+
+def test_DiskCache_key():
+    assert DiskCache.key(ee.Number(1)) == DiskCache.key(ee.Number(1))
+    assert DiskCache.key(ee.Number(1)) != DiskCache.key(ee.Number(2))
+    assert len(DiskCache.key(ee.Number(1))) == 64
+
+
+def test_DiskCache_get_set(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    assert cache.get('abcd') == (False, None)
+    cache.set('abcd', {'foo': [1, 2.5, None]})
+    assert cache.get('abcd') == (True, {'foo': [1, 2.5, None]})
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'writes': 1, 'evictions': 0}
+
+
+def test_DiskCache_shared(tmp_path):
+    """Check that the entries are shared by caches using the same folder"""
+    DiskCache(str(tmp_path)).set('abcd', 1)
+    assert DiskCache(str(tmp_path)).get('abcd') == (True, 1)
+
+
+@pytest.mark.parametrize('ttl', [-1, 0.0001])
+def test_DiskCache_ttl_expired(tmp_path, ttl):
+    cache = DiskCache(str(tmp_path))
+    cache.set('abcd', 1, ttl=ttl)
+    time.sleep(0.01)
+    assert cache.get('abcd') == (False, None)
+    assert not os.path.isfile(cache._file_path('abcd'))
+
+
+def test_DiskCache_default_ttl(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=-1)
+    cache.set('abcd', 1)
+    cache.set('efgh', 1, ttl=3600)
+    assert cache.get('abcd') == (False, None)
+    assert cache.get('efgh') == (True, 1)
+
+
+def test_DiskCache_evict_lru(tmp_path):
+    cache = DiskCache(str(tmp_path), max_size=1000)
+    for i, key in enumerate(['aa01', 'bb02', 'cc03']):
+        cache.set(key, 'x' * 200)
+        # Set the access times explicitly since the file times may be coarse
+        os.utime(cache._file_path(key), (1000 + i, 1000 + i))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get('aa01')[0]
+    cache.set('dd04', 'x' * 400)
+    assert cache.get('bb02') == (False, None)
+    assert cache.get('aa01')[0]
+    assert cache.get('dd04')[0]
+    assert cache.evictions >= 1
+
+
+def test_DiskCache_evict_high_water(tmp_path, monkeypatch):
+    """Check that the folder is only scanned when the size exceeds max_size"""
+    cache = DiskCache(str(tmp_path), max_size=1000, low_water=0.5)
+    cache.set('aa01', 'x' * 100)
+    scans = []
+    monkeypatch.setattr(cache, 'evict', lambda f=cache.evict: scans.append(1) or f())
+    for key in ['bb02', 'cc03', 'dd04', 'ee05']:
+        cache.set(key, 'x' * 100)
+    assert scans == []
+    for key in ['ff06', 'gg07', 'hh08']:
+        cache.set(key, 'x' * 100)
+    assert len(scans) == 1
+    # The oldest entries are removed down to the low water size, which leaves
+    #   room for more writes before the next scan
+    assert cache.evictions >= 3
+    assert cache.get('aa01') == (False, None)
+    assert cache.get('hh08')[0]
+    assert cache._size <= 1000
+
+
+def test_DiskCache_low_water_exception(tmp_path):
+    with pytest.raises(ValueError):
+        DiskCache(str(tmp_path), low_water=0)
+
+
+def test_DiskCache_threads(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set('abcd', 1)
+
+    def read():
+        for i in range(200):
+            cache.get('abcd')
+            cache.get('efgh')
+
+    threads = [threading.Thread(target=read) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.stats()['hits'] == 1600
+    assert cache.stats()['misses'] == 1600
+
+
+def test_DiskCache_clear(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set('abcd', 1)
+    cache.clear()
+    assert cache.get('abcd') == (False, None)
@@ -0,0 +1,81 @@
+import ee
+import pytest
+
+from openet.sims import ee_replay
+
+
+@pytest.fixture
+def live_compute_value(monkeypatch):
+    """Stand in for the Earth Engine server that counts the requests"""
+    requests = []
+
+    def compute_value(ee_obj):
+        requests.append(ee_obj)
+        if 'Image.load' in ee_obj.serialize():
+            raise ee.EEException('Image.load: Image asset not found.')
+        return len(requests)
+
+    monkeypatch.setattr(ee.data, 'computeValue', compute_value)
+    return requests
+
+
+def test_Recorder_record_replay(tmp_path, live_compute_value):
+    with ee_replay.Recorder(str(tmp_path), mode='record') as recorder:
+        assert ee.Number(1).add(1).getInfo() == 1
+        assert ee.Number(2).add(1).getInfo() == 2
+    assert recorder.recorded == 2
+
+    with ee_replay.Recorder(str(tmp_path), mode='replay') as recorder:
+        assert ee.Number(2).add(1).getInfo() == 2
+        assert ee.Number(1).add(1).getInfo() == 1
+    assert recorder.replayed == 2
+    assert len(live_compute_value) == 2
+
+
+def test_Recorder_replay_error(tmp_path, live_compute_value):
+    image_size = ee.Image('deadbeef').bandNames().size()
+    with ee_replay.Recorder(str(tmp_path), mode='record'):
+        with pytest.raises(ee.EEException):
+            image_size.getInfo()
+    with ee_replay.Recorder(str(tmp_path), mode='replay'):
+        with pytest.raises(ee.EEException, match='Image asset not found'):
+            image_size.getInfo()
+    assert len(live_compute_value) == 1
+
+
+def test_Recorder_replay_missing(tmp_path, live_compute_value):
+    with ee_replay.Recorder(str(tmp_path), mode='replay'):
+        with pytest.raises(ee_replay.ReplayMissingError):
+            ee.Number(1).add(1).getInfo()
+    assert len(live_compute_value) == 0
+
+
+def test_Recorder_missing_count(tmp_path, live_compute_value):
+    with ee_replay.Recorder(str(tmp_path), mode='replay') as recorder:
+        for i in range(2):
+            with pytest.raises(ee_replay.ReplayMissingError):
+                ee.Number(i).add(1).getInfo()
+    assert recorder.missing == 2
+
+
+def test_Recorder_uninstall(tmp_path, live_compute_value):
+    compute_value = ee.data.computeValue
+    with ee_replay.Recorder(str(tmp_path)):
+        assert ee.data.computeValue is not compute_value
+    assert ee.data.computeValue is compute_value
+
+
+def test_Recorder_mode_exception(tmp_path):
+    with pytest.raises(ValueError):
+        ee_replay.Recorder(str(tmp_path), mode='deadbeef')
+
+
+def test_save_use_algorithms(tmp_path, monkeypatch):
+    algorithms = {'algorithms/Number.add': {'returns': 'Number', 'args': []}}
+    monkeypatch.setattr(ee.data, 'getAlgorithms', lambda: algorithms)
+    file_path = ee_replay.save_algorithms(str(tmp_path))
+    assert file_path == str(tmp_path / ee_replay.ALGORITHMS_FILE)
+
+    monkeypatch.setattr(ee.data, 'getAlgorithms', lambda: {})
+    ee_replay.use_algorithms(file_path)
+    assert ee.data.getAlgorithms() == algorithms
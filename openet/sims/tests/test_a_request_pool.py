@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+
+import ee
+import pytest
+
+from openet.sims import request_pool
+from openet.sims import utils
+
+
+class StubObject():
+    """Local stand in for an Earth Engine object with injected latency and errors"""
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def __init__(self, value, latency=0.0, errors=()):
+        self.value = value
+        self.latency = latency
+        self.errors = list(errors)
+        self.calls = 0
+
+    def serialize(self):
+        return f'{{"constantValue": {self.value}}}'
+
+    def getInfo(self):
+        with StubObject.lock:
+            StubObject.active += 1
+            StubObject.max_active = max(StubObject.max_active, StubObject.active)
+        try:
+            self.calls += 1
+            time.sleep(self.latency)
+            if self.errors:
+                raise self.errors.pop(0)
+            return self.value
+        finally:
+            with StubObject.lock:
+                StubObject.active -= 1
+
+
+def capacity_error():
+    return ee.EEException('Earth Engine memory capacity exceeded.')
+
+
+@pytest.fixture
+def stub_counter():
+    StubObject.active = 0
+    StubObject.max_active = 0
+
+
+FAST_ARGS = {'rate': None, 'base_delay': 0.001, 'max_delay': 0.01}
+
+
+def test_getinfo_many_order(stub_counter):
+    # Later items finish first
+    objs = [StubObject(i, latency=0.02 * (5 - i)) for i in range(5)]
+    output = request_pool.getinfo_many(objs, max_workers=5, **FAST_ARGS)
+    assert [r.value for r in output] == list(range(5))
+    assert all(r.error is None and r.attempts == 1 for r in output)
+
+
+def test_getinfo_many_max_workers(stub_counter):
+    objs = [StubObject(i, latency=0.02) for i in range(12)]
+    request_pool.getinfo_many(objs, max_workers=3, **FAST_ARGS)
+    assert 1 < StubObject.max_active <= 3
+
+
+def test_getinfo_many_capacity_retry(stub_counter):
+    obj = StubObject(1, errors=[capacity_error(), capacity_error()])
+    output = request_pool.getinfo_many([obj], **FAST_ARGS)
+    assert output[0] == (1, None, 3)
+
+
+def test_getinfo_many_max_retries(stub_counter):
+    obj = StubObject(1, errors=[capacity_error()] * 5)
+    output = request_pool.getinfo_many([obj], max_retries=2, **FAST_ARGS)
+    assert output[0].value is None
+    assert request_pool.is_capacity_error(output[0].error)
+    assert output[0].attempts == 3
+
+
+def test_getinfo_many_other_errors_not_retried(stub_counter):
+    """Non capacity errors are returned for the item and do not stop the others"""
+    objs = [StubObject(1, errors=[ee.EEException('Image.load: Asset not found')]),
+            StubObject(2, errors=[ValueError('bad value')]),
+            StubObject(3)]
+    output = request_pool.getinfo_many(objs, **FAST_ARGS)
+    assert [r.attempts for r in output] == [1, 1, 1]
+    assert isinstance(output[0].error, ee.EEException)
+    assert isinstance(output[1].error, ValueError)
+    assert output[2].value == 3
+
+
+def test_getinfo_retry(stub_counter):
+    obj = StubObject(1, errors=[capacity_error()])
+    output = request_pool.getinfo_retry(obj, base_delay=0.001, max_delay=0.01)
+    assert output == (1, None, 2)
+
+
+def test_getinfo_many_getinfo_fn():
+    output = request_pool.getinfo_many([1, 2], getinfo_fn=lambda x: 10 * x, **FAST_ARGS)
+    assert [r.value for r in output] == [10, 20]
+
+
+def test_getinfo_many_empty():
+    assert request_pool.getinfo_many([]) == []
+
+
+def test_getinfo_many_async(stub_counter):
+    objs = [StubObject(i, latency=0.02 * (5 - i)) for i in range(5)]
+    objs[1].errors = [capacity_error()]
+    objs[2].errors = [ValueError('bad value')]
+    output = asyncio.run(request_pool.getinfo_many_async(objs, max_workers=2, **FAST_ARGS))
+    assert [r.value for r in output] == [0, 1, None, 3, 4]
+    assert output[1].attempts == 2
+    assert isinstance(output[2].error, ValueError)
+    assert StubObject.max_active <= 2
+
+
+def test_TokenBucket_rate():
+    clock = [0.0]
+    bucket = request_pool.TokenBucket(rate=2, burst=2, clock=lambda: clock[0])
+    assert [bucket.reserve() for i in range(4)] == [0, 0, 0.5, 1.0]
+    clock[0] = 10.0
+    assert bucket.reserve() == 0
+
+
+def test_TokenBucket_adaptive():
+    bucket = request_pool.TokenBucket(rate=10, min_rate=2)
+    bucket.slow_down()
+    assert bucket.rate == 5
+    bucket.slow_down()
+    bucket.slow_down()
+    assert bucket.rate == 2
+    for i in range(20):
+        bucket.speed_up()
+    assert bucket.rate == 10
+
+
+def test_TokenBucket_rate_exception():
+    with pytest.raises(ValueError):
+        request_pool.TokenBucket(rate=0)
+
+
+@pytest.mark.parametrize('attempt, expected', [[0, 1], [3, 8], [10, 60]])
+def test_backoff_delay(attempt, expected):
+    class MaxRandom():
+        @staticmethod
+        def uniform(a, b):
+            return b
+    assert request_pool.backoff_delay(attempt, 1, 60, rng=MaxRandom) == expected
+
+
+@pytest.mark.parametrize(
+    'message, expected',
+    [
+        ['Earth Engine capacity exceeded.', True],
+        ['Too many concurrent aggregations.', True],
+        ['Quota exceeded for quota metric', True],
+        ['Image.load: Image asset not found.', False],
+    ]
+)
+def test_is_capacity_error(message, expected):
+    assert request_pool.is_capacity_error(ee.EEException(message)) == expected
+
+
+def test_getinfo_many_async_cache_thread(tmp_path, stub_counter, monkeypatch):
+    """Check that the cache is read and written off the event loop thread"""
+    cache = utils.enable_getinfo_cache(str(tmp_path))
+    threads = []
+    for name in ['get', 'set']:
+        monkeypatch.setattr(
+            cache, name,
+            lambda *args, f=getattr(cache, name), **kwargs:
+                threads.append(threading.current_thread()) or f(*args, **kwargs)
+        )
+    try:
+        objs = [StubObject(i) for i in range(3)]
+        output = asyncio.run(request_pool.getinfo_many_async(objs, **FAST_ARGS))
+        output = asyncio.run(request_pool.getinfo_many_async(objs, **FAST_ARGS))
+    finally:
+        utils.disable_getinfo_cache()
+    assert [r.attempts for r in output] == [0, 0, 0]
+    assert len(threads) == 9
+    assert threading.main_thread() not in threads
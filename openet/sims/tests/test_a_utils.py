@@ -4,6 +4,7 @@ import datetime
 import ee
 import pytest
 
+import openet.sims.request_pool as request_pool
 import openet.sims.utils as utils
 
 
@@ -111,3 +112,93 @@ def test_valid_date():
     assert utils.valid_date('20150713') is False
     assert utils.valid_date('07/13/2015') is False
     assert utils.valid_date('07-13-2015', '%m-%d-%Y') is True
+
+
+class CountingObject():
+    """Stand in for an Earth Engine object that counts the getInfo calls"""
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def serialize(self):
+        return f'{{"constantValue": {self.value}}}'
+
+    def getInfo(self):
+        self.calls += 1
+        return self.value
+
+
+def test_getinfo_cache(tmp_path):
+    cache = utils.enable_getinfo_cache(str(tmp_path))
+    try:
+        ee_obj = CountingObject(10)
+        assert utils.getinfo(ee_obj) == 10
+        assert utils.getinfo(ee_obj) == 10
+        assert ee_obj.calls == 1
+        # A new process (or object) with the same expression reads the cache
+        assert utils.getinfo(CountingObject(10)) == 10
+        assert cache.stats()['hits'] == 2
+    finally:
+        utils.disable_getinfo_cache()
+
+
+def test_getinfo_cache_ttl_bypass(tmp_path):
+    utils.enable_getinfo_cache(str(tmp_path))
+    try:
+        ee_obj = CountingObject(10)
+        utils.getinfo(ee_obj, cache_ttl=0)
+        utils.getinfo(ee_obj, cache_ttl=0)
+        assert ee_obj.calls == 2
+    finally:
+        utils.disable_getinfo_cache()
+
+
+def test_getinfo_cache_disabled():
+    ee_obj = CountingObject(10)
+    utils.getinfo(ee_obj)
+    utils.getinfo(ee_obj)
+    assert ee_obj.calls == 2
+
+
+class ErrorObject(CountingObject):
+    """Stand in for an Earth Engine object that raises the listed errors first"""
+    def __init__(self, value, errors):
+        super().__init__(value)
+        self.errors = list(errors)
+
+    def getInfo(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.value
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(request_pool, 'backoff_delay', lambda *args, **kwargs: 0)
+
+
+def test_getinfo_capacity_retry(no_backoff):
+    ee_obj = ErrorObject(10, [ee.EEException('Too many concurrent aggregations.')] * 2)
+    assert utils.getinfo(ee_obj) == 10
+    assert ee_obj.calls == 3
+
+
+def test_getinfo_capacity_attempts(no_backoff):
+    ee_obj = ErrorObject(10, [ee.EEException('Too many concurrent aggregations.')] * 4)
+    assert utils.getinfo(ee_obj) is None
+    assert ee_obj.calls == 3
+    ee_obj = ErrorObject(10, [ee.EEException('Too many concurrent aggregations.')] * 4)
+    assert utils.getinfo(ee_obj, n=2) is None
+    assert ee_obj.calls == 1
+
+
+def test_getinfo_ee_error_not_retried(no_backoff):
+    ee_obj = ErrorObject(10, [ee.EEException('Image.load: Asset not found')])
+    assert utils.getinfo(ee_obj) is None
+    assert ee_obj.calls == 1
+
+
+def test_getinfo_other_error_raised(no_backoff):
+    with pytest.raises(ValueError):
+        utils.getinfo(ErrorObject(10, [ValueError('bad value')]))
@@ -0,0 +1,482 @@
+import numpy as np
+import pytest
+
+import openet.sims.array_model as array_model
+import openet.sims.data as data
+
+DOY = 197
+
+
+def default_model_obj(
+        crop_type=1,
+        doy=DOY,
+        crop_type_remap='CDL',
+        crop_type_kc_flag=False,
+        crop_type_annual_skip_flag=False,
+        mask_non_ag_flag=False,
+        water_kc_flag=True,
+        reflectance_type='SR',
+        ):
+    return array_model.ArrayModel(
+        crop_type=crop_type,
+        doy=doy,
+        crop_type_remap=crop_type_remap,
+        crop_type_kc_flag=crop_type_kc_flag,
+        crop_type_annual_skip_flag=crop_type_annual_skip_flag,
+        mask_non_ag_flag=mask_non_ag_flag,
+        water_kc_flag=water_kc_flag,
+        reflectance_type=reflectance_type,
+    )
+
+
+def test_crop_data_array():
+    output = array_model.crop_data_array(
+        param_name='crop_class', crop_type=9, crop_data={9: {'crop_class': 10}}
+    )
+    assert output == 10
+
+
+def test_crop_data_array_int_scalar():
+    output = array_model.crop_data_array(
+        param_name='m_l', crop_type=9, crop_data={9: {'m_l': 0.01}}
+    )
+    assert output == 0.01
+
+
+def test_crop_data_array_default_value():
+    output = array_model.crop_data_array(
+        param_name='crop_class', crop_type=[-999, 300, 9],
+        crop_data={9: {'crop_class': 10}}, default_value=100,
+    )
+    assert list(output) == [100, 100, 10]
+
+
+def test_crop_data_array_default_nodata():
+    output = array_model.crop_data_array(
+        param_name='crop_class', crop_type=[-999, np.nan],
+        crop_data={9: {'crop_class': 10}},
+    )
+    assert np.isnan(output).all()
+
+
+def test_crop_data_array_nodata_crop_type():
+    output = array_model.crop_data_array(
+        param_name='crop_class', crop_type=np.nan,
+        crop_data={9: {'crop_class': 10}}, default_value=0,
+    )
+    assert np.isnan(output)
+
+
+def test_ArrayModel_crop_data_remap_exception():
+    with pytest.raises(ValueError):
+        default_model_obj(crop_type_remap='FOO')
+
+
+@pytest.mark.parametrize(
+    'crop_type, expected',
+    [[1, 1], [69, 2], [66, 3], [3, 5], [61, 6], [176, 7], [0, 0]]
+)
+def test_ArrayModel_crop_class(crop_type, expected):
+    assert default_model_obj(crop_type=crop_type).crop_class == expected
+
+
+@pytest.mark.parametrize(
+    'ndvi, expected',
+    [[-0.2, 0.0], [0.2, 0.072], [0.5, 0.45], [0.8, 0.828], [0.95, 1.0]]
+)
+def test_ArrayModel_fc_reflectance_type_sr(ndvi, expected, tol=0.0001):
+    m = default_model_obj(reflectance_type='SR')
+    assert abs(m.fc(ndvi) - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'ndvi, expected',
+    [[-0.2, 0.0], [0.1, 0.0075], [0.35, 0.37375], [0.7, 0.8865], [0.95, 1.0]]
+)
+def test_ArrayModel_fc_reflectance_type_toa(ndvi, expected, tol=0.0001):
+    m = default_model_obj(reflectance_type='TOA')
+    assert abs(m.fc(ndvi) - expected) <= tol
+
+
+def test_ArrayModel_fc_reflectance_type_exception():
+    with pytest.raises(ValueError):
+        default_model_obj(reflectance_type='FOO').fc(0.2)
+
+
+@pytest.mark.parametrize(
+    'ndvi, fc, expected',
+    [
+        [-0.1, 0.0, 1.05],
+        [0.14, 0.0661, 1.05],
+        [0.142, 0, 0.15],
+        [0.5, 0.45, 0.6855],
+        [0.8, 0.828, 0.9860],
+    ]
+)
+def test_ArrayModel_kc_rice(ndvi, fc, expected, tol=0.0001):
+    m = default_model_obj(crop_type=3)
+    assert abs(m.kc_rice(np.array(fc), np.array(ndvi)) - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'ndvi, fc, expected',
+    [
+        [-0.1, 0.0, 0.01],
+        [0.2, 0.154, 0.154],
+        [0.351, 0.37375, 0.6084],
+        [0.8, 1.0, 1.0776],
+    ]
+)
+def test_ArrayModel_kc_fallow(ndvi, fc, expected, tol=0.0001):
+    m = default_model_obj(crop_type=61)
+    assert abs(m.kc_fallow(np.array(fc), np.array(ndvi)) - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'fc, expected',
+    [[0.0, 0.0], [0.1, 0.1668], [0.45, 0.7051], [0.8, 0.9283], [1.0, 1.0], [1.1, 1.0]]
+)
+def test_ArrayModel_kd_row_crop(fc, expected, tol=0.0001):
+    m = default_model_obj(crop_type=1)
+    assert abs(m._kd_row_crop(np.array(fc)) - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'fc, expected',
+    [[0.0, 0.0], [0.45, 0.675], [0.6, 0.8434], [1.0, 1.0], [1.1, 1.0]]
+)
+def test_ArrayModel_kd_vine(fc, expected, tol=0.0001):
+    m = default_model_obj(crop_type=69)
+    assert abs(m._kd_vine(np.array(fc)) - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'fc, expected',
+    [[0.0, 0.0], [0.4, 0.7368], [0.5, 0.7937], [0.6, 0.8801], [1.1, 1.0]]
+)
+def test_ArrayModel_kd_tree(fc, expected, tol=0.0001):
+    m = default_model_obj(crop_type=66)
+    assert abs(m._kd_tree(np.array(fc)) - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'kd, doy, h_max, expected',
+    [
+        [1, 250, 3, min(3 * 0.1 + 1, 1.2) * 0.95],
+        [1, 285, 3, min(3 * 0.1 + 1, 1.2) * 0.85],
+        [1, 320, 3, min(3 * 0.1 + 1, 1.2) * 0.75],
+        [0.5, 285, 3, 0.5 * (1.2 * 0.85 - 0.15) + 0.15],
+    ]
+)
+def test_ArrayModel_kcb(kd, doy, h_max, expected, tol=0.0001):
+    m = default_model_obj(crop_type=66, doy=doy)
+    m.h_max = np.array(h_max)
+    m.fr_mid = np.array(0.95)
+    m.fr_end = np.array(0.75)
+    m.ls_start = np.array(270)
+    m.ls_stop = np.array(300)
+    assert abs(m._kcb(np.array(kd)) - expected) <= tol
+
+
+def test_ArrayModel_kc_crop_class_2_clamping():
+    m = default_model_obj(crop_type=78)
+    assert m.kc(0.85) == 1.1
+
+
+@pytest.mark.parametrize(
+    'crop_type, ndvi, water_kc_flag, expected',
+    [
+        [0, -0.2, False, 0.0],
+        [0, -0.2, True, 1.05],
+        [1, -0.2, True, 0.15],
+    ]
+)
+def test_ArrayModel_kc_water_kc_flag(crop_type, ndvi, water_kc_flag, expected):
+    m = default_model_obj(crop_type=crop_type, water_kc_flag=water_kc_flag)
+    assert m.kc(ndvi) == expected
+
+
+def test_ArrayModel_kc_mask_non_ag_flag():
+    m = default_model_obj(crop_type=np.array([0, 1]), mask_non_ag_flag=True)
+    output = m.kc(np.array([0.5, 0.5]))
+    assert np.isnan(output[0])
+    assert np.isfinite(output[1])
+
+
+def test_ArrayModel_kc_nodata_ndvi():
+    m = default_model_obj(crop_type=np.array([0, 1, 3, 61]))
+    assert np.isnan(m.kc(np.full(4, np.nan))).all()
+
+
+@pytest.mark.parametrize(
+    'crop_type_kc_flag, crop_type_annual_skip_flag',
+    [[False, False], [True, False], [False, True], [True, True]]
+)
+def test_ArrayModel_kc_crop_type_kc_class_1(crop_type_kc_flag, crop_type_annual_skip_flag):
+    m = default_model_obj(
+        crop_type=1, crop_type_kc_flag=crop_type_kc_flag,
+        crop_type_annual_skip_flag=crop_type_annual_skip_flag
+    )
+    output = m.kc(0.5)
+    if crop_type_kc_flag and not crop_type_annual_skip_flag:
+        assert output == m._kcb(m._kd_row_crop(m.fc(0.5)))
+    else:
+        assert output == m.kc_row_crop(m.fc(0.5))
+
+
+def ndvi_to_kc_point(ndvi, doy, crop_type):
+    crop_profile = data.cdl[crop_type]
+
+    fc = min(max((1.26 * ndvi) - 0.18, 0), 1)
+    if crop_profile['crop_class'] == 1:
+        h = crop_profile['h_max'] * min((fc / 0.7), 1)
+        fr = 1.0
+    elif crop_profile['crop_class'] == 3 or crop_profile['crop_class'] == 2:
+        if doy < crop_profile['ls_start']:
+            fr = crop_profile['fr_mid']
+        elif crop_profile['ls_start'] <= doy and doy <= crop_profile['ls_stop']:
+            fr = crop_profile["fr_mid"] - (
+                (doy - crop_profile["ls_start"])
+                / (crop_profile["ls_stop"] - crop_profile["ls_start"])
+                * (crop_profile["fr_mid"] - crop_profile["fr_end"])
+            )
+        elif doy > crop_profile['ls_stop']:
+            fr = crop_profile['fr_end']
+
+        if crop_profile['crop_class'] == 3:
+            if fc > 0.5:
+                h = crop_profile['h_max']
+            else:
+                h = crop_profile['h_max'] - 1
+        elif crop_profile['crop_class'] == 2:
+            h = crop_profile['h_max']
+    else:
+        return -1
+
+    kd = min(1, crop_profile['m_l'] * fc, fc ** (1 / (1 + h)))
+    kcb_full = fr * min(1 + (0.1 * crop_profile['h_max']), 1.2)
+    kc_min = 0.15
+    kcb = kc_min + kd * (kcb_full - kc_min)
+
+    if crop_profile['crop_class'] == 2:
+        kcb = min(kcb, 1.1)
+    elif crop_profile['crop_class'] == 3:
+        kcb = min(kcb, 1.2)
+
+    return kcb
+
+
+@pytest.mark.parametrize('doy', [200, 250, 300, 301])
+def test_ArrayModel_kc_array(doy, tol=0.0001):
+    """Check that a multi crop type array matches the point calculation"""
+    crop_types = [1, 2, 69, 75]
+    ndvi_values = [0.1, 0.5, 1.0]
+    crop_type, ndvi = np.meshgrid(crop_types, ndvi_values)
+    m = default_model_obj(crop_type=crop_type, doy=doy, crop_type_kc_flag=True)
+    output = m.kc(ndvi)
+    assert output.shape == (len(ndvi_values), len(crop_types))
+    for (i, j), value in np.ndenumerate(output):
+        expected = ndvi_to_kc_point(ndvi[i, j], doy, crop_type[i, j])
+        assert abs(value - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'model_args',
+    [{}, {'kc_dispatch_flag': True}, {'jit_flag': True}, {'kc_lut_flag': True}]
+)
+def test_ArrayModel_kc_doy_time_axis(model_args):
+    """Check that a day of year time axis matches the single day calculation"""
+    crop_type = np.array([[1, 69], [75, 176]])
+    doy = np.array([150, 200, 250, 300])
+    ndvi = np.random.default_rng(0).uniform(0, 1, size=(doy.size,) + crop_type.shape)
+    args = {'crop_type': crop_type, 'crop_type_kc_flag': True, **model_args}
+    output = array_model.ArrayModel(doy=doy[:, None, None], **args).kc(ndvi)
+    assert output.shape == ndvi.shape
+    for i, day in enumerate(doy):
+        expected = array_model.ArrayModel(doy=day, **args).kc(ndvi[i])
+        np.testing.assert_array_equal(output[i], expected)
+
+
+@pytest.mark.parametrize(
+    'param_name, default_value',
+    [
+        ['crop_class', 0], ['h_max', None], ['m_l', None], ['fr_mid', 1],
+        ['fr_end', 1], ['ls_start', 1], ['ls_stop', 365],
+    ]
+)
+def test_crop_data_lookup(param_name, default_value):
+    """Check that the dense lookup table matches the single parameter lookup"""
+    crop_type = np.array([-999, 0, 1, 3, 36, 61, 66, 69, 70, 176, 254, 255, 300, np.nan])
+    param_names, lookup = array_model.crop_data_lookup('CDL')
+    output = lookup[param_names.index(param_name), array_model.crop_type_index(crop_type)]
+    expected = array_model.crop_data_array(param_name, crop_type, data.cdl, default_value)
+    np.testing.assert_array_equal(output, expected)
+
+
+def test_crop_data_lookup_cached():
+    assert array_model.crop_data_lookup('CDL')[1] is array_model.crop_data_lookup('CDL')[1]
+
+
+def test_crop_type_index_integer():
+    output = array_model.crop_type_index(np.array([-1, 0, 255, 256], dtype=np.int16))
+    assert list(output) == [256, 0, 255, 256]
+
+
+@pytest.mark.parametrize(
+    'crop_type_kc_flag, crop_type_annual_skip_flag, mask_non_ag_flag, water_kc_flag',
+    [
+        [False, False, False, True],
+        [True, False, False, True],
+        [True, True, True, False],
+        [True, False, True, True],
+    ]
+)
+def test_ArrayModel_kc_dispatch_flag(crop_type_kc_flag, crop_type_annual_skip_flag,
+                                     mask_non_ag_flag, water_kc_flag):
+    """Check that the crop class dispatch is identical to the where() chain"""
+    rng = np.random.default_rng(0)
+    crop_type = rng.choice(list(data.cdl.keys()) + [0, 4, 111, 300], size=(50, 40))
+    crop_type = crop_type.astype(np.float64)
+    crop_type[0, :5] = np.nan
+    ndvi = rng.uniform(-0.3, 1.0, size=(50, 40))
+    ndvi[1, :5] = np.nan
+    args = {
+        'crop_type': crop_type,
+        'crop_type_kc_flag': crop_type_kc_flag,
+        'crop_type_annual_skip_flag': crop_type_annual_skip_flag,
+        'mask_non_ag_flag': mask_non_ag_flag,
+        'water_kc_flag': water_kc_flag,
+    }
+    expected = default_model_obj(**args).kc(ndvi)
+    output = array_model.ArrayModel(doy=DOY, kc_dispatch_flag=True, **args).kc(ndvi)
+    np.testing.assert_array_equal(output, expected)
+
+
+def test_ArrayModel_kc_dispatch_flag_broadcast():
+    """Check that a scalar crop type is broadcast to the NDVI array"""
+    ndvi = np.array([[0.2, 0.5], [0.7, -0.1]])
+    expected = default_model_obj(crop_type=69).kc(ndvi)
+    output = array_model.ArrayModel(crop_type=69, doy=DOY, kc_dispatch_flag=True).kc(ndvi)
+    np.testing.assert_array_equal(output, expected)
+
+
+@pytest.mark.parametrize(
+    'crop_type_kc_flag, crop_type_annual_skip_flag, mask_non_ag_flag, water_kc_flag',
+    [
+        [False, False, False, True],
+        [True, False, False, True],
+        [True, True, True, False],
+        [True, False, True, True],
+    ]
+)
+def test_ArrayModel_kc_jit_flag(crop_type_kc_flag, crop_type_annual_skip_flag,
+                                mask_non_ag_flag, water_kc_flag):
+    """Check that the fused kernel matches the where() chain"""
+    pytest.importorskip('numba')
+    rng = np.random.default_rng(0)
+    crop_type = rng.choice(list(data.cdl.keys()) + [0, 4, 111, 300], size=(50, 40))
+    crop_type = crop_type.astype(np.float64)
+    crop_type[0, :5] = np.nan
+    ndvi = rng.uniform(-0.3, 1.0, size=(3, 50, 40))
+    ndvi[:, 1, :5] = np.nan
+    args = {
+        'crop_type': crop_type,
+        'doy': np.array([100, DOY, 300]).reshape((3, 1, 1)),
+        'crop_type_kc_flag': crop_type_kc_flag,
+        'crop_type_annual_skip_flag': crop_type_annual_skip_flag,
+        'mask_non_ag_flag': mask_non_ag_flag,
+        'water_kc_flag': water_kc_flag,
+    }
+    expected = array_model.ArrayModel(**args).kc(ndvi)
+    output = array_model.ArrayModel(jit_flag=True, **args).kc(ndvi)
+    np.testing.assert_allclose(output, expected, rtol=1E-12)
+
+
+@pytest.mark.parametrize('reflectance_type', ['SR', 'TOA'])
+def test_ArrayModel_kc_jit_flag_broadcast(reflectance_type):
+    """Check that a scalar crop type is broadcast to the NDVI array"""
+    pytest.importorskip('numba')
+    ndvi = np.array([[0.2, 0.5], [0.7, -0.1]])
+    args = {'crop_type': 69, 'doy': DOY, 'reflectance_type': reflectance_type}
+    expected = array_model.ArrayModel(**args).kc(ndvi)
+    output = array_model.ArrayModel(jit_flag=True, **args).kc(ndvi)
+    np.testing.assert_allclose(output, expected, rtol=1E-12)
+    assert output.shape == (2, 2)
+
+
+def test_ArrayModel_kc_jit_flag_fallback(monkeypatch):
+    """Check that the NumPy functions are used if Numba is not installed"""
+    import openet.sims.array_kernels as array_kernels
+    monkeypatch.setattr(array_kernels, 'numba_available', False)
+    ndvi = np.array([0.2, 0.5, 0.8, -0.1])
+    expected = default_model_obj(crop_type=[1, 69, 75, 0]).kc(ndvi)
+    output = array_model.ArrayModel(
+        crop_type=[1, 69, 75, 0], doy=DOY, mask_non_ag_flag=False, jit_flag=True).kc(ndvi)
+    np.testing.assert_array_equal(output, expected)
+
+
+@pytest.mark.parametrize(
+    'crop_type_kc_flag, crop_type_annual_skip_flag, mask_non_ag_flag, water_kc_flag, '
+    'reflectance_type',
+    [
+        [False, False, False, True, 'SR'],
+        [True, False, True, True, 'SR'],
+        [True, True, False, False, 'TOA'],
+    ]
+)
+def test_ArrayModel_kc_lut_flag(crop_type_kc_flag, crop_type_annual_skip_flag,
+                                mask_non_ag_flag, water_kc_flag, reflectance_type):
+    """Check the lookup table error for all crop types and days of year"""
+    rng = np.random.default_rng(0)
+    crop_type = np.append(np.arange(256), [300, np.nan])[None, :, None]
+    doy = np.arange(1, 367)[:, None, None]
+    ndvi = rng.uniform(-1, 1, size=(366, 258, 20))
+    # NDVI values at the Kc function breaks
+    ndvi[:, :, :6] = [-1, 0, 0.14, 0.35, 1, np.nan]
+    args = {
+        'crop_type_kc_flag': crop_type_kc_flag,
+        'crop_type_annual_skip_flag': crop_type_annual_skip_flag,
+        'mask_non_ag_flag': mask_non_ag_flag,
+        'water_kc_flag': water_kc_flag,
+        'reflectance_type': reflectance_type,
+    }
+    expected = array_model.ArrayModel(crop_type=crop_type, doy=doy, **args).kc(ndvi)
+    output = array_model.ArrayModel(
+        crop_type=crop_type, doy=doy, kc_lut_flag=True, **args).kc(ndvi)
+    np.testing.assert_array_equal(np.isnan(output), np.isnan(expected))
+    np.testing.assert_allclose(output, expected, atol=array_model.KC_LUT_MAX_ERROR, rtol=0)
+
+
+def test_ArrayModel_kc_lut_flag_exact():
+    """Values outside of the table are computed with the Kc functions"""
+    ndvi = np.array([-1.5, 1.5, 0.14, 0.5])
+    doy = np.array([100, 100, 100, 400])
+    crop_type = np.array([1, 69, 3, 69])
+    expected = array_model.ArrayModel(crop_type=crop_type, doy=doy).kc(ndvi)
+    output = array_model.ArrayModel(crop_type=crop_type, doy=doy, kc_lut_flag=True).kc(ndvi)
+    np.testing.assert_array_equal(output, expected)
+
+
+def test_ArrayModel_kc_lut_bins():
+    ndvi = np.linspace(-1, 1, 1001)
+    expected = default_model_obj(crop_type=69).kc(ndvi)
+    output = array_model.ArrayModel(
+        crop_type=69, doy=DOY, mask_non_ag_flag=False, kc_lut_flag=True, kc_lut_bins=11
+    ).kc(ndvi)
+    np.testing.assert_allclose(output, expected, atol=array_model.KC_LUT_MAX_ERROR, rtol=0)
+
+
+def test_kc_lookup_table():
+    column_rows, table, exact_bins = array_model.kc_lookup_table('CDL', 'SR', 201)
+    assert column_rows.shape == (array_model.LOOKUP_SIZE + 2,)
+    assert table.shape == (column_rows.max() + 1, 366, 201)
+    assert table.dtype == np.float32
+    assert exact_bins.shape == (column_rows.max() + 1, 366, 200)
+    # Crop types with the same crop data share a row
+    assert column_rows[69] != column_rows[1]
+    assert array_model.kc_lookup_table('CDL', 'SR', 201)[1] is table
+
+
+def test_kc_lookup_table_bins_exception():
+    with pytest.raises(ValueError):
+        array_model.kc_lookup_table('CDL', 'SR', 1)
@@ -0,0 +1,123 @@
+import datetime
+
+import ee
+import numpy as np
+import pytest
+
+import openet.sims.et_reference as et_reference
+import openet.sims.utils as utils
+
+TEST_POINT = (-121.5265, 38.7399)
+
+
+@pytest.fixture
+def index():
+    et_reference.index.clear()
+    yield et_reference.index
+    et_reference.index.clear()
+
+
+def test_ReferenceIndex_lru():
+    ref_index = et_reference.ReferenceIndex(maxsize=2)
+    ref_index.get('a', lambda: 1)
+    ref_index.get('b', lambda: 2)
+    # Access "a" so that "b" is the least recently used key
+    assert ref_index.get('a', lambda: 10) == 1
+    ref_index.get('c', lambda: 3)
+    assert 'a' in ref_index
+    assert 'b' not in ref_index
+    assert len(ref_index) == 2
+    assert ref_index.info() == {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2}
+
+
+def test_ReferenceIndex_maxsize_exception():
+    with pytest.raises(ValueError):
+        et_reference.ReferenceIndex(maxsize=0)
+
+
+def test_ReferenceIndex_clear():
+    ref_index = et_reference.ReferenceIndex()
+    ref_index.get('a', lambda: 1)
+    ref_index.clear()
+    assert len(ref_index) == 0
+    assert ref_index.info()['misses'] == 0
+
+
+def test_ee_image_indexed(index):
+    image = et_reference.ee_image('IDAHO_EPSCOR/GRIDMET', 'eto', '2017-07-16')
+    assert et_reference.ee_image(
+        'IDAHO_EPSCOR/GRIDMET', 'eto', datetime.date(2017, 7, 16)) is image
+    assert et_reference.ee_image('IDAHO_EPSCOR/GRIDMET', 'etr', '2017-07-16') is not image
+    assert index.info()['hits'] == 1
+
+
+def test_ee_image_values(index, tol=0.0001):
+    """The indexed image should match filtering the collection"""
+    source, band, date = 'IDAHO_EPSCOR/GRIDMET', 'eto', '2017-07-16'
+    expected = ee.Image(
+        ee.ImageCollection(source)
+        .filterDate(date, ee.Date(date).advance(1, 'day')).select([band]).first()
+    )
+    output = utils.point_image_value(
+        et_reference.ee_image(source, band, date), TEST_POINT, scale=1000)
+    expected = utils.point_image_value(expected, TEST_POINT, scale=1000)
+    assert abs(output[band] - expected[band]) <= tol
+
+
+def test_ee_image_server_date(index, tol=0.0001):
+    output = utils.point_image_value(
+        et_reference.ee_image('IDAHO_EPSCOR/GRIDMET', 'eto', ee.Date('2017-07-16')),
+        TEST_POINT, scale=1000)
+    expected = utils.point_image_value(
+        et_reference.ee_image('IDAHO_EPSCOR/GRIDMET', 'eto', '2017-07-16'),
+        TEST_POINT, scale=1000)
+    assert abs(output['eto'] - expected['eto']) <= tol
+    assert len(index) == 1
+
+
+def test_ee_collection_indexed(index):
+    et_reference.ee_collection('IDAHO_EPSCOR/GRIDMET', 'eto', '2017-07-01', '2017-07-04')
+    assert index.info()['misses'] == 3
+    # Overlapping date ranges and single days share the indexed images
+    et_reference.ee_collection('IDAHO_EPSCOR/GRIDMET', 'eto', '2017-07-02', '2017-07-05')
+    et_reference.ee_image('IDAHO_EPSCOR/GRIDMET', 'eto', '2017-07-03')
+    assert index.info()['hits'] == 3
+    assert index.info()['misses'] == 4
+
+
+def test_ee_collection_values(index):
+    """The collection should match filtering the source collection by date"""
+    source, band = 'IDAHO_EPSCOR/GRIDMET', 'eto'
+    output = utils.getinfo(et_reference.ee_collection(
+        source, band, '2017-07-01', '2017-07-04').aggregate_array('system:index'))
+    expected = utils.getinfo(ee.ImageCollection(source).filterDate(
+        '2017-07-01', '2017-07-04').aggregate_array('system:index'))
+    assert output == expected
+
+
+def test_ee_collection_missing_days(index):
+    """Days without a source image are dropped"""
+    output = utils.getinfo(et_reference.ee_collection(
+        'IDAHO_EPSCOR/GRIDMET', 'eto', '2099-01-01', '2099-01-03').size())
+    assert output == 0
+
+
+def test_ArraySource(tmp_path, index):
+    cube = np.arange(3 * 2 * 2, dtype=np.float32).reshape((3, 2, 2))
+    np.save(tmp_path / 'eto.npy', cube)
+    source = et_reference.ArraySource(tmp_path / 'eto.npy', start_date='2017-07-15')
+    assert isinstance(source.data, np.memmap)
+    np.testing.assert_array_equal(source.image('2017-07-16'), cube[1])
+
+    output = et_reference.array_image(source, '2017-07-17', band='eto')
+    np.testing.assert_array_equal(output, cube[2])
+    assert et_reference.array_image(source, np.datetime64('2017-07-17'), band='eto') is output
+
+
+def test_ArraySource_date_exception(tmp_path):
+    np.save(tmp_path / 'eto.npy', np.zeros((3, 2, 2)))
+    source = et_reference.ArraySource(tmp_path / 'eto.npy', start_date='2017-07-15')
+    with pytest.raises(ValueError):
+        source.image('2017-07-18')
+    with pytest.raises(ValueError):
+        source.image('2017-07-14')
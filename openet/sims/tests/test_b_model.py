@@ -102,6 +102,33 @@ def test_crop_data_image_default_nodata():
     assert output['crop_class'] is None
 
 
+def test_crop_data_table_cached():
+    assert model.crop_data_table('CDL') is model.crop_data_table('CDL')
+
+
+def test_crop_data_table_default_row():
+    crop_types, row_index, param_names, rows = model.crop_data_table('CDL')
+    assert len(crop_types) == len(row_index)
+    assert dict(zip(param_names, rows[-1])) == {
+        p: model.CROP_DATA_NODATA if v is None else v
+        for p, v in model.CROP_DATA_PARAMS.items()
+    }
+
+
+@pytest.mark.parametrize('crop_type', [-999, 0, 1, 3, 36, 61, 66, 69, 70, 176])
+def test_crop_data_table_image(crop_type):
+    """Check that the single table lookup matches the separate remaps"""
+    crop_type_img = ee.Image.constant(crop_type).rename(['crop_type'])
+    output = utils.constant_image_value(
+        model.crop_data_table_image(crop_type_img, crop_type_remap='CDL')
+    )
+    for param_name, default_value in model.CROP_DATA_PARAMS.items():
+        expected = utils.constant_image_value(model.crop_data_image(
+            param_name, crop_type_img, data.cdl, default_value
+        ))
+        assert output[param_name] == expected[param_name]
+
+
 def test_Model_init_default_parameters():
     m = default_model_obj()
     assert m.crop_type_source == f'USDA/NASS/CDL/{YEAR}'
@@ -136,6 +163,49 @@ def test_Model_crop_type_source_cdl_collection(year, expected):
     assert output['properties']['id'] == f'USDA/NASS/CDL/{expected}'
 
 
+def test_load_crop_type_year_range(monkeypatch):
+    monkeypatch.setattr(model, 'crop_type_year_ranges', {})
+    min_year, max_year = model.load_crop_type_year_range('USDA/NASS/CDL')
+    assert min_year <= 2008
+    assert max_year >= 2022
+    assert model.crop_type_year_ranges['USDA/NASS/CDL'] == (min_year, max_year)
+    output = utils.getinfo(default_model_obj(
+        crop_type_source='USDA/NASS/CDL', year=ee.Number(2007)).crop_type)
+    assert output['properties']['id'] == 'USDA/NASS/CDL/2008'
+
+
+def test_load_crop_type_year_range_failure(monkeypatch):
+    """Failed requests should not be saved"""
+    def getinfo_error(self):
+        raise ee.EEException('test')
+
+    monkeypatch.setattr(model, 'crop_type_year_ranges', {})
+    monkeypatch.setattr(ee.List, 'getInfo', getinfo_error)
+    assert model.load_crop_type_year_range('USDA/NASS/CDL') is None
+    assert model.crop_type_year_ranges == {}
+
+
+def test_Model_crop_type_no_request(monkeypatch):
+    """Building the model should not make any requests"""
+    def getinfo_error(self):
+        raise AssertionError('unexpected getInfo request')
+
+    monkeypatch.setattr(model, 'crop_type_year_ranges', {})
+    monkeypatch.setattr(ee.computedobject.ComputedObject, 'getInfo', getinfo_error)
+    model.Model(**default_model_args(crop_type_source='USDA/NASS/CDL', year=2016)).crop_type
+
+
+def test_Model_crop_type_cached():
+    """Crop type images for client side years are shared by all model objects"""
+    def model_obj(year):
+        return model.Model(**default_model_args(crop_type_source='USDA/NASS/CDL', year=year))
+
+    output = model_obj(2016).crop_type
+    assert model_obj(2016).crop_type is output
+    assert model_obj(2017).crop_type is not output
+    assert utils.getinfo(output)['properties']['id'] == 'USDA/NASS/CDL/2016'
+
+
 def test_Model_crop_type_source_cdl_image():
     output = utils.getinfo(default_model_obj(crop_type_source='USDA/NASS/CDL/2008').crop_type)
     assert output['properties']['id'] == 'USDA/NASS/CDL/2008'
@@ -564,6 +634,41 @@ def test_Model_kc_water_kc_flag(crop_type, ndvi, water_kc_flag, expected):
     assert output['kc'] == expected
 
 
+@pytest.mark.parametrize('crop_type', [69, 75])
+def test_Model_kc_doy_image(crop_type, doy=288):
+    """Check that a day of year image is the same as a day of year number"""
+    kwargs = {'crop_type_source': crop_type, 'crop_type_kc_flag': True}
+    expected = utils.constant_image_value(
+        default_model_obj(doy=doy, **kwargs).kc(ndvi=ee.Image.constant(0.5))
+    )
+    m = model.Model(**default_model_args(
+        year=ee.Number(YEAR), doy=ee.Image.constant(doy), **kwargs))
+    output = utils.constant_image_value(m.kc(ndvi=ee.Image.constant(0.5)))
+    assert output['kc'] == expected['kc']
+
+
+@pytest.mark.parametrize('crop_type', [69, 75])
+def test_Model_kc_image_collection(crop_type):
+    """Check that Kc is computed for each image using the image day of year"""
+    kwargs = {'crop_type_source': crop_type, 'crop_type_kc_flag': True}
+    dates = ['2017-07-16', '2017-10-15']
+    ndvi_coll = ee.ImageCollection([
+        ee.Image.constant(0.5).set({'system:time_start': ee.Date(date).millis()})
+        for date in dates
+    ])
+    output_coll = default_model_obj(**kwargs).kc(ndvi=ndvi_coll)
+    assert isinstance(output_coll, ee.ImageCollection)
+    output_list = output_coll.toList(len(dates))
+    for i, doy in enumerate([197, 288]):
+        output_img = ee.Image(output_list.get(i))
+        output = utils.constant_image_value(output_img)
+        expected = utils.constant_image_value(
+            default_model_obj(doy=doy, **kwargs).kc(ndvi=ee.Image.constant(0.5))
+        )
+        assert output['kc'] == expected['kc']
+        assert output_img.get('system:time_start').getInfo() == ee.Date(dates[i]).millis().getInfo()
+
+
 def ndvi_to_kc_point(ndvi, doy, crop_type):
     crop_profile = data.cdl[crop_type]
 
@@ -0,0 +1,315 @@
+import numpy as np
+import pytest
+
+import openet.sims.array_cloud_mask as array_cloud_mask
+import openet.sims.array_image as array_image
+import openet.sims.array_model as array_model
+import openet.sims.et_reference as et_reference
+
+SCENE_DATE = '2017-07-16'
+SCENE_DOY = 197
+SCENE_TIME = 1500163200000
+
+
+def sr_dn(value):
+    """Convert a reflectance value to a Collection 2 SR digital number"""
+    return np.uint16(round((value + 0.2) / 0.0000275))
+
+
+def default_sr_source(red=0.1, nir=0.4, qa_pixel=21824, shape=(2, 3)):
+    return {
+        'SR_B4': np.full(shape, sr_dn(red), dtype=np.uint16),
+        'SR_B5': np.full(shape, sr_dn(nir), dtype=np.uint16),
+        'QA_PIXEL': np.full(shape, qa_pixel, dtype=np.uint16),
+        'QA_RADSAT': np.zeros(shape, dtype=np.uint16),
+    }
+
+
+def default_sr_properties():
+    return {'SPACECRAFT_ID': 'LANDSAT_8', 'DATE_ACQUIRED': SCENE_DATE}
+
+
+def default_image_obj(ndvi=0.8, crop_type=1, et_reference_source=10, **kwargs):
+    return array_image.ArrayImage(
+        ndvi=np.array(ndvi), date=SCENE_DATE, crop_type=crop_type,
+        et_reference_source=et_reference_source, **kwargs,
+    )
+
+
+def test_ArrayImage_init():
+    image = default_image_obj()
+    assert image._doy == SCENE_DOY
+    assert image._properties['system:time_start'] == SCENE_TIME
+
+
+@pytest.mark.parametrize(
+    'ndvi, crop_type',
+    [
+        [[0.2, 0.5, 0.8, -0.1], [1, 69, 75, 0]],
+        [[0.2, 0.5, 0.8, -0.1], 176],
+    ]
+)
+def test_ArrayImage_kc_matches_ArrayModel(ndvi, crop_type):
+    output = default_image_obj(ndvi=ndvi, crop_type=crop_type).kc
+    expected = array_model.ArrayModel(
+        crop_type=crop_type, doy=SCENE_DOY, mask_non_ag_flag=False).kc(ndvi)
+    np.testing.assert_array_equal(output, expected)
+
+
+def test_ArrayImage_et():
+    image = default_image_obj(ndvi=[0.2, 0.8], et_reference_factor=0.5)
+    np.testing.assert_allclose(image.et_reference, [5, 5])
+    np.testing.assert_allclose(image.et, image.kc * 5)
+
+
+def test_ArrayImage_et_reference_array_source(tmp_path):
+    cube = np.arange(3 * 2, dtype=np.float32).reshape((3, 2)) + 1
+    np.save(tmp_path / 'eto.npy', cube)
+    source = et_reference.ArraySource(tmp_path / 'eto.npy', start_date='2017-07-15')
+    image = default_image_obj(ndvi=[0.2, 0.8], et_reference_source=source)
+    np.testing.assert_allclose(image.et_reference, cube[1])
+
+
+def test_ArrayImage_et_reference_exception():
+    with pytest.raises(ValueError):
+        default_image_obj(et_reference_source='IDAHO_EPSCOR/GRIDMET').et_reference
+
+
+def test_ArrayImage_mask_time():
+    image = default_image_obj(ndvi=[0.5, np.nan], crop_type=[1, 1])
+    np.testing.assert_array_equal(image.mask, [1, 0])
+    assert image.mask.dtype == np.uint8
+    np.testing.assert_array_equal(image.time, [SCENE_TIME, np.nan])
+
+
+def test_ArrayImage_calculate():
+    output = default_image_obj(ndvi=[0.2, 0.8]).calculate(
+        ['ndvi', 'kc', 'et_fraction', 'et', 'et_reference', 'mask', 'time'])
+    assert set(output.keys()) == {
+        'ndvi', 'kc', 'et_fraction', 'et', 'et_reference', 'mask', 'time'}
+    assert output['et'].dtype == np.float32
+    np.testing.assert_array_equal(output['kc'], output['et_fraction'])
+
+
+def test_ArrayImage_calculate_exception():
+    with pytest.raises(ValueError):
+        default_image_obj().calculate(['foo'])
+
+
+def test_ArrayImage_from_landsat_c2_sr_ndvi(tol=0.0001):
+    image = array_image.ArrayImage.from_landsat_c2_sr(
+        default_sr_source(red=0.1, nir=0.4), properties=default_sr_properties(),
+        crop_type=1, et_reference_source=10)
+    np.testing.assert_allclose(image.ndvi, 0.6, atol=tol)
+    assert image.ndvi.shape == (2, 3)
+    assert image.reflectance_type == 'SR'
+
+
+def test_ArrayImage_from_landsat_c2_sr_cloud_mask():
+    source = default_sr_source()
+    # Cloud (bit 3), shadow (bit 4), and fill (bit 0) pixels
+    source['QA_PIXEL'][0, :] = [22280, 23888, 1]
+    image = array_image.ArrayImage.from_landsat_c2_sr(
+        source, properties=default_sr_properties(), crop_type=1)
+    assert np.isnan(image.ndvi[0, :]).all()
+    assert np.isfinite(image.ndvi[1, :]).all()
+
+
+def test_ArrayImage_from_landsat_c2_sr_fill():
+    source = default_sr_source()
+    source['SR_B4'][0, 0] = 0
+    image = array_image.ArrayImage.from_landsat_c2_sr(
+        source, properties=default_sr_properties(), crop_type=1)
+    assert np.isnan(image.ndvi[0, 0])
+    assert np.isfinite(image.ndvi[0, 1])
+
+
+def test_ArrayImage_from_landsat_c2_sr_window():
+    source = default_sr_source(shape=(4, 4))
+    source['SR_B5'][:2, 2:] = sr_dn(0.2)
+    image = array_image.ArrayImage.from_landsat_c2_sr(
+        source, properties=default_sr_properties(), crop_type=1,
+        window=(slice(0, 2), slice(2, 4)))
+    assert image.ndvi.shape == (2, 2)
+    np.testing.assert_allclose(image.ndvi, 1 / 3, atol=0.0001)
+
+
+def test_ArrayImage_from_landsat_c2_sr_properties_exception():
+    with pytest.raises(ValueError):
+        array_image.ArrayImage.from_landsat_c2_sr(default_sr_source(), crop_type=1)
+    with pytest.raises(ValueError):
+        array_image.ArrayImage.from_landsat_c2_sr(
+            default_sr_source(), crop_type=1,
+            properties={'SPACECRAFT_ID': 'SENTINEL_2', 'DATE_ACQUIRED': SCENE_DATE})
+
+
+@pytest.mark.parametrize(
+    'scene_id, expected',
+    [
+        ['LC08_044033_20170716', {'SPACECRAFT_ID': 'LANDSAT_8', 'DATE_ACQUIRED': '2017-07-16'}],
+        ['LC09_L2SP_044033_20220127_20220128_02_T1',
+         {'SPACECRAFT_ID': 'LANDSAT_9', 'DATE_ACQUIRED': '2022-01-27'}],
+        ['LE07_L2SP_044033_20170708_20200831_02_T1',
+         {'SPACECRAFT_ID': 'LANDSAT_7', 'DATE_ACQUIRED': '2017-07-08'}],
+        ['LT05_044033_20110716', {'SPACECRAFT_ID': 'LANDSAT_5', 'DATE_ACQUIRED': '2011-07-16'}],
+    ]
+)
+def test_landsat_scene_properties(scene_id, expected):
+    assert array_image.landsat_scene_properties(scene_id) == expected
+
+
+def test_landsat_scene_properties_exception():
+    with pytest.raises(ValueError):
+        array_image.landsat_scene_properties('S2A_20170716')
+
+
+def test_block_windows():
+    windows = list(array_image.block_windows(5, 3, block_size=2))
+    assert len(windows) == 6
+    assert windows[-1] == (slice(4, 5), slice(2, 3))
+    covered = np.zeros((5, 3), dtype=int)
+    for window in windows:
+        covered[window] += 1
+    assert (covered == 1).all()
+
+
+def test_read_band_geotiff_missing_rasterio(monkeypatch):
+    import builtins
+    real_import = builtins.__import__
+
+    def mock_import(name, *args, **kwargs):
+        if name.startswith('rasterio'):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', mock_import)
+    with pytest.raises(ImportError):
+        array_image.read_band('/tmp/LC08_044033_20170716', 'SR_B4')
+
+
+@pytest.mark.parametrize(
+    'qa_pixel, args, expected',
+    [
+        [21824, {}, True],                                 # Clear
+        [1, {}, False],                                    # Fill
+        [22280, {}, False],                                # Cloud
+        [23888, {'shadow_flag': True}, False],             # Shadow
+        [23888, {'shadow_flag': False}, True],
+        [21826, {'dilate_flag': True}, False],             # Dilated cloud
+        [21826, {'dilate_flag': False}, True],
+        [21828, {'cirrus_flag': True}, False],             # Cirrus
+        [21828, {'cirrus_flag': False}, True],
+        [13600, {'snow_flag': True}, False],               # Snow
+        [13600, {'snow_flag': False}, True],
+        [21952, {'water_flag': True}, False],              # Water
+        [21952, {'water_flag': False}, True],
+    ]
+)
+def test_landsat_c2_sr_cloud_mask(qa_pixel, args, expected):
+    output = array_cloud_mask.landsat_c2_sr_cloud_mask(np.array([qa_pixel]), **args)
+    assert output[0] == expected
+
+
+@pytest.mark.parametrize(
+    'qa_radsat, spacecraft_id, expected',
+    [
+        [0, 'LANDSAT_8', True],
+        [1, 'LANDSAT_8', True],    # Coastal aerosol band is not checked
+        [2, 'LANDSAT_8', False],
+        [1, 'LANDSAT_7', False],
+        [8, 'LANDSAT_7', True],
+    ]
+)
+def test_landsat_c2_sr_cloud_mask_saturated(qa_radsat, spacecraft_id, expected):
+    output = array_cloud_mask.landsat_c2_sr_cloud_mask(
+        np.array([21824]), qa_radsat=np.array([qa_radsat]),
+        spacecraft_id=spacecraft_id, saturated_flag=True)
+    assert output[0] == expected
+
+
+def test_landsat_c2_sr_cloud_mask_exception():
+    with pytest.raises(ValueError):
+        array_cloud_mask.landsat_c2_sr_cloud_mask(np.array([21824]), cloud_score_flag=True)
+    with pytest.raises(ValueError):
+        array_cloud_mask.landsat_c2_sr_cloud_mask(np.array([21824]), saturated_flag=True)
+
+
+def test_qa_pixel_lut_cached():
+    lut = array_cloud_mask.qa_pixel_lut(True, True, True, True, False)
+    assert array_cloud_mask.qa_pixel_lut(True, True, True, True, False) is lut
+    assert lut.shape == (65536,)
+    assert not lut.flags.writeable
+
+
+def test_qa_pixel_lut_bitwise():
+    """Lookup table values should match decoding the QA_PIXEL bits directly"""
+    qa_pixel = np.arange(65536, dtype=np.uint16)
+    lut = array_cloud_mask.qa_pixel_lut(
+        cirrus_flag=True, dilate_flag=False, shadow_flag=True, snow_flag=False)
+    expected = ((qa_pixel >> 0) & 1) | ((qa_pixel >> 2) & 1) \
+        | ((qa_pixel >> 3) & 1) | ((qa_pixel >> 4) & 1)
+    np.testing.assert_array_equal(lut, expected != 0)
+
+
+def test_qa_radsat_lut():
+    lut = array_cloud_mask.qa_radsat_lut('LANDSAT_8')
+    assert array_cloud_mask.qa_radsat_lut('LANDSAT_8') is lut
+    assert not lut[1] and lut[2] and lut[8] and not lut[16]
+
+
+@pytest.mark.parametrize('pixels', [1, 2, 5])
+def test_dilate(pixels):
+    mask = np.zeros((15, 15), dtype=bool)
+    mask[7, 7] = True
+    rows, cols = np.mgrid[:15, :15]
+    expected = (rows - 7) ** 2 + (cols - 7) ** 2 <= pixels ** 2
+    np.testing.assert_array_equal(array_cloud_mask.dilate(mask, pixels), expected)
+
+
+def test_dilate_edge():
+    mask = np.zeros((4, 4), dtype=bool)
+    mask[0, 0] = True
+    expected = np.zeros((4, 4), dtype=bool)
+    expected[0, :2] = True
+    expected[1, 0] = True
+    np.testing.assert_array_equal(array_cloud_mask.dilate(mask, 1), expected)
+
+
+def test_erode():
+    """Erode should remove standalone pixels but keep the core of larger areas"""
+    mask = np.zeros((7, 7), dtype=bool)
+    mask[1, 1] = True
+    mask[3:6, 3:6] = True
+    expected = np.zeros((7, 7), dtype=bool)
+    expected[4, 4] = True
+    np.testing.assert_array_equal(array_cloud_mask.erode(mask, 1), expected)
+
+
+def test_landsat_c2_sr_cloud_mask_filter_buffer():
+    qa_pixel = np.full((9, 9), 21824, dtype=np.uint16)
+    # Standalone cloud pixel and a 3x3 cloud
+    qa_pixel[0, 8] = 22280
+    qa_pixel[3:6, 3:6] = 22280
+    qa_pixel[8, 0] = 1
+
+    output = array_cloud_mask.landsat_c2_sr_cloud_mask(qa_pixel, filter_flag=True)
+    assert output[0, 8]
+    # Only the center of the 3x3 cloud is kept
+    assert not output[4, 4] and output[3, 3]
+    assert not output[8, 0]
+
+    output = array_cloud_mask.landsat_c2_sr_cloud_mask(
+        qa_pixel, buffer_flag=True, buffer_pixels=1)
+    assert not output[2, 4] and not output[0, 7]
+    assert output[2, 2] and output[0, 0]
+    # Fill pixels are masked but not buffered
+    assert not output[8, 0]
+    assert output[7, 0]
+
+
+def test_landsat_c2_sr_cloud_mask_shape():
+    qa_pixel = np.full((3, 4), 21824, dtype=np.uint16)
+    qa_pixel[1, 2] = 22280
+    output = array_cloud_mask.landsat_c2_sr_cloud_mask(qa_pixel)
+    assert output.shape == (3, 4)
+    assert output.sum() == 11
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import openet.sims.array_image as array_image
+import openet.sims.array_tiles as array_tiles
+import openet.sims.et_reference as et_reference
+
+SCENE_DATE = '2017-07-16'
+VARIABLES = ['et', 'et_fraction', 'ndvi', 'fc', 'kc', 'mask']
+
+
+def synthetic_scene(shape=(70, 90), seed=0):
+    rng = np.random.default_rng(seed)
+    qa_pixel = rng.choice(
+        np.array([21824, 22280, 23888, 1], dtype=np.uint16), size=shape,
+        p=[0.9, 0.04, 0.04, 0.02])
+    source = {
+        'SR_B4': rng.integers(7500, 12000, size=shape).astype(np.uint16),
+        'SR_B5': rng.integers(12000, 30000, size=shape).astype(np.uint16),
+        'QA_PIXEL': qa_pixel,
+    }
+    crop_type = rng.choice([1, 3, 36, 69, 111, 176], size=shape)
+    et_reference_array = rng.uniform(4, 9, size=shape)
+    return source, crop_type, et_reference_array
+
+
+def properties():
+    return {'SPACECRAFT_ID': 'LANDSAT_8', 'DATE_ACQUIRED': SCENE_DATE}
+
+
+@pytest.mark.parametrize(
+    'processes, cloudmask_args',
+    [
+        [1, {}],
+        [2, {}],
+        [2, {'filter_flag': True, 'buffer_flag': True, 'buffer_pixels': 3}],
+    ]
+)
+def test_run_scene(tmp_path, processes, cloudmask_args):
+    """Tiled output must match the whole scene computed at once"""
+    source, crop_type, et_reference_array = synthetic_scene()
+    output = array_tiles.run_scene(
+        source, str(tmp_path / 'output'), crop_type, variables=VARIABLES,
+        et_reference_source=et_reference_array, cloudmask_args=cloudmask_args,
+        properties=properties(), block_size=32, processes=processes,
+        shared_path=str(tmp_path / 'shared'), crop_type_kc_flag=True,
+    )
+    expected = array_image.ArrayImage.from_landsat_c2_sr(
+        source, cloudmask_args=cloudmask_args, properties=properties(),
+        crop_type=crop_type, et_reference_source=et_reference_array,
+        crop_type_kc_flag=True,
+    ).calculate(VARIABLES)
+    for variable in VARIABLES:
+        assert output[variable].shape == (70, 90)
+        np.testing.assert_array_equal(output[variable], expected[variable])
+    assert output['mask'].dtype == np.uint8
+    assert (tmp_path / 'output' / 'et.npy').is_file()
+
+
+def test_run_scene_array_source(tmp_path):
+    """Reference ET cubes and memory mapped inputs are not copied"""
+    source, crop_type, et_reference_array = synthetic_scene(shape=(40, 30))
+    cube_path = tmp_path / 'eto.npy'
+    np.save(cube_path, np.stack([et_reference_array * 0, et_reference_array]))
+    np.save(tmp_path / 'crop_type.npy', crop_type)
+    output = array_tiles.run_scene(
+        source, str(tmp_path / 'output'), np.load(tmp_path / 'crop_type.npy', mmap_mode='r'),
+        variables=['et'], properties=properties(), block_size=16, processes=1,
+        et_reference_source=et_reference.ArraySource(str(cube_path), '2017-07-15'),
+        shared_path=str(tmp_path / 'shared'),
+    )
+    expected = array_image.ArrayImage.from_landsat_c2_sr(
+        source, properties=properties(), crop_type=crop_type,
+        et_reference_source=et_reference_array).calculate(['et'])
+    np.testing.assert_array_equal(output['et'], expected['et'])
+    assert not (tmp_path / 'shared' / 'crop_type.npy').exists()
+
+
+def test_run_scene_scalar_inputs(tmp_path):
+    source, crop_type, et_reference_array = synthetic_scene(shape=(10, 10))
+    output = array_tiles.run_scene(
+        source, str(tmp_path), 1, variables=['et'], et_reference_source=5,
+        properties=properties(), block_size=4, processes=1)
+    assert np.nanmax(output['et']) > 0
+
+
+def test_run_scene_date_exception(tmp_path):
+    source, crop_type, et_reference_array = synthetic_scene(shape=(10, 10))
+    with pytest.raises(ValueError):
+        array_tiles.run_scene(source, str(tmp_path), crop_type,
+                              properties={'SPACECRAFT_ID': 'LANDSAT_8'})
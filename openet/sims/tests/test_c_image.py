@@ -6,6 +6,7 @@ import ee
 import pytest
 
 import openet.sims as sims
+import openet.sims.et_reference as et_reference
 import openet.sims.utils as utils
 # TODO: import utils from openet.core
 # import openet.core.utils as utils
@@ -452,6 +453,41 @@ def test_Image_from_image_id(image_id):
     assert output['properties']['image_id'] == image_id
 
 
+def test_Image_from_image_id_scene_date():
+    """The scene date is known client side for images built from an ID"""
+    assert sims.Image.from_image_id(COLL_ID + SCENE_ID)._scene_date == SCENE_DATE
+    assert sims.Image.from_landsat_c2_sr(COLL_ID + SCENE_ID)._scene_date == SCENE_DATE
+    assert sims.Image.from_landsat_c2_sr(ee.Image(COLL_ID + SCENE_ID))._scene_date is None
+
+
+def test_Image_scene_date_exception():
+    with pytest.raises(ValueError):
+        sims.Image(image=default_image(), scene_date='20170716')
+
+
+def test_Image_crop_type_cached():
+    """Images from the same year share the crop type image"""
+    output = sims.Image.from_image_id(COLL_ID + SCENE_ID).model.crop_type
+    assert sims.Image.from_image_id(
+        COLL_ID + 'LC08_044033_20170801').model.crop_type is output
+    assert sims.Image.from_image_id(
+        COLL_ID + 'LC08_044033_20160713').model.crop_type is not output
+
+
+def test_Image_et_reference_indexed():
+    """Images for the same scene date share the indexed reference ET image"""
+    et_reference.index.clear()
+    for i in range(2):
+        sims.Image.from_image_id(
+            COLL_ID + SCENE_ID, et_reference_source='IDAHO_EPSCOR/GRIDMET',
+            et_reference_band='eto',
+        ).et_reference
+    assert et_reference.index.info()['misses'] == 1
+    assert et_reference.index.info()['hits'] == 1
+    assert ('IDAHO_EPSCOR/GRIDMET', 'eto', SCENE_DATE) in et_reference.index
+    et_reference.index.clear()
+
+
 def test_Image_from_method_kwargs():
     """Test that the init parameters can be passed through the helper methods"""
     assert sims.Image.from_landsat_c2_sr(
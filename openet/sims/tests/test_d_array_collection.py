@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+
+xr = pytest.importorskip('xarray')
+pytest.importorskip('dask')
+
+import openet.sims.array_collection as array_collection  # noqa: E402
+import openet.sims.array_image as array_image  # noqa: E402
+import openet.sims.array_interpolate as array_interpolate  # noqa: E402
+
+SCENE_DATES = ['2017-06-30', '2017-07-08', '2017-07-16', '2017-08-01', '2017-08-17']
+START_DATE = '2017-07-01'
+END_DATE = '2017-08-01'
+
+
+def sr_dn(value):
+    """Convert a reflectance value to a Collection 2 SR digital number"""
+    return np.uint16(round((value + 0.2) / 0.0000275))
+
+
+def default_ndvi_dataset(shape=(4, 6), chunks={'y': 2, 'x': 3}):
+    rng = np.random.default_rng(0)
+    ndvi = rng.uniform(0.1, 0.9, (len(SCENE_DATES),) + shape)
+    # Masked pixels in some of the scenes
+    ndvi[1, 0, :] = np.nan
+    ndvi[:, 1, 1] = np.nan
+    times = np.array(SCENE_DATES, dtype='datetime64[ns]') + np.timedelta64(18, 'h')
+    dataset = xr.Dataset(
+        {'ndvi': (('time', 'y', 'x'), ndvi)},
+        coords={'time': times, 'y': np.arange(shape[0]), 'x': np.arange(shape[1])},
+    )
+    return dataset.chunk(chunks) if chunks else dataset
+
+
+def default_crop_type(shape=(4, 6)):
+    crop_type = np.ones(shape, dtype=np.int16)
+    crop_type[:, :2] = 69
+    crop_type[3, :] = 176
+    return xr.DataArray(crop_type, dims=('y', 'x'))
+
+
+def default_et_reference(shape=(4, 6)):
+    dates = np.arange(
+        np.datetime64('2017-05-01'), np.datetime64('2017-10-01')).astype('datetime64[ns]')
+    eto = 5 + np.arange(dates.size) % 7 + np.zeros(shape + (1,))
+    return xr.DataArray(np.moveaxis(eto, -1, 0), dims=('time', 'y', 'x'),
+                        coords={'time': dates})
+
+
+def default_coll_obj(dataset=None, **kwargs):
+    args = {
+        'dataset': default_ndvi_dataset() if dataset is None else dataset,
+        'start_date': START_DATE,
+        'end_date': END_DATE,
+        'crop_type': default_crop_type(),
+        'et_reference_source': default_et_reference(),
+    }
+    args.update(kwargs)
+    return array_collection.ArrayCollection(**args)
+
+
+def test_ArrayCollection_init_exception():
+    dataset = default_ndvi_dataset().rename({'ndvi': 'foo'})
+    with pytest.raises(ValueError):
+        default_coll_obj(dataset=dataset)
+    with pytest.raises(ValueError):
+        default_coll_obj(end_date=START_DATE)
+
+
+def test_ArrayCollection_overpass_matches_ArrayImage():
+    dataset = default_ndvi_dataset()
+    output = default_coll_obj(dataset=dataset).overpass(
+        ['et', 'et_reference', 'et_fraction', 'fc', 'kc', 'mask', 'ndvi'])
+    # Only the scenes in the start/end dates are included
+    assert output['kc'].sizes['time'] == 2
+    assert output['kc'].chunks is not None
+    output = output.compute()
+
+    eto = default_et_reference()
+    for i, date in enumerate(SCENE_DATES[1:3]):
+        image = array_image.ArrayImage(
+            ndvi=dataset['ndvi'].values[i + 1], date=date,
+            crop_type=default_crop_type().values,
+            et_reference_source=eto.sel(time=date).values,
+        )
+        expected = image.calculate(
+            ['et', 'et_reference', 'et_fraction', 'fc', 'kc', 'mask', 'ndvi'])
+        for v, array in expected.items():
+            np.testing.assert_allclose(output[v].values[i], array, rtol=1E-6, err_msg=v)
+            assert output[v].dtype == array.dtype
+
+
+def test_ArrayCollection_overpass_landsat_bands():
+    shape = (2, 3)
+    qa_pixel = np.full((1,) + shape, 21824, dtype=np.uint16)
+    # Cloud pixel
+    qa_pixel[0, 0, 0] = 22280
+    dataset = xr.Dataset(
+        {
+            'red': (('time', 'y', 'x'), np.full((1,) + shape, sr_dn(0.1), np.uint16)),
+            'nir': (('time', 'y', 'x'), np.full((1,) + shape, sr_dn(0.4), np.uint16)),
+            'QA_PIXEL': (('time', 'y', 'x'), qa_pixel),
+        },
+        coords={'time': np.array(['2017-07-16T18'], dtype='datetime64[ns]')},
+    ).chunk({'x': 1})
+    output = default_coll_obj(dataset=dataset, crop_type=1).overpass(['ndvi']).compute()
+    assert np.isnan(output['ndvi'].values[0, 0, 0])
+    np.testing.assert_allclose(output['ndvi'].values[0, 1:, :], 0.6, atol=0.0001)
+
+
+def test_ArrayCollection_overpass_filter_chunk_exception():
+    dataset = xr.Dataset(
+        {band: (('time', 'y', 'x'), np.ones((1, 2, 2), np.uint16))
+         for band in ['red', 'nir', 'QA_PIXEL']},
+        coords={'time': np.array(['2017-07-16'], dtype='datetime64[ns]')},
+    ).chunk({'x': 1})
+    coll = default_coll_obj(dataset=dataset, cloudmask_args={'filter_flag': True})
+    with pytest.raises(ValueError):
+        coll.overpass(['ndvi'])
+
+
+def test_ArrayCollection_overpass_exception():
+    with pytest.raises(ValueError):
+        default_coll_obj().overpass()
+    with pytest.raises(ValueError):
+        default_coll_obj().overpass(['foo'])
+
+
+@pytest.mark.parametrize('t_interval, periods', [['daily', 31], ['monthly', 1], ['custom', 1]])
+def test_ArrayCollection_interpolate(t_interval, periods):
+    dataset = default_ndvi_dataset()
+    output = default_coll_obj(dataset=dataset).interpolate(
+        ['et', 'et_reference', 'et_fraction', 'ndvi', 'count'], t_interval=t_interval)
+    assert output['et'].chunks is not None
+    output = output.compute()
+    assert output['et'].shape == (periods, 4, 6)
+    assert output['time'].values[0] == np.datetime64(START_DATE, 'ns')
+
+    # Compare with the in-memory daily interpolation
+    scene_times = np.array(SCENE_DATES, dtype='datetime64[D]')
+    overpass = default_coll_obj(
+        dataset=dataset, start_date=SCENE_DATES[0], end_date='2017-08-18'
+    ).overpass(['kc']).compute()
+    et_fraction = array_interpolate.daily(overpass['kc'].values, scene_times, START_DATE, 31)
+    ndvi = array_interpolate.daily(dataset['ndvi'].values, scene_times, START_DATE, 31)
+    eto = default_et_reference().sel(time=slice(START_DATE, '2017-07-31')).values
+    et = et_fraction * eto
+    if t_interval == 'daily':
+        np.testing.assert_allclose(output['et'].values, et, rtol=1E-6)
+        np.testing.assert_allclose(output['ndvi'].values, ndvi, rtol=1E-6)
+    else:
+        np.testing.assert_allclose(output['et'].values[0], et.sum(axis=0), rtol=1E-6)
+        np.testing.assert_allclose(output['et_reference'].values[0], eto.sum(axis=0))
+        np.testing.assert_allclose(
+            output['et_fraction'].values[0], et.sum(axis=0) / eto.sum(axis=0), rtol=1E-6)
+        np.testing.assert_allclose(output['ndvi'].values[0], ndvi.mean(axis=0), rtol=1E-6)
+        # Two scenes in the month, one masked on the first row
+        assert output['count'].dtype == np.uint8
+        np.testing.assert_array_equal(output['count'].values[0, 0, :], [1] * 6)
+        np.testing.assert_array_equal(output['count'].values[0, 2, :], [2] * 6)
+        assert output['count'].values[0, 1, 1] == 0
+        assert np.isnan(output['et'].values[0, 1, 1])
+
+
+def test_ArrayCollection_interpolate_exception():
+    with pytest.raises(ValueError):
+        default_coll_obj().interpolate(['et'], t_interval='deadbeef')
+    with pytest.raises(ValueError):
+        default_coll_obj().interpolate(['kc'])
+
+
+def test_write_zarr(tmp_path):
+    pytest.importorskip('zarr')
+    output = default_coll_obj().interpolate(['et', 'count'], t_interval='daily')
+    array_collection.write_zarr(output, tmp_path / 'output.zarr', chunks={'time': 7})
+    saved = xr.open_zarr(tmp_path / 'output.zarr')
+    assert saved['et'].encoding['chunks'] == (7, 2, 3)
+    np.testing.assert_allclose(saved['et'].values, output['et'].values)
@@ -0,0 +1,576 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import openet.sims.array_interpolate as array_interpolate
+
+comp_df = pd.read_csv('openet/sims/tests/ee_wb_valid.csv')
+# Total and readily evaporable water at the validation point
+TEW = comp_df['de'].max()
+REW = comp_df['de_rew'].max()
+
+
+def comp_water_balance(**kwargs):
+    # Precipitation needs an extra day at the end for the "next" precipitation
+    return array_interpolate.water_balance(
+        ndvi=comp_df['ndvi_interp'].values,
+        et_fraction=comp_df['kc'].values,
+        et_reference=comp_df['eto'].values,
+        precip=np.append(comp_df['pr'].values, 0),
+        tew=TEW, rew=REW, **kwargs
+    )
+
+
+def test_evaporable_water():
+    tew, rew = array_interpolate.evaporable_water(
+        field_capacity=np.array([30.0, 1.0]), wilting_point=np.array([10.0, 0.0])
+    )
+    np.testing.assert_allclose(tew, [25.0, 1.0])
+    # REW is limited to TEW
+    np.testing.assert_allclose(rew, [0.8 + 54.4 * 20 / 100, 1.0])
+
+
+def test_water_balance_bands():
+    output = comp_water_balance()
+    assert set(output.keys()) == set(array_interpolate.WATER_BALANCE_BANDS)
+    for v in output.values():
+        assert v.shape == (comp_df.shape[0],)
+
+
+def test_water_balance_variables():
+    output = comp_water_balance(variables=['ke', 'et_fraction'], dtype=np.float32)
+    assert set(output.keys()) == {'ke', 'et_fraction'}
+    assert output['ke'].dtype == np.float32
+
+
+def test_water_balance_variables_invalid():
+    with pytest.raises(ValueError):
+        comp_water_balance(variables=['etc'])
+
+
+def test_water_balance_etc(tol=0.0001):
+    output = comp_water_balance()
+    etc = output['et_fraction'] * comp_df['eto'].values
+    np.testing.assert_allclose(etc, comp_df['etc'].values, atol=tol)
+
+
+def test_water_balance_ee_state(tol=0.05):
+    """Compare the state series to the EE water balance validation file
+
+    The validation file was generated from daily interpolated NDVI that is not
+    in the file, so the fraction of exposed and wetted soil (few) differs
+    slightly from the stepwise NDVI here.  The last day is not compared since
+    the next day precipitation is not in the file.
+
+    """
+    output = comp_water_balance()
+    for band in ['de', 'de_rew', 'kr', 'ft']:
+        np.testing.assert_allclose(
+            output[band][:-1], comp_df[band].values[:-1], atol=tol, err_msg=band)
+
+    # Ke is zero on the same days and only differs from the file on the days
+    #   that it is limited by few
+    np.testing.assert_array_equal(output['ke'] == 0, comp_df['ke'].values == 0)
+    ke_unlimited = (output['ft'] + (1 - output['ft']) * output['kr']) * array_interpolate.KE_MAX
+    few = np.clip(-1.26 * comp_df['ndvi_interp'].values + 1.18, 0.01, 1)
+    mask = ke_unlimited < few * array_interpolate.KE_MAX
+    np.testing.assert_allclose(output['ke'][mask], comp_df['ke'].values[mask], atol=tol)
+
+
+def point_water_balance(ndvi, et_fraction, et_reference, precip, tew, rew):
+    """Scalar day by day water balance (see interpolate.daily_ke)"""
+    ke_max = array_interpolate.KE_MAX
+    c0, c1 = array_interpolate.C0, array_interpolate.C1
+    de, de_rew = tew, rew
+    c_eff = min(-c1 * de / tew + c0 + c1, 1)
+    output = {band: [] for band in ['de', 'de_rew', 'c_eff', 'ke', 'kr', 'ft', 'de_prev']}
+    for i in range(len(ndvi)):
+        ft = min(max((rew - de_rew) / (ke_max * et_reference[i]), 0), 1)
+        kr = min(max((tew - de) / (tew - rew), 0), 1)
+        few = min(max(-1.26 * ndvi[i] + 1.18, 0.01), 1)
+        ke = min((1 - ft) * kr + ft, few) * ke_max
+        ete_few = ke * et_reference[i] / few
+        precip_evap = (precip[i + 1] * array_interpolate.FRAC_DAY_EVAP +
+                       precip[i] * (1 - array_interpolate.FRAC_DAY_EVAP))
+        output['de_prev'].append(de)
+        de = max(min(de - precip_evap + ete_few, tew), 0)
+        de_rew = max(min(de_rew - precip_evap * c_eff + ete_few, rew), 0)
+        c_eff = min(-c1 * de / tew + c0 + c1, 1)
+        for band, value in [['de', de], ['de_rew', de_rew], ['c_eff', c_eff],
+                            ['ke', ke], ['kr', kr], ['ft', ft]]:
+            output[band].append(value)
+    return {band: np.array(values) for band, values in output.items()}
+
+
+def test_water_balance_state(tol=1E-12):
+    """Compare the full state series on every day to a scalar water balance
+
+    The validation file was generated with a slightly different fraction of
+    exposed and wetted soil (few), so it is only used for the inputs here
+    (see test_water_balance_ee_state() for the comparison to the file).
+
+    """
+    output = comp_water_balance()
+    expected = point_water_balance(
+        ndvi=comp_df['ndvi_interp'].values, et_fraction=comp_df['kc'].values,
+        et_reference=comp_df['eto'].values, precip=np.append(comp_df['pr'].values, 0),
+        tew=TEW, rew=REW,
+    )
+    for band, values in expected.items():
+        np.testing.assert_allclose(output[band], values, rtol=tol, atol=tol, err_msg=band)
+
+
+def test_water_balance_precip_timing():
+    output = comp_water_balance()
+    np.testing.assert_array_equal(output['precip'], comp_df['pr'].values)
+    np.testing.assert_array_equal(output['de_prev'][1:], output['de'][:-1])
+    assert output['de_prev'][0] == TEW
+
+
+def test_water_balance_properties():
+    """Same checks as test_daily_ke() in test_d_interpolate.py"""
+    output = comp_water_balance()
+    base_etf = comp_df['kc'].values
+    for i in range(comp_df.shape[0] - 1):
+        assert base_etf[i] <= output['et_fraction'][i]
+        if output['precip'][i] > 0 and base_etf[i] < 1.15:
+            assert base_etf[i + 1] < output['et_fraction'][i + 1]
+        if output['de'][i] > output['de_rew'].max():
+            assert output['kr'][i + 1] < 1
+        if output['de'][i] < output['de_rew'].max():
+            assert output['kr'][i + 1] == 1
+        if output['de'][i] == output['de'].max():
+            assert output['kr'][i + 1] == 0
+
+
+def test_water_balance_pixels():
+    """Each pixel of a stacked array should match the single pixel result"""
+    days = comp_df.shape[0]
+    rng = np.random.default_rng(0)
+    scale = rng.uniform(0.5, 1.5, size=(1, 3, 4))
+    output = array_interpolate.water_balance(
+        ndvi=comp_df['ndvi_interp'].values[:, None, None] * scale,
+        et_fraction=np.broadcast_to(comp_df['kc'].values[:, None, None], (days, 3, 4)),
+        et_reference=comp_df['eto'].values[:, None, None] * scale,
+        precip=np.append(comp_df['pr'].values, 0)[:, None, None] * np.ones((1, 3, 4)),
+        tew=TEW * scale[0], rew=REW,
+    )
+    for row in range(3):
+        for col in range(4):
+            pixel = array_interpolate.water_balance(
+                ndvi=comp_df['ndvi_interp'].values * scale[0, row, col],
+                et_fraction=comp_df['kc'].values,
+                et_reference=comp_df['eto'].values * scale[0, row, col],
+                precip=np.append(comp_df['pr'].values, 0),
+                tew=TEW * scale[0, row, col], rew=REW,
+            )
+            for band, values in pixel.items():
+                np.testing.assert_allclose(output[band][:, row, col], values)
+
+
+def test_water_balance_nodata():
+    """Masked (NaN) pixels stay masked for the rest of the water balance"""
+    et_reference = np.tile(comp_df['eto'].values[:, None], (1, 2))
+    et_reference[5, 0] = np.nan
+    output = array_interpolate.water_balance(
+        ndvi=comp_df['ndvi_interp'].values[:, None],
+        et_fraction=comp_df['kc'].values[:, None],
+        et_reference=et_reference,
+        precip=np.append(comp_df['pr'].values, 0)[:, None],
+        tew=TEW, rew=REW,
+    )
+    assert np.isfinite(output['de'][:5, 0]).all()
+    assert np.isnan(output['de'][5:, 0]).all()
+    assert np.isfinite(output['de'][:, 1]).all()
+
+
+def test_water_balance_precip_days():
+    with pytest.raises(ValueError):
+        array_interpolate.water_balance(
+            ndvi=comp_df['ndvi_interp'].values,
+            et_fraction=comp_df['kc'].values,
+            et_reference=comp_df['eto'].values,
+            precip=comp_df['pr'].values,
+            tew=TEW, rew=REW,
+        )
+
+
+def test_daily_ke():
+    field_capacity = np.array([25.0, 30.0])
+    wilting_point = np.array([10.0, 12.0])
+    output = array_interpolate.daily_ke(
+        ndvi=comp_df['ndvi_interp'].values[:, None],
+        et_fraction=comp_df['kc'].values[:, None],
+        et_reference=comp_df['eto'].values[:, None],
+        precip=np.append(comp_df['pr'].values, 0)[:, None],
+        field_capacity=field_capacity, wilting_point=wilting_point,
+    )
+    tew, rew = array_interpolate.evaporable_water(field_capacity, wilting_point)
+    np.testing.assert_allclose(output['de'].max(axis=0), tew)
+    np.testing.assert_allclose(output['de_rew'].max(axis=0), rew)
+
+
+@pytest.mark.parametrize('chunk_days', [1, 7, 29, 30, 100])
+def test_water_balance_chunks(chunk_days):
+    """Chunked output should match the single call output"""
+    expected = comp_water_balance()
+    chunks = list(array_interpolate.water_balance_chunks(
+        ndvi=comp_df['ndvi_interp'].values,
+        et_fraction=comp_df['kc'].values,
+        et_reference=comp_df['eto'].values,
+        precip=np.append(comp_df['pr'].values, 0),
+        tew=TEW, rew=REW, chunk_days=chunk_days,
+    ))
+    assert [c[0] for c in chunks] == list(range(0, comp_df.shape[0], chunk_days))
+    for band, values in expected.items():
+        np.testing.assert_array_equal(
+            np.concatenate([output[band] for start, output, state in chunks]), values
+        )
+    start, output, state = chunks[-1]
+    assert state['de'] == expected['de'][-1]
+    assert state['c_eff'] == expected['c_eff'][-1]
+
+
+def test_water_balance_init_state():
+    """Restarting from a saved state should match a continuous run"""
+    expected = comp_water_balance()
+    precip = np.append(comp_df['pr'].values, 0)
+    inputs = {
+        'ndvi': comp_df['ndvi_interp'].values,
+        'et_fraction': comp_df['kc'].values,
+        'et_reference': comp_df['eto'].values,
+    }
+    start, output, state = next(array_interpolate.water_balance_chunks(
+        **{k: v[:12] for k, v in inputs.items()}, precip=precip[:13],
+        tew=TEW, rew=REW, chunk_days=None,
+    ))
+    output = array_interpolate.water_balance(
+        **{k: v[12:] for k, v in inputs.items()}, precip=precip[12:],
+        tew=TEW, rew=REW, init_state=state,
+    )
+    for band, values in output.items():
+        np.testing.assert_array_equal(values, expected[band][12:])
+
+
+def test_water_balance_chunk_days_invalid():
+    with pytest.raises(ValueError):
+        next(array_interpolate.water_balance_chunks(
+            ndvi=[0.5], et_fraction=[0.5], et_reference=[5], precip=[0, 0],
+            tew=TEW, rew=REW, chunk_days=0,
+        ))
+
+
+def test_initial_state():
+    state = array_interpolate.initial_state(tew=np.array([TEW, 2 * TEW]), rew=REW)
+    np.testing.assert_array_equal(state['de'], [TEW, 2 * TEW])
+    np.testing.assert_array_equal(state['de_rew'], [REW, REW])
+    np.testing.assert_allclose(state['c_eff'], [0.8, 0.8])
+
+
+def test_save_load_state(tmp_path):
+    state = array_interpolate.initial_state(tew=np.array([[TEW, 2.0]]), rew=REW)
+    path = tmp_path / 'wb_state.npz'
+    array_interpolate.save_state(path, state, '2018-02-28')
+    output, date = array_interpolate.load_state(path, date='2018-02-28')
+    assert date == '2018-02-28'
+    for band in array_interpolate.STATE_BANDS:
+        np.testing.assert_array_equal(output[band], state[band])
+    assert not (tmp_path / 'wb_state.npz.tmp').exists()
+
+
+def test_load_state_date_mismatch(tmp_path):
+    state = array_interpolate.initial_state(tew=TEW, rew=REW)
+    path = tmp_path / 'wb_state.npz'
+    array_interpolate.save_state(path, state, '2018-02-28')
+    with pytest.raises(ValueError):
+        array_interpolate.load_state(path, date='2018-03-01')
+
+
+def test_load_state_version_mismatch(tmp_path):
+    path = tmp_path / 'wb_state.npz'
+    np.savez(path, version=0, date='2018-02-28', de=TEW, de_rew=REW, c_eff=0.8)
+    with pytest.raises(ValueError):
+        array_interpolate.load_state(path)
+
+
+def test_save_state_missing_band(tmp_path):
+    with pytest.raises(ValueError):
+        array_interpolate.save_state(tmp_path / 'wb_state.npz', {'de': TEW}, '2018-02-28')
+
+
+def test_water_balance_resume_checkpoint(tmp_path):
+    """A run seeded from a saved checkpoint should match a continuous run"""
+    expected = comp_water_balance()
+    precip = np.append(comp_df['pr'].values, 0)
+    start, output, state = next(array_interpolate.water_balance_chunks(
+        ndvi=comp_df['ndvi_interp'].values[:20],
+        et_fraction=comp_df['kc'].values[:20],
+        et_reference=comp_df['eto'].values[:20],
+        precip=precip[:21], tew=TEW, rew=REW, chunk_days=None,
+    ))
+    path = tmp_path / 'wb_state.npz'
+    array_interpolate.save_state(path, state, comp_df['date'].iloc[19])
+
+    state, date = array_interpolate.load_state(path, date=comp_df['date'].iloc[19])
+    output = array_interpolate.water_balance(
+        ndvi=comp_df['ndvi_interp'].values[20:],
+        et_fraction=comp_df['kc'].values[20:],
+        et_reference=comp_df['eto'].values[20:],
+        precip=precip[20:], tew=TEW, rew=REW, init_state=state,
+    )
+    for band, values in output.items():
+        np.testing.assert_array_equal(values, expected[band][20:])
+
+
+def test_precip_block():
+    precip = np.arange(5, dtype=float)[:, None] * np.ones((1, 2))
+    precip_dates = ['2018-02-18', '2018-02-15', '2018-02-16', '2018-02-17', '2018-02-20']
+    output = array_interpolate.precip_block(precip, precip_dates, '2018-02-15', days=5)
+    assert output.shape == (6, 2)
+    np.testing.assert_array_equal(output[:, 0], [1, 2, 3, 0, np.nan, 4])
+
+
+def test_precip_block_comp_df():
+    """The aligned block should match the validation precipitation"""
+    output = array_interpolate.precip_block(
+        comp_df['pr'].values, comp_df['date'].values, comp_df['date'].iloc[0],
+        days=comp_df.shape[0] - 1,
+    )
+    np.testing.assert_array_equal(output, comp_df['pr'].values)
+
+
+def test_precip_block_dates_invalid():
+    with pytest.raises(ValueError):
+        array_interpolate.precip_block([1.0, 2.0], ['2018-02-15'], '2018-02-15', days=1)
+
+
+def daily_comp(values, scene_dates, start_date, days, interp_days):
+    """Day by day implementation of the openet.core.interpolate.daily() logic"""
+    scene_dates = np.asarray(scene_dates, dtype='datetime64[D]')
+    output = np.full((days,) + values.shape[1:], np.nan)
+    for i, date in enumerate(np.datetime64(start_date, 'D') + np.arange(days)):
+        prev_scenes = np.flatnonzero(
+            (scene_dates >= date - interp_days) & (scene_dates < date))
+        next_scenes = np.flatnonzero(
+            (scene_dates >= date) & (scene_dates <= date + interp_days))
+        for pixel in np.ndindex(values.shape[1:]):
+            prev = [j for j in prev_scenes if np.isfinite(values[(j,) + pixel])]
+            next = [j for j in next_scenes if np.isfinite(values[(j,) + pixel])]
+            prev = max(prev, key=lambda j: scene_dates[j]) if prev else None
+            next = min(next, key=lambda j: scene_dates[j]) if next else None
+            if prev is None and next is None:
+                continue
+            prev = next if prev is None else prev
+            next = prev if next is None else next
+            prev_value, next_value = values[(prev,) + pixel], values[(next,) + pixel]
+            if prev == next:
+                output[(i,) + pixel] = prev_value
+            else:
+                ratio = (date - scene_dates[prev]) / (scene_dates[next] - scene_dates[prev])
+                output[(i,) + pixel] = prev_value + (next_value - prev_value) * ratio
+    return output
+
+
+def test_daily_scene_coll_values(tol=0.0001):
+    """Match the test_d_interpolate daily NDVI interpolation values"""
+    output = array_interpolate.daily(
+        np.array([0.2, 0.4, 0.6])[:, np.newaxis],
+        ['2017-07-08', '2017-07-16', '2017-07-24'],
+        start_date='2017-07-01', days=31, interp_days=32)[:, 0]
+    assert output.shape == (31,)
+    assert abs(output[0] - 0.2) <= tol
+    assert abs(output[7] - 0.2) <= tol
+    assert abs(output[9] - 0.25) <= tol
+    assert abs(output[11] - 0.3) <= tol
+    assert abs(output[15] - 0.4) <= tol
+    assert abs(output[23] - 0.6) <= tol
+    assert abs(output[30] - 0.6) <= tol
+
+
+def test_daily_scene_times_millis():
+    scene_dates = ['2017-07-08', '2017-07-16', '2017-07-24']
+    # 0 UTC and Landsat overpass times (18 UTC) are both mapped to the scene day
+    scene_times = np.array(scene_dates, dtype='datetime64[ms]').astype(np.int64)
+    values = np.array([0.2, 0.4, 0.6])
+    expected = array_interpolate.daily(values, scene_dates, '2017-07-01', 31)
+    np.testing.assert_array_equal(
+        array_interpolate.daily(values, scene_times, '2017-07-01', 31), expected)
+    np.testing.assert_array_equal(
+        array_interpolate.daily(values, scene_times + 18 * 3600000, '2017-07-01', 31),
+        expected)
+
+
+@pytest.mark.parametrize('interp_days', [2, 5, 32])
+def test_daily_comp(interp_days):
+    rng = np.random.default_rng(0)
+    scene_dates = np.datetime64('2017-06-20') + np.sort(rng.choice(60, 10, replace=False))
+    values = rng.uniform(size=(10, 3, 4))
+    values[rng.uniform(size=values.shape) < 0.3] = np.nan
+    output = array_interpolate.daily(
+        values, scene_dates, '2017-07-01', 31, interp_days=interp_days)
+    expected = daily_comp(values, scene_dates, '2017-07-01', 31, interp_days)
+    np.testing.assert_allclose(output, expected, equal_nan=True)
+
+
+def test_daily_interp_days():
+    """Scenes exactly interp_days before or after the day are included"""
+    output = array_interpolate.daily(
+        [1.0, 3.0], ['2017-07-01', '2017-07-11'], '2017-06-25', 23, interp_days=5)
+    assert np.isnan(output[0])
+    assert output[1] == 1
+    assert output[6] == 1
+    assert output[11] == 2
+    assert output[16] == 3
+    assert output[21] == 3
+    assert np.isnan(output[22])
+
+
+def test_daily_unsorted_dict():
+    values = {'et_fraction': np.array([0.6, 0.2]), 'ndvi': np.array([0.8, 0.4])}
+    output = array_interpolate.daily(
+        values, ['2017-07-10', '2017-07-06'], '2017-07-06', 5)
+    np.testing.assert_allclose(output['et_fraction'], [0.2, 0.3, 0.4, 0.5, 0.6])
+    np.testing.assert_allclose(output['ndvi'], [0.4, 0.5, 0.6, 0.7, 0.8])
+
+
+def test_daily_no_scenes():
+    output = array_interpolate.daily(np.empty((0, 2)), [], '2017-07-01', 3)
+    assert output.shape == (3, 2)
+    assert np.isnan(output).all()
+
+
+def test_daily_update():
+    rng = np.random.default_rng(0)
+    scene_ids = ['a', 'b', 'c', 'd']
+    scene_dates = np.array(['2017-07-08', '2017-07-16', '2017-07-24', '2017-08-09'],
+                           dtype='datetime64[D]')
+    values = rng.uniform(size=(4, 2, 2))
+    values[1, 0, 0] = np.nan
+
+    output, index, dates = array_interpolate.daily_update(
+        values[:3], scene_ids[:3], scene_dates[:3], '2017-07-01', 62, interp_days=8)
+    assert len(dates) == 62
+    np.testing.assert_allclose(
+        output, array_interpolate.daily(values[:3], scene_dates[:3], '2017-07-01', 62, 8))
+
+    # Only the days within interp_days of the new scene are recomputed
+    previous = output.copy()
+    output, index, dates = array_interpolate.daily_update(
+        values, scene_ids, scene_dates, '2017-07-01', 62, interp_days=8,
+        output=output, previous_index=index)
+    assert dates[0] == '2017-08-01' and dates[-1] == '2017-08-17'
+    assert len(dates) == 17
+    np.testing.assert_allclose(
+        output, array_interpolate.daily(values, scene_dates, '2017-07-01', 62, 8),
+        equal_nan=True)
+    np.testing.assert_array_equal(output[:31], previous[:31])
+
+    # No changes
+    output, index, dates = array_interpolate.daily_update(
+        values, scene_ids, scene_dates, '2017-07-01', 62, interp_days=8,
+        output=output, previous_index=index)
+    assert dates == []
+
+
+def test_daily_update_output_shape_exception():
+    with pytest.raises(ValueError):
+        array_interpolate.daily_update(
+            np.zeros((1, 2)), ['a'], ['2017-07-01'], '2017-07-01', 5,
+            output=np.zeros((4, 2)), previous_index={})
+
+
+def daily_arrays(days=75, seed=0):
+    rng = np.random.default_rng(seed)
+    et_reference = rng.uniform(2, 8, size=(days, 2, 3))
+    et_fraction = rng.uniform(0.2, 1.0, size=(days, 2, 3))
+    et_fraction[rng.uniform(size=et_fraction.shape) < 0.1] = np.nan
+    return {
+        'et': et_fraction * et_reference,
+        'et_reference': et_reference,
+        'ndvi': rng.uniform(0.1, 0.8, size=(days, 2, 3)),
+    }
+
+
+@pytest.mark.parametrize('chunk_days', [1, 10, 31, 75])
+def test_aggregate_chunks_monthly(chunk_days):
+    arrays = daily_arrays()
+    chunks = [
+        (start, {k: v[start:start + chunk_days] for k, v in arrays.items()})
+        for start in range(0, 75, chunk_days)
+    ]
+    output = list(array_interpolate.aggregate_chunks(chunks, '2017-06-20', 'monthly'))
+    assert [period for period, values in output] == [
+        '2017-06-01', '2017-07-01', '2017-08-01', '2017-09-01']
+
+    # July is days 11-41 of the daily arrays
+    july = output[1][1]
+    np.testing.assert_allclose(july['et'], np.nansum(arrays['et'][11:42], axis=0))
+    np.testing.assert_allclose(july['et_reference'], arrays['et_reference'][11:42].sum(axis=0))
+    np.testing.assert_allclose(july['ndvi'], arrays['ndvi'][11:42].mean(axis=0))
+    np.testing.assert_allclose(july['et_fraction'], july['et'] / july['et_reference'])
+
+
+def test_aggregate_chunks_annual_variables():
+    arrays = daily_arrays()
+    output = list(array_interpolate.aggregate_chunks(
+        [(0, arrays)], '2017-12-01', 'annual', variables=['et_fraction']))
+    assert [period for period, values in output] == ['2017-01-01', '2018-01-01']
+    assert list(output[0][1].keys()) == ['et_fraction']
+
+
+def test_aggregate_chunks_nodata():
+    arrays = {'ndvi': np.full((5, 2), np.nan), 'et': np.full((5, 2), np.nan)}
+    arrays['ndvi'][2, 0] = 0.5
+    period, output = next(array_interpolate.aggregate_chunks([(0, arrays)], '2017-07-01'))
+    np.testing.assert_array_equal(output['ndvi'], [0.5, np.nan])
+    assert np.isnan(output['et']).all()
+
+
+def test_aggregate_chunks_water_balance():
+    """Water balance chunks can be aggregated as they are computed"""
+    days = 45
+    chunks = array_interpolate.water_balance_chunks(
+        ndvi=np.full((days, 1), 0.3), et_fraction=np.full((days, 1), 0.4),
+        et_reference=np.full((days, 1), 5.0), precip=np.zeros((days + 1, 1)),
+        tew=np.array([4.35]), rew=np.array([2.432]), chunk_days=7,
+        variables=['et_fraction', 'ke'])
+    output = list(array_interpolate.aggregate_chunks(chunks, '2017-07-01'))
+    assert [period for period, values in output] == ['2017-07-01', '2017-08-01']
+    assert set(output[0][1].keys()) == {'et_fraction', 'ke'}
+
+
+def test_aggregate_chunks_t_interval_exception():
+    with pytest.raises(ValueError):
+        next(array_interpolate.aggregate_chunks([], '2017-07-01', 'daily'))
+
+
+@pytest.mark.parametrize('chunk_days', [None, 7])
+def test_water_balance_chunks_jit_flag(chunk_days):
+    """Check that the fused kernel matches the NumPy water balance"""
+    pytest.importorskip('numba')
+    rng = np.random.default_rng(0)
+    days = comp_df.shape[0]
+    ndvi = comp_df['ndvi_interp'].values[:, None] + rng.uniform(-0.2, 0.2, (days, 20))
+    et_fraction = comp_df['kc'].values[:, None] + rng.uniform(-0.2, 0.2, (days, 20))
+    ndvi[5, :3] = np.nan
+    et_fraction[:, 4] = 1.3
+    init_state = {
+        'de': np.full(20, TEW / 2), 'de_rew': np.full(20, REW / 2), 'c_eff': np.full(20, 0.9)}
+    args = {
+        'ndvi': ndvi, 'et_fraction': et_fraction.astype(np.float32),
+        'et_reference': comp_df['eto'].values[:, None],
+        'precip': np.append(comp_df['pr'].values, 0)[:, None],
+        'tew': TEW, 'rew': np.linspace(REW / 2, REW, 20), 'chunk_days': chunk_days,
+        'init_state': init_state, 'variables': ['de', 'ke', 'de_prev', 'et_fraction'],
+    }
+    expected = list(array_interpolate.water_balance_chunks(**args))
+    output = list(array_interpolate.water_balance_chunks(jit_flag=True, **args))
+    # The input state arrays are not modified
+    assert (init_state['de'] == TEW / 2).all()
+    assert len(output) == len(expected)
+    for (start, chunk, state), (exp_start, exp_chunk, exp_state) in zip(output, expected):
+        assert start == exp_start
+        for band in args['variables']:
+            np.testing.assert_allclose(chunk[band], exp_chunk[band], rtol=1E-12)
+        for band in array_interpolate.STATE_BANDS:
+            np.testing.assert_allclose(state[band], exp_state[band], rtol=1E-12)
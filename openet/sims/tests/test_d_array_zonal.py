@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from openet.sims import array_zonal
+
+
+def naive_zonal_stats(values, labels, n_labels, reducer):
+    output = np.full((values.shape[0], n_labels), np.nan)
+    for t in range(values.shape[0]):
+        for label in range(1, n_labels + 1):
+            zone = values[t][(labels == label) & ~np.isnan(values[t])]
+            if reducer == 'count':
+                output[t, label - 1] = zone.size
+            elif reducer == 'sum':
+                output[t, label - 1] = zone.sum()
+            elif zone.size:
+                output[t, label - 1] = zone.mean()
+    return output
+
+
+@pytest.mark.parametrize('reducer', ['mean', 'sum', 'count'])
+def test_zonal_stats(reducer):
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 6, size=(20, 30))
+    values = rng.uniform(0, 10, size=(4, 20, 30))
+    values[rng.uniform(size=values.shape) < 0.2] = np.nan
+    # Zone 6 does not have any pixels
+    output = array_zonal.zonal_stats(values, labels, n_labels=6, reducer=reducer)
+    expected = naive_zonal_stats(values, labels, 6, reducer)
+    assert output.shape == (4, 6)
+    np.testing.assert_allclose(output, expected)
+
+
+def test_zonal_stats_2d():
+    labels = np.array([[1, 1, 0], [2, 2, 2]])
+    values = np.array([[1.0, 3.0, 100], [np.nan, 4.0, 6.0]])
+    np.testing.assert_allclose(array_zonal.zonal_stats(values, labels), [2, 5])
+    np.testing.assert_array_equal(
+        array_zonal.zonal_stats(values, labels, reducer='count'), [2, 2])
+
+
+def test_zonal_stats_shape_exception():
+    with pytest.raises(ValueError):
+        array_zonal.zonal_stats(np.zeros((2, 3)), np.zeros((3, 2), dtype=int))
+
+
+def test_zonal_stats_reducer_exception():
+    with pytest.raises(ValueError):
+        array_zonal.zonal_stats(np.zeros((2, 3)), np.zeros((2, 3), dtype=int), reducer='max')
+
+
+def test_rasterize_features():
+    pytest.importorskip('rasterio')
+    from affine import Affine
+    features = [
+        {'type': 'Feature', 'properties': {},
+         'geometry': {'type': 'Polygon',
+                      'coordinates': [[[0, 0], [2, 0], [2, -2], [0, -2], [0, 0]]]}},
+        {'type': 'Polygon', 'coordinates': [[[2, -2], [4, -2], [4, -4], [2, -4], [2, -2]]]},
+    ]
+    labels = array_zonal.rasterize_features(features, (4, 4), Affine(1, 0, 0, 0, -1, 0))
+    np.testing.assert_array_equal(
+        labels, [[1, 1, 0, 0], [1, 1, 0, 0], [0, 0, 2, 2], [0, 0, 2, 2]])
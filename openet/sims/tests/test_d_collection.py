@@ -5,6 +5,7 @@ import ee
 import pytest
 
 import openet.sims as sims
+import openet.sims.et_reference as et_reference
 import openet.sims.utils as utils
 # TODO: import utils from openet.core
 # import openet.core.utils as utils
@@ -352,6 +353,23 @@ def test_Collection_interpolate_default():
     assert {y['id'] for x in output['features'] for y in x['bands']} == VARIABLES
 
 
+def test_Collection_interpolate_et_reference_indexed():
+    """The daily reference ET images are shared through the reference ET index"""
+    et_reference.index.clear()
+    try:
+        default_coll_obj(collections=['LANDSAT/LC08/C02/T1_L2']).interpolate(
+            t_interval='daily')
+        misses = et_reference.index.info()['misses']
+        # Each day of the (31 day) date range is only resolved once
+        assert misses == 31
+        default_coll_obj(collections=['LANDSAT/LE07/C02/T1_L2']).interpolate(
+            t_interval='daily')
+        assert et_reference.index.info()['misses'] == misses
+        assert et_reference.index.info()['hits'] >= misses
+    finally:
+        et_reference.index.clear()
+
+
 @pytest.mark.parametrize('use_joins', [True, False])
 def test_Collection_interpolate_use_joins(use_joins):
     """Only checking if the parameter is accepted and runs for now"""
@@ -391,6 +409,15 @@ def test_Collection_interpolate_t_interval_monthly():
     assert {y['id'] for x in output['features'] for y in x['bands']} == VARIABLES
 
 
+def test_Collection_interpolate_use_groups_monthly():
+    """Test if the grouped aggregation returns the same monthly images"""
+    output = utils.getinfo(default_coll_obj().interpolate(
+        t_interval='monthly', use_groups=True))
+    assert output['type'] == 'ImageCollection'
+    assert parse_scene_id(output) == ['201707']
+    assert {y['id'] for x in output['features'] for y in x['bands']} == VARIABLES
+
+
 # CGM - Commenting out since this test is failing with a memory error
 # def test_Collection_interpolate_t_interval_annual():
 #     """Test if the annual time interval parameter works"""
@@ -409,6 +436,59 @@ def test_Collection_interpolate_t_interval_custom():
     assert {y['id'] for x in output['features'] for y in x['bands']} == VARIABLES
 
 
+def test_Collection_interpolate_update_full():
+    """All periods are interpolated if there is no previous scene index"""
+    coll_obj = default_coll_obj(start_date='2017-07-01', end_date='2017-07-05')
+    output_coll, scene_index = coll_obj.interpolate_update(t_interval='daily')
+    output = utils.getinfo(output_coll)
+    assert parse_scene_id(output) == ['20170701', '20170702', '20170703', '20170704']
+    assert sorted(scene_index.keys()) == [
+        '2017-07-01', '2017-07-02', '2017-07-03', '2017-07-04']
+
+
+def test_Collection_interpolate_update_unchanged():
+    """Nothing is interpolated if the scenes have not changed"""
+    coll_obj = default_coll_obj(start_date='2017-07-01', end_date='2017-07-05')
+    output_coll, scene_index = coll_obj.interpolate_update(t_interval='daily')
+    output_coll, scene_index = coll_obj.interpolate_update(
+        scene_index=scene_index, t_interval='daily')
+    assert utils.getinfo(output_coll.size()) == 0
+
+
+def test_Collection_interpolate_update_new_scene():
+    """Only the days near the (missing) scene are interpolated"""
+    coll_obj = default_coll_obj(start_date='2017-07-01', end_date='2017-08-01')
+    output_coll, scene_index = coll_obj.interpolate_update(
+        t_interval='daily', interp_days=4)
+    scene_id = 'LANDSAT/LC08/C02/T1_L2/LC08_044033_20170716'
+    previous_index = {
+        k: [x for x in v if x != scene_id] for k, v in scene_index.items()
+    }
+    output_coll, scene_index = coll_obj.interpolate_update(
+        scene_index=previous_index, t_interval='daily', interp_days=4)
+    assert parse_scene_id(utils.getinfo(output_coll)) == [
+        f'201707{day:02d}' for day in range(12, 21)]
+
+
+def test_Collection_interpolate_update_scene_list_not_cached(monkeypatch):
+    """The scene list is always requested so that new scenes are found"""
+    cache_ttls = []
+
+    def getinfo(ee_obj, n=4, cache_ttl=None):
+        cache_ttls.append(cache_ttl)
+        return {'id': [], 'time': []}
+
+    monkeypatch.setattr(utils, 'getinfo', getinfo)
+    coll_obj = default_coll_obj(start_date='2017-07-01', end_date='2017-07-05')
+    coll_obj.interpolate_update(scene_index={}, t_interval='daily')
+    assert cache_ttls == [0]
+
+
+def test_Collection_interpolate_update_t_interval_exception():
+    with pytest.raises(ValueError):
+        default_coll_obj().interpolate_update(t_interval='custom')
+
+
 # TODO: Write test for annual interpolation with a date range that is too short
 
 
@@ -631,3 +711,15 @@ def test_Collection_get_image_ids(collections, scene_id_list):
     output = default_coll_obj(collections=collections, variables=None).get_image_ids()
     assert type(output) is list
     assert set(x.split('/')[-1] for x in output) == set(scene_id_list)
+
+
+def test_Collection_zonal_stats():
+    """Test if the zonal statistics are returned for each feature and month"""
+    features = ee.FeatureCollection([
+        ee.Feature(ee.Geometry.Point(SCENE_POINT).buffer(100), {'field': 'a'}),
+        ee.Feature(ee.Geometry.Point(SCENE_POINT).buffer(200), {'field': 'b'}),
+    ])
+    output = default_coll_obj().zonal_stats(
+        features, reducer='mean', t_interval='monthly', feature_id='field', max_features=1)
+    assert sorted(output['feature_id']) == ['a', 'b']
+    assert set(output.dtype.names) == {'feature_id', 'time'} | VARIABLES
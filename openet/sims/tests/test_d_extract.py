@@ -0,0 +1,131 @@
+import ee
+import numpy as np
+import pytest
+
+from openet.sims import extract
+import openet.sims.utils as utils
+
+TEST_POINTS = {'field_a': (-121.5265, 38.7399), 'field_b': (-121.5, 38.7)}
+
+
+def test_point_coll_values_columns():
+    """Check the columnar output using a local stand in for the requests"""
+    requests = []
+
+    def getinfo_fn(ee_obj):
+        requests.append(ee_obj)
+        # Values for two images (ordered by image) at each point in the chunk
+        return {
+            'index': [0, 1, 0, 1],
+            'time': [1499990400000, 1499990400000, 1500595200000, 1500595200000],
+            'ndvi': [0.5, 0.6, -9999, 0.7],
+        }
+
+    output = extract.point_coll_values(
+        ee.ImageCollection([]), TEST_POINTS, bands=['ndvi'], getinfo_fn=getinfo_fn)
+    assert len(requests) == 1
+    assert output.dtype.names == ('point_id', 'time', 'ndvi')
+    assert list(output['point_id']) == ['field_a', 'field_b', 'field_a', 'field_b']
+    assert str(output['time'][0]) == '2017-07-14T00:00:00.000'
+    np.testing.assert_array_equal(output['ndvi'], [0.5, 0.6, np.nan, 0.7])
+
+
+def test_point_coll_values_chunks():
+    """Check that the point IDs are offset by the chunk start"""
+    def getinfo_fn(ee_obj):
+        return {'index': [0, 1], 'time': [0, 0], 'ndvi': [0.1, 0.2]}
+
+    output = extract.point_coll_values(
+        ee.ImageCollection([]), [(0, 0)] * 6, bands=['ndvi'], chunk_size=2,
+        getinfo_fn=getinfo_fn)
+    assert list(output['point_id']) == [0, 1, 2, 3, 4, 5]
+
+
+def test_point_coll_values_error():
+    def getinfo_fn(ee_obj):
+        raise ee.EEException('Image.load: Asset not found')
+
+    with pytest.raises(ee.EEException):
+        extract.point_coll_values(
+            ee.ImageCollection([]), TEST_POINTS, bands=['ndvi'], getinfo_fn=getinfo_fn)
+
+
+def test_point_coll_values_chunk_size_exception():
+    with pytest.raises(ValueError):
+        extract.point_coll_values(ee.ImageCollection([]), TEST_POINTS, bands=['ndvi'],
+                                  chunk_size=0)
+
+
+def test_point_coll_values(tol=0.001):
+    """Compare the batched values to the single point values"""
+    input_img = (
+        ee.Image('USGS/3DEP/10m').select(['elevation'], ['output'])
+        .set({'system:time_start': ee.Date('2012-04-04').millis()})
+    )
+    input_coll = ee.ImageCollection([input_img])
+    output = extract.point_coll_values(input_coll, TEST_POINTS, scale=30, chunk_size=1)
+    for point_id, xy in TEST_POINTS.items():
+        expected = utils.point_coll_value(input_coll, xy, scale=30)['output']['2012-04-04']
+        row = output[output['point_id'] == point_id]
+        assert abs(row['output'][0] - expected) <= tol
+
+
+def square(x, y, size=0.001):
+    return ee.Geometry.Rectangle([x, y, x + size, y + size])
+
+
+@pytest.mark.parametrize(
+    'areas, max_features, max_area, expected',
+    [
+        [[1, 1, 1, 1, 1], 2, None, [(0, 2), (2, 4), (4, 5)]],
+        [[1, 1, 1, 1, 1], 10, 2, [(0, 2), (2, 4), (4, 5)]],
+        [[1, 5, 1, 1], 10, 2, [(0, 1), (1, 2), (2, 4)]],
+        [[1, 1, 1], 10, None, [(0, 3)]],
+        [[], 10, None, []],
+    ]
+)
+def test_feature_batches(areas, max_features, max_area, expected):
+    assert extract.feature_batches(areas, max_features, max_area) == expected
+
+
+def test_zonal_stats_columns():
+    """Check the merged batches using a local stand in for the requests"""
+    requests = []
+
+    def getinfo_fn(ee_obj):
+        requests.append(ee_obj)
+        n = len(requests)
+        return {'feature_id': [f'{n}_0', f'{n}_1'], 'time': [0, 0], 'et': [float(n), -9999]}
+
+    features = [ee.Feature(square(-121.5, 38.7 + 0.01 * i)) for i in range(4)]
+    output = extract.zonal_stats(
+        ee.ImageCollection([]), features, bands=['et'], max_features=2,
+        getinfo_fn=getinfo_fn)
+    assert len(requests) == 2
+    assert output.dtype.names == ('feature_id', 'time', 'et')
+    assert len(output) == 4
+    assert np.isnan(output['et']).sum() == 2
+
+
+def test_zonal_stats_reducer_exception():
+    with pytest.raises(ValueError):
+        extract.zonal_stats(ee.ImageCollection([]), [], bands=['et'], reducer='deadbeef')
+
+
+def test_zonal_stats(tol=0.001):
+    """Compare the batched zonal means to a single reduceRegion"""
+    input_img = (
+        ee.Image('USGS/3DEP/10m').select(['elevation'], ['output'])
+        .set({'system:time_start': ee.Date('2012-04-04').millis()})
+    )
+    features = [ee.Feature(square(-106.03, 37.17 + 0.01 * i), {'field': f'f{i}'})
+                for i in range(3)]
+    output = extract.zonal_stats(
+        ee.ImageCollection([input_img]), features, bands=['output'], feature_id='field',
+        scale=30, max_features=2, max_area=2E5)
+    assert sorted(output['feature_id']) == ['f0', 'f1', 'f2']
+    for ftr in features:
+        expected = utils.getinfo(input_img.reduceRegion(
+            ee.Reducer.mean(), ftr.geometry(), scale=30))['output']
+        row = output[output['feature_id'] == utils.getinfo(ftr.get('field'))]
+        assert abs(row['output'][0] - expected) <= tol
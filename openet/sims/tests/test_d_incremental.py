@@ -0,0 +1,60 @@
+import pytest
+
+import openet.sims.incremental as incremental
+
+SCENES = {
+    'LE07_044033_20170708': '2017-07-08',
+    'LC08_044033_20170716': '2017-07-16',
+    'LE07_044033_20170724': '2017-07-24',
+}
+
+
+def test_scene_index():
+    index = incremental.scene_index(SCENES, '2017-07-01', '2017-08-01', interp_days=8)
+    assert len(index) == 31
+    assert index['2017-07-01'] == ('LE07_044033_20170708',)
+    assert index['2017-07-16'] == tuple(sorted(SCENES.keys()))
+    assert index['2017-07-31'] == ('LE07_044033_20170724',)
+
+
+def test_scene_index_millis():
+    scenes = [('LC08_044033_20170716', 1500228000000)]
+    index = incremental.scene_index(scenes, '2017-07-16', '2017-07-17', interp_days=1)
+    assert index == {'2017-07-16': ('LC08_044033_20170716',)}
+
+
+def test_changed_dates_new_scene():
+    """A new scene only changes the days within interp_days of the scene"""
+    previous = incremental.scene_index(SCENES, '2017-07-01', '2017-08-01', interp_days=4)
+    scenes = dict(SCENES, LC08_044033_20170801='2017-08-01')
+    current = incremental.scene_index(scenes, '2017-07-01', '2017-08-01', interp_days=4)
+    assert incremental.changed_dates(previous, current) == [
+        '2017-07-28', '2017-07-29', '2017-07-30', '2017-07-31']
+
+
+def test_changed_dates_json_lists():
+    previous = incremental.scene_index(SCENES, '2017-07-01', '2017-08-01')
+    previous = {k: list(v) for k, v in previous.items()}
+    current = incremental.scene_index(SCENES, '2017-07-01', '2017-08-02')
+    assert incremental.changed_dates(previous, current) == ['2017-08-01']
+
+
+@pytest.mark.parametrize(
+    'dates, t_interval, expected',
+    [
+        [['2017-07-02', '2017-07-03', '2017-07-05'], 'daily',
+         [('2017-07-02', '2017-07-04'), ('2017-07-05', '2017-07-06')]],
+        [['2017-06-30', '2017-07-05'], 'monthly', [('2017-06-01', '2017-08-01')]],
+        [['2017-05-30', '2017-07-05'], 'monthly',
+         [('2017-05-01', '2017-06-01'), ('2017-07-01', '2017-08-01')]],
+        [['2017-12-31', '2018-01-01'], 'annual', [('2017-01-01', '2019-01-01')]],
+        [[], 'daily', []],
+    ]
+)
+def test_changed_periods(dates, t_interval, expected):
+    assert incremental.changed_periods(dates, t_interval) == expected
+
+
+def test_changed_periods_t_interval_exception():
+    with pytest.raises(ValueError):
+        incremental.changed_periods(['2017-07-01'], 'custom')
@@ -2,6 +2,7 @@ import datetime
 # import pprint
 
 import ee
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -129,6 +130,32 @@ def test_from_scene_et_fraction_t_interval_monthly_values(tol=0.0001):
     assert output['count']['2017-07-01'] == 3
 
 
+@pytest.mark.parametrize('t_interval', ['monthly', 'annual'])
+def test_from_scene_et_fraction_use_groups_values(t_interval, tol=0.0001):
+    """Check that the grouped aggregation matches the filtered aggregation"""
+    output_coll = interpolate.from_scene_et_fraction(
+        scene_coll(['et_fraction', 'ndvi']),
+        start_date='2017-07-01', end_date='2017-08-01',
+        variables=['et', 'et_reference', 'et_fraction', 'ndvi', 'count'],
+        interp_args={'interp_method': 'linear', 'interp_days': 32,
+                     'use_groups': True},
+        model_args={'et_reference_source': 'IDAHO_EPSCOR/GRIDMET',
+                    'et_reference_band': 'eto',
+                    'et_reference_factor': 1.0,
+                    'et_reference_resample': 'nearest'},
+        t_interval=t_interval,
+    )
+
+    TEST_POINT = (-121.5265, 38.7399)
+    output = utils.point_coll_value(output_coll, TEST_POINT, scale=30)
+    period = '2017-07-01'
+    assert abs(output['ndvi'][period] - 0.6) <= tol
+    assert abs(output['et_fraction'][period] - 0.4) <= tol
+    assert abs(output['et_reference'][period] - 236.5) <= tol
+    assert abs(output['et'][period] - (236.5 * 0.4)) <= tol
+    assert output['count'][period] == 3
+
+
 def test_from_scene_et_fraction_t_interval_custom_values(tol=0.0001):
     output_coll = interpolate.from_scene_et_fraction(
         scene_coll(['et_fraction', 'ndvi']),
@@ -454,6 +481,141 @@ def test_daily_ke(synth_test_imgs, synth_precip_imgs):
         if evap_df.loc[i, 'de'] == evap_df.de.max():
             assert evap_df.loc[i+1, 'kr'] == 0
 
+    # Compare the state series to the validation file, except for the last day
+    #   (see test_d_array_interpolate.test_water_balance_ee_state)
+    for band in ['de', 'de_rew', 'kr', 'ft']:
+        np.testing.assert_allclose(
+            evap_df[band].values[:-1], comp_df[band].values[:-1], atol=0.05, err_msg=band)
+
+
+WB_SOIL_ARGS = {
+    'fc_source': 'projects/eeflux/soils/gsmsoil_mu_a_fc_10cm_albers_100',
+    'fc_band': 'b1',
+    'wp_source': 'projects/eeflux/soils/gsmsoil_mu_a_wp_10cm_albers_100',
+    'wp_band': 'b1',
+}
+
+
+def test_daily_ke_precip_join_flag(synth_test_imgs, synth_precip_imgs, tol=0.0001):
+    """Joining the precipitation images should match filtering for each day"""
+    output = {}
+    for precip_join_flag in [True, False]:
+        evap_imgs = interpolate.daily_ke(
+            synth_test_imgs, model_args={}, precip_source=synth_precip_imgs,
+            precip_band='pr', precip_join_flag=precip_join_flag, **WB_SOIL_ARGS
+        )
+        output[precip_join_flag] = utils.point_coll_value(
+            evap_imgs.select(['precip', 'de', 'ke']), TEST_POINT, scale=30
+        )
+    for band in ['precip', 'de', 'ke']:
+        for date, value in output[False][band].items():
+            assert abs(output[True][band][date] - value) <= tol
+
+
+def test_daily_ke_precip_join_properties(synth_test_imgs, synth_precip_imgs):
+    """The joined precipitation images should not be left on the output images"""
+    evap_imgs = interpolate.daily_ke(
+        synth_test_imgs, model_args={}, precip_source=synth_precip_imgs,
+        precip_band='pr', precip_join_flag=True, **WB_SOIL_ARGS
+    )
+    output = utils.getinfo(evap_imgs.first())
+    assert 'precip_current' not in output['properties'].keys()
+    assert 'precip_next' not in output['properties'].keys()
+    assert output['properties']['system:time_start']
+
+
+def test_daily_ke_state(synth_test_imgs, synth_precip_imgs, tol=0.0001):
+    """The end state should match the last day of the daily_ke collection"""
+    evap_imgs = interpolate.daily_ke(
+        synth_test_imgs, model_args={}, precip_source=synth_precip_imgs,
+        precip_band='pr', **WB_SOIL_ARGS
+    )
+    state_img = interpolate.daily_ke_state(
+        synth_test_imgs, precip_source=synth_precip_imgs, precip_band='pr',
+        **WB_SOIL_ARGS
+    )
+    last_img = ee.Image(evap_imgs.toList(evap_imgs.size()).get(-1))
+    output = utils.point_image_value(state_img, TEST_POINT, scale=30)
+    expected = utils.point_image_value(
+        last_img.select(interpolate.WATER_BALANCE_STATE_BANDS), TEST_POINT, scale=30
+    )
+    assert set(output.keys()) == set(interpolate.WATER_BALANCE_STATE_BANDS)
+    for band in interpolate.WATER_BALANCE_STATE_BANDS:
+        assert abs(output[band] - expected[band]) <= tol
+
+
+def test_daily_ke_init_img(synth_test_imgs, synth_precip_imgs, tol=0.0001):
+    """Restarting from a spin-up state image should match a continuous run"""
+    split_date = '2018-03-01'
+    evap_imgs = interpolate.daily_ke(
+        synth_test_imgs, model_args={}, precip_source=synth_precip_imgs,
+        precip_band='pr', **WB_SOIL_ARGS
+    )
+    state_img = interpolate.daily_ke_state(
+        synth_test_imgs.filterDate(start_date, split_date),
+        precip_source=synth_precip_imgs, precip_band='pr', **WB_SOIL_ARGS
+    )
+    restart_imgs = interpolate.daily_ke(
+        synth_test_imgs.filterDate(split_date, '2018-03-20'), model_args={},
+        precip_source=synth_precip_imgs, precip_band='pr', init_img=state_img,
+        **WB_SOIL_ARGS
+    )
+    output = utils.point_coll_value(restart_imgs.select(['de', 'ke']), TEST_POINT, scale=30)
+    expected = utils.point_coll_value(
+        evap_imgs.filterDate(split_date, '2018-03-20').select(['de', 'ke']),
+        TEST_POINT, scale=30
+    )
+    for band in ['de', 'ke']:
+        for date, value in expected[band].items():
+            assert abs(output[band][date] - value) <= tol
+
+
+@pytest.mark.parametrize(
+    'state_date, state_version',
+    [
+        ['2018-02-27', interpolate.WATER_BALANCE_STATE_VERSION],
+        ['2018-02-28', interpolate.WATER_BALANCE_STATE_VERSION + 1],
+        ['2018-02-28', None],
+    ]
+)
+def test_daily_ke_init_img_exception(synth_test_imgs, synth_precip_imgs,
+                                     state_date, state_version):
+    """The state image must be versioned and be for the day before the start"""
+    state_img = interpolate.state_image(
+        interpolate.daily_ke_state(
+            synth_test_imgs.filterDate(start_date, '2018-03-01'),
+            precip_source=synth_precip_imgs, precip_band='pr', **WB_SOIL_ARGS
+        ),
+        state_date,
+    )
+    if state_version is None:
+        # Image math drops the state properties
+        state_img = state_img.multiply(1)
+    else:
+        state_img = state_img.set({'wb_state_version': state_version})
+    for function in [interpolate.daily_ke, interpolate.daily_ke_state]:
+        with pytest.raises(ValueError):
+            function(
+                synth_test_imgs.filterDate('2018-03-01', '2018-03-20'), model_args={},
+                precip_source=synth_precip_imgs, precip_band='pr', init_img=state_img,
+                **WB_SOIL_ARGS
+            )
+
+
+def test_state_image(synth_test_imgs, synth_precip_imgs):
+    state_img = interpolate.state_image(
+        interpolate.daily_ke_state(
+            synth_test_imgs, precip_source=synth_precip_imgs, precip_band='pr',
+            **WB_SOIL_ARGS
+        ),
+        '2018-03-16',
+    )
+    output = utils.getinfo(state_img)
+    assert [b['id'] for b in output['bands']] == interpolate.WATER_BALANCE_STATE_BANDS
+    assert output['properties']['wb_state_version'] == interpolate.WATER_BALANCE_STATE_VERSION
+    assert output['properties']['wb_state_date'] == '2018-03-16'
+    assert output['properties']['system:index'] == '20180316'
+
 
 def test_soil_evap_fails_without_ndvi(synth_test_imgs):
     """Test that daily_ke raises exception if `ndvi` band not present"""
@@ -1,34 +1,92 @@
 import calendar
 import datetime
 import logging
-from time import sleep
 
 import ee
 
+from .cache import DiskCache
 
-def getinfo(ee_obj, n=4):
-    """Make an exponential back off getInfo call on an Earth Engine object"""
-    output = None
-    for i in range(1, n):
+# Opt-in getInfo result cache (see enable_getinfo_cache())
+getinfo_cache = None
+
+
+def enable_getinfo_cache(path, max_size=512 * 1024 ** 2, ttl=None):
+    """Cache the getinfo() results on disk
+
+    The results are keyed by a hash of the serialized expression, so identical
+    requests from any process using the same cache folder are only sent to
+    Earth Engine once.
+
+    Parameters
+    ----------
+    path : str
+        Cache folder.
+    max_size : int, optional
+        Maximum total size of the cache in bytes, the least recently used
+        results are removed first (the default is 512 MiB).
+    ttl : float, optional
+        Default number of seconds that a result is valid.  If not set
+        (the default), results do not expire.
+
+    Returns
+    -------
+    DiskCache
+
+    """
+    global getinfo_cache
+    getinfo_cache = DiskCache(path, max_size=max_size, ttl=ttl)
+    return getinfo_cache
+
+
+def disable_getinfo_cache():
+    """Stop caching the getinfo() results (the cache files are not removed)"""
+    global getinfo_cache
+    getinfo_cache = None
+
+
+def getinfo(ee_obj, n=4, cache_ttl=None):
+    """Make a getInfo call on an Earth Engine object with backoff retries
+
+    Capacity and rate limit errors are retried with jittered exponential
+    backoff (see request_pool.getinfo_retry()).  Other Earth Engine errors
+    are not retried and None is returned, while any other exception is raised.
+
+    If the getinfo cache is enabled, the cached result is returned instead
+    of sending the request and new (non-empty) results are cached.
+
+    Parameters
+    ----------
+    ee_obj : ee.ComputedObject
+    n : int, optional
+        Attempt limit, at most n - 1 requests are sent (the default is 4,
+        which sends up to 3 requests).
+    cache_ttl : float, optional
+        Number of seconds that the result is valid in the cache (the default
+        is the cache ttl).  Set to 0 to bypass the cache.
+
+    """
+    from . import request_pool
+
+    cache = getinfo_cache if cache_ttl != 0 else None
+    if cache is not None:
+        cache_key = cache.key(ee_obj)
+        hit, output = cache.get(cache_key)
+        if hit:
+            return output
+
+    result = request_pool.getinfo_retry(ee_obj, max_retries=max(n - 2, 0))
+    if result.error is not None:
+        if not isinstance(result.error, ee.ee_exception.EEException):
+            raise result.error
+        logging.info(f'    getInfo request failed after {result.attempts} attempt(s)')
+        logging.info(f'    {result.error}')
+    output = result.value
+
+    if cache is not None and output is not None:
         try:
-            output = ee_obj.getInfo()
-        except ee.ee_exception.EEException as e:
-            logging.info(f'    Resending query ({i}/{n})')
-            logging.info(f'    {e}')
-            sleep(i ** 3)
-            # if ('Earth Engine memory capacity exceeded' in str(e) or
-            #         'Earth Engine capacity exceeded' in str(e)):
-            #     logging.info(f'    Resending query ({i}/{n})')
-            #     logging.debug(f'    {e}')
-            #     sleep(i ** 2)
-            # else:
-            #     raise e
+            cache.set(cache_key, output, ttl=cache_ttl)
         except Exception as e:
-            logging.info(e)
-            break
-
-        if output:
-            break
+            logging.info(f'    getinfo result could not be cached: {e}')
 
     return output
 